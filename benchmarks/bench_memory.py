@@ -0,0 +1,102 @@
+"""
+Memory benchmark for large schematics.
+
+Builds a synthetic schematic of resistors, each with the usual properties
+and a wire, the way the parser builds it, and reports the memory retained by
+the Schema before and after compacting it (`Schema.compact` and
+`Schema.pack_geometry`):
+
+    python benchmarks/bench_memory.py
+    python benchmarks/bench_memory.py --instances 10000 100000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from cifconv.pin import Pin
+from cifconv.point import Point
+from cifconv.schema import Schema
+from cifconv.symbol import Symbol
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.wire import Wire
+
+PROPERTIES = {
+    "Value": "10k",
+    "Footprint": "Resistor_SMD:R_0603_1608Metric",
+    "Datasheet": "~",
+    "Description": "Resistor",
+}
+
+
+def fresh(text: str) -> str:
+    """Return a new string object equal to `text`, like the tokenizer creates."""
+    return text[:1] + text[1:]
+
+
+def make_schema(instances: int) -> Schema:
+    """Build a schema with `instances` resistors and as many wires."""
+    schema = Schema()
+    symbol = Symbol(
+        lib_id="Device:R",
+        type="Device",
+        ref="R",
+        pins=[
+            Pin(fresh("1"), fresh("~"), "passive", 0, 3.81, 270, 1.27),
+            Pin(fresh("2"), fresh("~"), "passive", 0, -3.81, 90, 1.27),
+        ],
+        package=None,
+    )
+    schema.symbols[symbol.lib_id] = symbol
+    for index in range(instances):
+        x = (index % 1000) * 10.16
+        y = (index // 1000) * 10.16
+        designator = f"R{index}"
+        attributes = {fresh("Reference"): designator}
+        for key, value in PROPERTIES.items():
+            attributes[fresh(key)] = fresh(value)
+        schema.instances.append(
+            SymbolInstance(
+                uuid=f"r-{index}",
+                lib_id=fresh(symbol.lib_id),
+                designator=designator,
+                x=x,
+                y=y,
+                attributes=attributes,
+                symbol=symbol,
+            )
+        )
+        wire = Wire(uuid=f"w-{index}", points=[Point(x, y + 3.81), Point(x, y + 6.35)])
+        schema.wires[wire.uuid] = wire
+    return schema
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--instances", type=int, nargs="+", default=[100_000])
+    args = parser.parse_args()
+
+    for instances in args.instances:
+        gc.collect()
+        tracemalloc.start()
+        schema = make_schema(instances)
+        gc.collect()
+        before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        schema.compact()
+        schema.pack_geometry()
+        elapsed = time.perf_counter() - start
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(
+            f"{instances:>9} instances {before / 1e6:8.1f}MB -> {after / 1e6:8.1f}MB"
+            f" {before / instances:6.0f} -> {after / instances:6.0f}B/instance"
+            f" compacted in {elapsed:6.3f}s"
+        )
+        del schema
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Scaling benchmark for Schema.nets.
+
+Builds synthetic schematics made of chains of 2-point wires and times the
+connectivity computation:
+
+    python benchmarks/bench_nets.py
+    python benchmarks/bench_nets.py --segments 10000 100000 --chains 100
+
+With --labelled every wire is a net of its own and every other one carries a
+label, which times the assembly of many small nets instead:
+
+    python benchmarks/bench_nets.py --labelled --segments 5000 50000
+"""
+
+import argparse
+import time
+
+from cifconv.label import Label
+from cifconv.point import Point
+from cifconv.schema import Schema
+from cifconv.wire import Wire
+
+
+def make_chain_schema(segments: int, chains: int) -> Schema:
+    """Build a schema with `segments` wires split evenly into `chains` chains."""
+    schema = Schema()
+    per_chain = max(1, segments // chains)
+    for index in range(segments):
+        chain, step = divmod(index, per_chain)
+        y = chain * 2.54
+        wire = Wire(
+            uuid=f"wire-{index}",
+            points=[Point(step * 2.54, y), Point((step + 1) * 2.54, y)],
+        )
+        schema.wires[wire.uuid] = wire
+    return schema
+
+
+def make_labelled_schema(segments: int) -> Schema:
+    """Build a schema with `segments` separate wires, every other one labelled."""
+    schema = Schema()
+    for index in range(segments):
+        wire = Wire(uuid=f"wire-{index}", points=[Point(0, index), Point(10, index)])
+        schema.wires[wire.uuid] = wire
+        if index % 2 == 0:
+            schema.labels.append(
+                Label(
+                    text=f"N{index}", x=0, y=index, rotation=0, uuid=f"label-{index}"
+                )
+            )
+    return schema
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--segments", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--chains", type=int, default=10)
+    parser.add_argument(
+        "--labelled",
+        action="store_true",
+        help="one labelled net per wire instead of chains",
+    )
+    args = parser.parse_args()
+
+    for segments in args.segments:
+        if args.labelled:
+            schema = make_labelled_schema(segments)
+        else:
+            schema = make_chain_schema(segments, args.chains)
+        start = time.perf_counter()
+        nets = schema.nets
+        elapsed = time.perf_counter() - start
+        print(
+            f"{segments:>9} segments {len(nets):>7} nets "
+            f"{elapsed:8.3f}s {elapsed / segments * 1e6:6.2f}us/segment"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import bisect
+import fnmatch
+import re
+from typing import TYPE_CHECKING, Iterable, Mapping
+
+if TYPE_CHECKING:
+    from cifconv.symbol_instance import SymbolInstance
+
+# characters that make a query value a glob pattern (see `fnmatch`)
+_GLOB_CHARS = re.compile(r"[*?\[]")
+
+
+class AttributeIndex:
+    """
+    Inverted index from attribute (key, value) to the symbol instances having it.
+
+    Built in one pass over the instances. An exact match is a dict lookup; a
+    prefix or glob match only scans the distinct values of a key, narrowed by
+    binary search to the values sharing the literal prefix of the pattern, not
+    the instances. Matches are case sensitive. The index is a snapshot;
+    `Schema.attribute_index` rebuilds it when instances are added or removed.
+    """
+
+    def __init__(self, instances: "list[SymbolInstance]"):
+        self.instances = instances
+        # key -> value -> positions of the instances in `instances`, ascending
+        self._postings: dict[str, dict[str, list[int]]] = {}
+        for position, instance in enumerate(instances):
+            for key, value in (instance.attributes or {}).items():
+                self._postings.setdefault(key, {}).setdefault(value, []).append(
+                    position
+                )
+        # key -> its distinct values, sorted, built on the first prefix query
+        self._sorted_values: dict[str, list[str]] = {}
+
+    def keys(self) -> list[str]:
+        """Return the attribute keys of all instances, in order of first use."""
+        return list(self._postings)
+
+    def values(self, key: str) -> list[str]:
+        """Return the distinct values of the attribute `key`, sorted."""
+        values = self._sorted_values.get(key)
+        if values is None:
+            values = self._sorted_values[key] = sorted(self._postings.get(key, ()))
+        return values
+
+    def find(self, key: str, value: str) -> "list[SymbolInstance]":
+        """Return the instances whose attribute `key` is exactly `value`."""
+        return self._instances_at(self._positions(key, [value]))
+
+    def find_prefix(self, key: str, prefix: str) -> "list[SymbolInstance]":
+        """Return the instances whose attribute `key` starts with `prefix`."""
+        return self._instances_at(self._positions(key, self._with_prefix(key, prefix)))
+
+    def find_glob(self, key: str, pattern: str) -> "list[SymbolInstance]":
+        """Return the instances whose attribute `key` matches the glob `pattern`."""
+        return self._instances_at(self._positions(key, self._matching(key, pattern)))
+
+    def query(self, conditions: Mapping[str, str]) -> "list[SymbolInstance]":
+        """
+        Return the instances matching all conditions, in instance order.
+
+        Each condition maps an attribute key to a value, which is matched as
+        a glob pattern if it contains `*`, `?` or `[`, and exactly otherwise.
+        No conditions match every instance.
+        """
+        if not conditions:
+            return list(self.instances)
+        matches = sorted(
+            (
+                self._positions(key, self._matching(key, pattern))
+                for key, pattern in conditions.items()
+            ),
+            key=len,
+        )
+        # intersect starting from the smallest match
+        positions = matches[0]
+        for other in matches[1:]:
+            positions &= other
+        return self._instances_at(positions)
+
+    def _matching(self, key: str, pattern: str) -> Iterable[str]:
+        """Distinct values of `key` matching a glob pattern or an exact value."""
+        wildcard = _GLOB_CHARS.search(pattern)
+        if wildcard is None:
+            return [pattern]
+        candidates = self._with_prefix(key, pattern[: wildcard.start()])
+        return [value for value in candidates if fnmatch.fnmatchcase(value, pattern)]
+
+    def _with_prefix(self, key: str, prefix: str) -> list[str]:
+        values = self.values(key)
+        if not prefix:
+            return values
+        start = bisect.bisect_left(values, prefix)
+        end = start
+        while end < len(values) and values[end].startswith(prefix):
+            end += 1
+        return values[start:end]
+
+    def _positions(self, key: str, values: Iterable[str]) -> set[int]:
+        by_value = self._postings.get(key, {})
+        positions: set[int] = set()
+        for value in values:
+            positions.update(by_value.get(value, ()))
+        return positions
+
+    def _instances_at(self, positions: set[int]) -> "list[SymbolInstance]":
+        return [self.instances[position] for position in sorted(positions)]
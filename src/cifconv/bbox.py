@@ -0,0 +1,166 @@
+"""
+Bounding boxes of symbol bodies.
+
+A symbol's body box is computed once when its library definition is parsed,
+from its graphics and pins, in symbol coordinates (see `Symbol.bbox_for`).
+`place_bboxes` transforms the boxes of many instances at once with NumPy.
+"""
+
+import math
+from typing import TYPE_CHECKING, Iterable
+
+if TYPE_CHECKING:
+    from cifconv.symbol_instance import SymbolInstance
+
+# (x min, y min, x max, y max)
+BBox = tuple[float, float, float, float]
+
+
+def points_bbox(points: Iterable[tuple[float, float]]) -> BBox | None:
+    """Return the bounding box of some points, None if there are none."""
+    xs: list[float] = []
+    ys: list[float] = []
+    for x, y in points:
+        xs.append(x)
+        ys.append(y)
+    if not xs:
+        return None
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def union_bbox(*boxes: BBox | None) -> BBox | None:
+    """Return the bounding box of some boxes, ignoring None."""
+    present = [box for box in boxes if box is not None]
+    if not present:
+        return None
+    return (
+        min(box[0] for box in present),
+        min(box[1] for box in present),
+        max(box[2] for box in present),
+        max(box[3] for box in present),
+    )
+
+
+def arc_bbox(
+    start: tuple[float, float], mid: tuple[float, float], end: tuple[float, float]
+) -> BBox:
+    """Return the bounding box of the circular arc from `start` through `mid` to `end`."""
+    (x1, y1), (x2, y2), (x3, y3) = start, mid, end
+    points = [start, mid, end]
+    denominator = 2 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    if abs(denominator) < 1e-12:
+        # the points are on a line
+        return points_bbox(points)  # type: ignore[return-value]
+    squares = (x1 * x1 + y1 * y1, x2 * x2 + y2 * y2, x3 * x3 + y3 * y3)
+    center_x = (
+        squares[0] * (y2 - y3) + squares[1] * (y3 - y1) + squares[2] * (y1 - y2)
+    ) / denominator
+    center_y = (
+        squares[0] * (x3 - x2) + squares[1] * (x1 - x3) + squares[2] * (x2 - x1)
+    ) / denominator
+    radius = math.hypot(x1 - center_x, y1 - center_y)
+
+    def angle(x: float, y: float) -> float:
+        return math.atan2(y - center_y, x - center_x) % math.tau
+
+    start_angle = angle(x1, y1)
+    sweep = (angle(x3, y3) - start_angle) % math.tau
+    if (angle(x2, y2) - start_angle) % math.tau > sweep:
+        # the arc runs clockwise from start to end, i.e. counterclockwise
+        # from end to start
+        start_angle = angle(x3, y3)
+        sweep = math.tau - sweep
+    for quarter in range(4):
+        if (quarter * math.pi / 2 - start_angle) % math.tau <= sweep:
+            points.append(
+                (
+                    center_x + radius * round(math.cos(quarter * math.pi / 2)),
+                    center_y + radius * round(math.sin(quarter * math.pi / 2)),
+                )
+            )
+    return points_bbox(points)  # type: ignore[return-value]
+
+
+def transform_bbox(
+    bbox: BBox, x: float, y: float, rotation: float, mirror: str | None
+) -> BBox:
+    """
+    Place a symbol box like `SymbolInstance.place_pins` places pins: mirrored
+    in symbol coordinates (`"x"` flips y, `"y"` flips x), rotated by `rotation`
+    degrees and moved to (x, y).
+    """
+    rad = math.radians(rotation)
+    cos = math.cos(rad)
+    sin = math.sin(rad)
+    x_sign = -1 if mirror == "y" else 1
+    y_sign = -1 if mirror == "x" else 1
+    corners = []
+    for corner_x, corner_y in (
+        (bbox[0], bbox[1]),
+        (bbox[2], bbox[1]),
+        (bbox[0], bbox[3]),
+        (bbox[2], bbox[3]),
+    ):
+        corner_x *= x_sign
+        corner_y *= y_sign
+        corners.append(
+            (x + corner_x * cos - corner_y * sin, y + corner_x * sin + corner_y * cos)
+        )
+    return points_bbox(corners)  # type: ignore[return-value]
+
+
+def place_bboxes(instances: "list[SymbolInstance]") -> None:
+    """
+    Compute the placed body boxes of many instances at once (see `SymbolInstance.bbox`).
+
+    All boxes are transformed in one batch of NumPy array operations and
+    stored on the instances. Without NumPy, each instance computes its own box.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        for instance in instances:
+            instance.bbox
+        return
+
+    placed = [
+        (instance, box)
+        for instance in instances
+        if instance.symbol is not None
+        and (box := instance.symbol.bbox_for(instance.unit, instance.body_style))
+        is not None
+    ]
+    for instance in instances:
+        instance.bbox = None
+    if not placed:
+        return
+    boxes = np.array([box for _, box in placed], dtype=float)
+    # (n, 4 corners, 2) in symbol coordinates
+    corners = np.stack(
+        [
+            boxes[:, [0, 1]],
+            boxes[:, [2, 1]],
+            boxes[:, [0, 3]],
+            boxes[:, [2, 3]],
+        ],
+        axis=1,
+    )
+    signs = np.array(
+        [
+            (-1 if instance.mirror == "y" else 1, -1 if instance.mirror == "x" else 1)
+            for instance, _ in placed
+        ],
+        dtype=float,
+    )
+    corners *= signs[:, np.newaxis, :]
+    rad = np.radians([instance.rotation for instance, _ in placed])
+    cos = np.cos(rad)[:, np.newaxis]
+    sin = np.sin(rad)[:, np.newaxis]
+    offsets = np.array([(instance.x, instance.y) for instance, _ in placed])
+    xs = offsets[:, [0]] + corners[:, :, 0] * cos - corners[:, :, 1] * sin
+    ys = offsets[:, [1]] + corners[:, :, 0] * sin + corners[:, :, 1] * cos
+    placed_boxes = np.stack(
+        [xs.min(axis=1), ys.min(axis=1), xs.max(axis=1), ys.max(axis=1)], axis=1
+    )
+    for (instance, _), box in zip(placed, placed_boxes.tolist()):
+        instance.bbox = tuple(box)
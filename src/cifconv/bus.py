@@ -7,3 +7,5 @@ from cifconv.point import Point
 class Bus:
     uuid: str
     points: List[Point]
+    # number of the sheet instance the element is on, see `Label.sheet`
+    sheet: int = 0
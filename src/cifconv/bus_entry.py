@@ -12,6 +12,8 @@ class BusEntry:
     size_x: float
     size_y: float
     uuid: str
+    # number of the sheet instance the element is on, see `Label.sheet`
+    sheet: int = 0
 
     @property
     def start_point(self) -> Point:
@@ -1,36 +1,28 @@
+import functools
 import math
-from typing import cast
+from typing import Hashable, cast
 
 from loguru import logger
 
+from cifconv.bbox import BBox, arc_bbox, points_bbox, union_bbox
 from cifconv.bus import Bus
 from cifconv.bus_entry import BusEntry
+from cifconv.compact import compact_instance
+from cifconv.element_spec import ElementSpec, FieldSpec, compile_element_spec
+from cifconv.expect import expect_ident, expect_list, expect_number, expect_str
 from cifconv.expr import AtomExpr, Expr, ListExpr
-from cifconv.label import Label
+from cifconv.junction import Junction
+from cifconv.label import Label, LabelKind
 from cifconv.no_connect import NoConnect
 from cifconv.pin import Pin, PinType
-from cifconv.pin_instance import PinInstance
 from cifconv.point import Point
 from cifconv.schema import Schema
+from cifconv.sheet import Sheet, SheetPin
 from cifconv.symbol import Symbol
 from cifconv.symbol_instance import SymbolInstance
 from cifconv.wire import Wire
 
 
-def expect_list(expr: Expr, first_token_value: str) -> list[Expr]:
-    msg = f"Expected a list starting with '{first_token_value}' at line {expr.line}, column {expr.col}, but got {expr}"
-    if not isinstance(expr, ListExpr) or len(expr.sub_exprs) == 0:
-        raise ValueError(msg)
-    first_token = expr.sub_exprs[0]
-    if (
-        not isinstance(first_token, AtomExpr)
-        or first_token.value.type != first_token.value.type.IDENT
-        or first_token.value.value != first_token_value
-    ):
-        raise ValueError(msg)
-    return expr.sub_exprs[1:]
-
-
 def eat_header(expr: Expr) -> list[Expr]:
     """
     处理[Header Section](https://dev-docs.kicad.org/en/file-formats/sexpr-schematic/index.html#_header_section).
@@ -40,29 +32,6 @@ def eat_header(expr: Expr) -> list[Expr]:
     return expect_list(expr, "kicad_sch")
 
 
-def expect_number(expr: Expr) -> float:
-    if not isinstance(expr, AtomExpr) or expr.value.type != expr.value.type.NUMBER:
-        raise ValueError(
-            f"Error: Expected a number atom at line {expr.line}, column {expr.col}, but got {expr}"
-        )
-    return float(expr.value.value)
-
-
-def expect_str(expr: Expr) -> str:
-    if not isinstance(expr, AtomExpr) or expr.value.type != expr.value.type.STRING:
-        msg = f"Error: Expected a string atom at line {expr.line}, column {expr.col}, but got {expr}"
-        raise ValueError(msg)
-    return expr.value.value
-
-
-def expect_ident(expr: Expr) -> str:
-    if not isinstance(expr, AtomExpr) or expr.value.type != expr.value.type.IDENT:
-        raise ValueError(
-            f"Error: Expected a ident atom at line {expr.line}, column {expr.col}, but got {expr}"
-        )
-    return expr.value.value
-
-
 def process_symbol(symbol_expr: ListExpr):
     sub_exprs = expect_list(symbol_expr, "symbol")
     id = expect_str(sub_exprs[0])
@@ -74,8 +43,14 @@ def process_symbol(symbol_expr: ListExpr):
     ref = ""
     footprint: str | None = None
     pins: list[Pin] = []
+    sub_symbol_pins: dict[tuple[int, int], list[Pin]] = {}
+    sub_symbol_bboxes: dict[tuple[int, int], BBox | None] = {}
+    graphics: list[tuple[tuple[int, int], tuple]] = []
     description: str | None = None
+    power = False
     for sub_expr in sub_exprs[1:]:
+        if is_list(sub_expr, "power"):
+            power = True
         if is_list(sub_expr, "property"):
             # extract property
             property_sub_exprs = expect_list(sub_expr, "property")
@@ -90,7 +65,18 @@ def process_symbol(symbol_expr: ListExpr):
         if is_list(sub_expr, "symbol"):
             assert isinstance(sub_expr, ListExpr)
             symbol_name = expect_str(sub_expr.sub_exprs[1])
-            pins.extend(collect_pins(symbol_name, sub_expr))
+            symbol_pins = collect_pins(symbol_name, sub_expr)
+            pins.extend(symbol_pins)
+            unit_and_body_style = parse_unit_and_body_style(symbol_name)
+            sub_symbol_pins.setdefault(unit_and_body_style, []).extend(symbol_pins)
+            sub_symbol_bboxes[unit_and_body_style] = union_bbox(
+                sub_symbol_bboxes.get(unit_and_body_style),
+                graphics_bbox(sub_expr),
+                pins_bbox(symbol_pins),
+            )
+            graphics.append((unit_and_body_style, graphics_key(sub_expr)))
+
+    unit_bboxes = build_unit_bbox_tables(sub_symbol_pins, sub_symbol_bboxes)
 
     return Symbol(
         lib_id=id,
@@ -99,9 +85,178 @@ def process_symbol(symbol_expr: ListExpr):
         pins=pins,
         package=footprint,
         description=description,
+        unit_pins=build_unit_pin_tables(sub_symbol_pins),
+        power=power,
+        bbox=union_bbox(*sub_symbol_bboxes.values()),
+        unit_bboxes=unit_bboxes,
+        graphics=tuple(graphics),
     )
 
 
+def parse_unit_and_body_style(symbol_name: str) -> tuple[int, int]:
+    """
+    Parse the unit and body style from the name of a sub-symbol.
+
+    Sub-symbols are named `NAME_UNIT_STYLE`, e.g. `R_0_1` or `LM324_2_1`, where
+    unit 0 holds the items shared by all units and body style 0 the items shared
+    by all body styles. Names that do not follow this pattern are treated as
+    shared by all units and body styles.
+    """
+    parts = symbol_name.rsplit("_", 2)
+    if len(parts) != 3 or not parts[1].isdigit() or not parts[2].isdigit():
+        return (0, 0)
+    return (int(parts[1]), int(parts[2]))
+
+
+def build_unit_pin_tables(
+    sub_symbol_pins: dict[tuple[int, int], list[Pin]],
+) -> dict[tuple[int, int], list[Pin]]:
+    """
+    Build the pin table of every (unit, body_style) of a symbol.
+
+    Each table holds the pins of the unit itself plus the pins shared by all
+    units and/or all body styles, so an instance can select its pins by its
+    `(unit N)` without filtering.
+    """
+    units = sorted({unit for unit, _ in sub_symbol_pins if unit > 0}) or [1]
+    body_styles = sorted(
+        {body_style for _, body_style in sub_symbol_pins if body_style > 0}
+    ) or [1]
+    unit_pins: dict[tuple[int, int], list[Pin]] = {}
+    for unit in units:
+        for body_style in body_styles:
+            unit_pins[(unit, body_style)] = [
+                *sub_symbol_pins.get((0, 0), []),
+                *sub_symbol_pins.get((0, body_style), []),
+                *sub_symbol_pins.get((unit, 0), []),
+                *sub_symbol_pins.get((unit, body_style), []),
+            ]
+    return unit_pins
+
+
+def build_unit_bbox_tables(
+    sub_symbol_pins: dict[tuple[int, int], list[Pin]],
+    sub_symbol_bboxes: dict[tuple[int, int], BBox | None],
+) -> dict[tuple[int, int], BBox]:
+    """
+    Build the body box of every (unit, body_style) of a symbol.
+
+    Like `build_unit_pin_tables`, each box covers the sub-symbol of the unit
+    itself plus the sub-symbols shared by all units and/or all body styles.
+    """
+    # the same (unit, body_style) keys as the pin tables
+    units_and_body_styles = build_unit_pin_tables(
+        {key: [] for key in (*sub_symbol_pins, *sub_symbol_bboxes)}
+    )
+    unit_bboxes: dict[tuple[int, int], BBox] = {}
+    for unit, body_style in units_and_body_styles:
+        bbox = union_bbox(
+            sub_symbol_bboxes.get((0, 0)),
+            sub_symbol_bboxes.get((0, body_style)),
+            sub_symbol_bboxes.get((unit, 0)),
+            sub_symbol_bboxes.get((unit, body_style)),
+        )
+        if bbox is not None:
+            unit_bboxes[(unit, body_style)] = bbox
+    return unit_bboxes
+
+
+def graphics_bbox(sub_symbol_expr: ListExpr) -> BBox | None:
+    """
+    Return the bounding box of the graphic items of a sub-symbol.
+
+    Covers `rectangle`, `polyline`, `bezier`, `circle` and `arc` items; stroke
+    widths and texts are ignored.
+    """
+    boxes: list[BBox | None] = []
+    for item_expr in sub_symbol_expr.sub_exprs:
+        if not isinstance(item_expr, ListExpr) or not item_expr.sub_exprs:
+            continue
+        head = item_expr.sub_exprs[0]
+        if not isinstance(head, AtomExpr):
+            continue
+        kind = head.value.value
+        if kind not in ("rectangle", "polyline", "bezier", "circle", "arc"):
+            continue
+        # "start", "mid", "end", "center" -> (x, y), "radius" -> (radius,)
+        coordinates: dict[str, tuple[float, ...]] = {}
+        points: list[tuple[float, float]] = []
+        for sub_expr in item_expr.sub_exprs[1:]:
+            if is_list(sub_expr, "pts"):
+                for xy_expr in expect_list(sub_expr, "pts"):
+                    xy = expect_list(xy_expr, "xy")
+                    points.append((expect_number(xy[0]), expect_number(xy[1])))
+            elif isinstance(sub_expr, ListExpr) and sub_expr.sub_exprs:
+                name = sub_expr.sub_exprs[0]
+                if isinstance(name, AtomExpr) and name.value.value in (
+                    "start",
+                    "mid",
+                    "end",
+                    "center",
+                    "radius",
+                ):
+                    coordinates[name.value.value] = tuple(
+                        expect_number(value) for value in sub_expr.sub_exprs[1:3]
+                    )
+        if kind == "rectangle" and "start" in coordinates and "end" in coordinates:
+            points = [coordinates["start"], coordinates["end"]]  # type: ignore[list-item]
+        elif kind == "circle" and "center" in coordinates and "radius" in coordinates:
+            center_x, center_y = coordinates["center"]
+            radius = coordinates["radius"][0]
+            points = [
+                (center_x - radius, center_y - radius),
+                (center_x + radius, center_y + radius),
+            ]
+        elif kind == "arc" and {"start", "mid", "end"} <= coordinates.keys():
+            boxes.append(
+                arc_bbox(
+                    coordinates["start"],  # type: ignore[arg-type]
+                    coordinates["mid"],  # type: ignore[arg-type]
+                    coordinates["end"],  # type: ignore[arg-type]
+                )
+            )
+            continue
+        boxes.append(points_bbox(points))
+    return union_bbox(*boxes)
+
+
+def graphics_key(sub_symbol_expr: ListExpr) -> tuple:
+    """
+    Return the graphic items of a sub-symbol as a hashable tuple.
+
+    Every item but the pins (and the sub-symbol name) is turned into the nested
+    tuple of its token values, so two sub-symbols drawing the same shapes,
+    strokes, fills and texts get equal keys.
+    """
+    return tuple(
+        expr_key(item_expr)
+        for item_expr in sub_symbol_expr.sub_exprs
+        if isinstance(item_expr, ListExpr) and not is_list(item_expr, "pin")
+    )
+
+
+def expr_key(expr: Expr) -> Hashable:
+    """Return an expression as the nested tuple of its token values."""
+    if isinstance(expr, ListExpr):
+        return tuple(expr_key(sub_expr) for sub_expr in expr.sub_exprs)
+    return cast(AtomExpr, expr).value.value
+
+
+def pins_bbox(pins: list[Pin]) -> BBox | None:
+    """Return the bounding box of pins, from their connection points to the body."""
+    points: list[tuple[float, float]] = []
+    for pin in pins:
+        rad = math.radians(pin.rotation)
+        points.append((pin.rel_x, pin.rel_y))
+        points.append(
+            (
+                pin.rel_x + pin.length * math.cos(rad),
+                pin.rel_y + pin.length * math.sin(rad),
+            )
+        )
+    return points_bbox(points)
+
+
 def process_pin(symbol_name: str, pin_expr: ListExpr) -> Pin:
     sub_exprs = expect_list(pin_expr, "pin")
     type_: str = expect_ident(sub_exprs[0])
@@ -110,6 +265,7 @@ def process_pin(symbol_name: str, pin_expr: ListExpr) -> Pin:
     rel_x: float | None = None
     rel_y: float | None = None
     rotation: float = 0
+    length: float = 0
     for sub_expr in sub_exprs[1:]:
         if is_list(sub_expr, "name"):
             assert isinstance(sub_expr, ListExpr)
@@ -126,6 +282,9 @@ def process_pin(symbol_name: str, pin_expr: ListExpr) -> Pin:
                 if len(sub_expr.sub_exprs) > 3
                 else 0
             )
+        elif is_list(sub_expr, "length"):
+            assert isinstance(sub_expr, ListExpr)
+            length = expect_number(sub_expr.sub_exprs[1])
     assert name is not None, f"Pin in symbol {symbol_name} is missing name"
     assert rel_x is not None, (
         f"Pin {name} in symbol {symbol_name} is missing attribute 'at'"
@@ -140,6 +299,7 @@ def process_pin(symbol_name: str, pin_expr: ListExpr) -> Pin:
         rel_x=rel_x,
         rel_y=rel_y,
         rotation=rotation,
+        length=length,
     )
 
 
@@ -167,8 +327,17 @@ def is_list(expr: Expr, first_token_value: str) -> bool:
 
 
 def process_symbol_instance(
-    symbol_instance_expr: ListExpr, schema: Schema
+    symbol_instance_expr: ListExpr,
+    schema: Schema,
+    deferred_symbols: dict[str, ListExpr] | None = None,
 ) -> SymbolInstance:
+    """
+    Process a placed symbol instance.
+
+    The symbol definition is looked up in `schema.symbols`. If it is not there
+    yet but its expression is in `deferred_symbols`, it is evaluated now and
+    added to `schema.symbols`.
+    """
     sub_exprs = expect_list(symbol_instance_expr, "symbol")
 
     lib_id = ""
@@ -177,11 +346,22 @@ def process_symbol_instance(
     x: float | None = None
     y: float | None = None
     rotation: float = 0
+    mirror: str | None = None
+    unit = 1
+    body_style = 1
     attributes: dict[str, str] = {}
+    references: dict[str, str] | None = None
     for sub_expr in sub_exprs:
         if is_list(sub_expr, "lib_id"):
             assert isinstance(sub_expr, ListExpr)
             lib_id = expect_str(sub_expr.sub_exprs[1])
+        elif is_list(sub_expr, "unit"):
+            assert isinstance(sub_expr, ListExpr)
+            unit = int(expect_number(sub_expr.sub_exprs[1]))
+        elif is_list(sub_expr, "convert") or is_list(sub_expr, "body_style"):
+            # `convert` was renamed to `body_style` in KiCad 9
+            assert isinstance(sub_expr, ListExpr)
+            body_style = int(expect_number(sub_expr.sub_exprs[1]))
         elif is_list(sub_expr, "uuid"):
             assert isinstance(sub_expr, ListExpr)
             uuid = expect_str(sub_expr.sub_exprs[1])
@@ -198,6 +378,12 @@ def process_symbol_instance(
             y = expect_number(sub_expr.sub_exprs[2])
             if len(sub_expr.sub_exprs) > 3:
                 rotation = expect_number(sub_expr.sub_exprs[3])
+        elif is_list(sub_expr, "mirror"):
+            assert isinstance(sub_expr, ListExpr)
+            mirror = expect_ident(sub_expr.sub_exprs[1])
+        elif is_list(sub_expr, "instances"):
+            assert isinstance(sub_expr, ListExpr)
+            references = parse_instance_references(sub_expr)
     if uuid == "":
         raise ValueError("Symbol instance is missing uuid")
     if lib_id == "":
@@ -207,25 +393,6 @@ def process_symbol_instance(
     if x is None or y is None:
         raise ValueError("Symbol instance is missing at property")
 
-    pin_instances: list[PinInstance] = []
-    symbol_def = schema.symbols.get(lib_id)
-    if symbol_def is not None:
-        for pin in symbol_def.pins:
-            rad = math.radians(rotation)
-            abs_x = x + pin.rel_x * math.cos(rad) - pin.rel_y * math.sin(rad)
-            abs_y = y + pin.rel_x * math.sin(rad) + pin.rel_y * math.cos(rad)
-            abs_rotation = (pin.rotation + rotation) % 360
-            pin_instances.append(
-                PinInstance(
-                    number=pin.number,
-                    name=pin.name,
-                    type=pin.type,
-                    x=abs_x,
-                    y=abs_y,
-                    rotation=abs_rotation,
-                )
-            )
-
     return SymbolInstance(
         uuid=uuid,
         lib_id=lib_id,
@@ -234,10 +401,149 @@ def process_symbol_instance(
         y=y,
         rotation=rotation,
         attributes=attributes,
-        pin_instances=pin_instances if pin_instances else None,
+        unit=unit,
+        body_style=body_style,
+        references=references,
+        mirror=mirror,
+        symbol=resolve_symbol(lib_id, schema, deferred_symbols),
+    )
+
+
+def parse_instance_references(instances_expr: ListExpr) -> dict[str, str]:
+    """
+    Parse the per sheet instance references of a symbol instance.
+
+    A symbol in a sheet that is placed several times has a reference for every
+    placement, keyed by the instance path of the sheet:
+        (instances (project "NAME" (path "/ROOT-UUID/SHEET-UUID" (reference "R5") (unit 1))))
+    """
+    references: dict[str, str] = {}
+    for project_expr in expect_list(instances_expr, "instances"):
+        if not is_list(project_expr, "project"):
+            continue
+        for path_expr in expect_list(project_expr, "project")[1:]:
+            if not is_list(path_expr, "path"):
+                continue
+            path_sub_exprs = expect_list(path_expr, "path")
+            path = expect_str(path_sub_exprs[0])
+            for item_expr in path_sub_exprs[1:]:
+                if is_list(item_expr, "reference"):
+                    references[path] = expect_str(expect_list(item_expr, "reference")[0])
+    return references
+
+
+def process_sheet(sheet_expr: ListExpr) -> Sheet:
+    """
+    Process a hierarchical sheet symbol.
+
+    Parses a sheet expression per the KiCad schematic file format:
+        (sheet (at X Y) (size W H) (uuid "...")
+            (property "Sheetname" "NAME" ...) (property "Sheetfile" "FILE" ...)
+            (pin "NAME" TYPE (at X Y ROT) (uuid "...")) ...)
+
+    KiCad 6 spells the properties "Sheet name" and "Sheet file".
+
+    Raises:
+        ValueError: If the sheet is missing its uuid, position or file.
+    """
+    sub_exprs = expect_list(sheet_expr, "sheet")
+    uuid = ""
+    name = ""
+    file = ""
+    x: float | None = None
+    y: float | None = None
+    width: float = 0
+    height: float = 0
+    pins: list[SheetPin] = []
+    for sub_expr in sub_exprs:
+        if is_list(sub_expr, "at"):
+            at_sub_exprs = expect_list(sub_expr, "at")
+            x = expect_number(at_sub_exprs[0])
+            y = expect_number(at_sub_exprs[1])
+        elif is_list(sub_expr, "size"):
+            size_sub_exprs = expect_list(sub_expr, "size")
+            width = expect_number(size_sub_exprs[0])
+            height = expect_number(size_sub_exprs[1])
+        elif is_list(sub_expr, "uuid"):
+            uuid = expect_str(expect_list(sub_expr, "uuid")[0])
+        elif is_list(sub_expr, "property"):
+            property_sub_exprs = expect_list(sub_expr, "property")
+            property_key = expect_str(property_sub_exprs[0])
+            property_value = expect_str(property_sub_exprs[1])
+            if property_key in ("Sheetname", "Sheet name"):
+                name = property_value
+            elif property_key in ("Sheetfile", "Sheet file"):
+                file = property_value
+        elif is_list(sub_expr, "pin"):
+            assert isinstance(sub_expr, ListExpr)
+            pins.append(process_sheet_pin(sub_expr))
+    if uuid == "":
+        raise ValueError("Sheet is missing uuid")
+    if x is None or y is None:
+        raise ValueError("Sheet is missing position (at)")
+    if file == "":
+        raise ValueError("Sheet is missing Sheetfile property")
+    return Sheet(
+        uuid=uuid,
+        name=name,
+        file=file,
+        x=x,
+        y=y,
+        width=width,
+        height=height,
+        pins=pins,
     )
 
 
+def process_sheet_pin(pin_expr: ListExpr) -> SheetPin:
+    sub_exprs = expect_list(pin_expr, "pin")
+    name = expect_str(sub_exprs[0])
+    type_ = expect_ident(sub_exprs[1])
+    x: float | None = None
+    y: float | None = None
+    uuid = ""
+    for sub_expr in sub_exprs[2:]:
+        if is_list(sub_expr, "at"):
+            at_sub_exprs = expect_list(sub_expr, "at")
+            x = expect_number(at_sub_exprs[0])
+            y = expect_number(at_sub_exprs[1])
+        elif is_list(sub_expr, "uuid"):
+            uuid = expect_str(expect_list(sub_expr, "uuid")[0])
+    if x is None or y is None:
+        raise ValueError(f"Sheet pin {name} is missing position (at)")
+    return SheetPin(name=name, type=type_, x=x, y=y, uuid=uuid)
+
+
+def resolve_symbol(
+    lib_id: str, schema: Schema, deferred_symbols: dict[str, ListExpr] | None
+) -> Symbol | None:
+    symbol = schema.symbols.get(lib_id)
+    if symbol is None and deferred_symbols:
+        symbol_expr = deferred_symbols.pop(lib_id, None)
+        if symbol_expr is not None:
+            symbol = process_symbol(symbol_expr)
+            schema.symbols[lib_id] = symbol
+    return symbol
+
+
+WIRE_SPEC = ElementSpec(
+    head="wire",
+    name="Wire",
+    factory=Wire,
+    fields=(
+        FieldSpec("uuid", "uuid", required=True),
+        FieldSpec(
+            "points",
+            "pts",
+            type="points",
+            min_items=2,
+            error="Wire must have at least 2 segments",
+        ),
+    ),
+)
+extract_wire = compile_element_spec(WIRE_SPEC)
+
+
 def process_wire(wire_expr: ListExpr):
     """
     Process a wire expression and extract its properties.
@@ -260,25 +566,25 @@ def process_wire(wire_expr: ListExpr):
         AssertionError: If the expression structure is malformed or contains
             unexpected data types
     """
-    sub_exprs = expect_list(wire_expr, "wire")
-    uuid = ""
-    points: list[Point] = []
-    for sub_expr in sub_exprs:
-        if is_list(sub_expr, "uuid"):
-            assert isinstance(sub_expr, ListExpr)
-            uuid = expect_str(sub_expr.sub_exprs[1])
-        elif is_list(sub_expr, "pts"):
-            assert isinstance(sub_expr, ListExpr)
-            for pt_expr in sub_expr.sub_exprs[1:]:
-                assert isinstance(pt_expr, ListExpr)
-                x = expect_number(pt_expr.sub_exprs[1])
-                y = expect_number(pt_expr.sub_exprs[2])
-                points.append(Point(x, y))
-    if uuid == "":
-        raise ValueError("Wire is missing uuid")
-    if len(points) < 2:
-        raise ValueError("Wire must have at least 2 segments")
-    return Wire(uuid=uuid, points=points)
+    return extract_wire(wire_expr)
+
+
+BUS_SPEC = ElementSpec(
+    head="bus",
+    name="Bus",
+    factory=Bus,
+    fields=(
+        FieldSpec("uuid", "uuid", required=True),
+        FieldSpec(
+            "points",
+            "pts",
+            type="points",
+            min_items=2,
+            error="Bus must have at least 2 segments",
+        ),
+    ),
+)
+extract_bus = compile_element_spec(BUS_SPEC)
 
 
 def process_bus(bus_expr: ListExpr):
@@ -303,25 +609,41 @@ def process_bus(bus_expr: ListExpr):
     Note: Buses share the same structure as wires, but they may be treated differently
       in later processing stages based on their intended use in the circuit design.
     """
-    sub_exprs = expect_list(bus_expr, "bus")
-    uuid = ""
-    points: list[Point] = []
-    for sub_expr in sub_exprs:
-        if is_list(sub_expr, "uuid"):
-            assert isinstance(sub_expr, ListExpr)
-            uuid = expect_str(sub_expr.sub_exprs[1])
-        elif is_list(sub_expr, "pts"):
-            assert isinstance(sub_expr, ListExpr)
-            for pt_expr in sub_expr.sub_exprs[1:]:
-                assert isinstance(pt_expr, ListExpr)
-                x = expect_number(pt_expr.sub_exprs[1])
-                y = expect_number(pt_expr.sub_exprs[2])
-                points.append(Point(x, y))
-    if uuid == "":
-        raise ValueError("Bus is missing uuid")
-    if len(points) < 2:
-        raise ValueError("Bus must have at least 2 segments")
-    return Bus(uuid=uuid, points=points)
+    return extract_bus(bus_expr)
+
+
+def label_spec(head: LabelKind, name: str) -> ElementSpec:
+    """Spec of a label of any kind, they only differ in their head."""
+    return ElementSpec(
+        head=head,
+        name=name,
+        factory=functools.partial(Label, kind=head),
+        fields=(
+            FieldSpec("text", None, index=0),
+            FieldSpec("uuid", "uuid", required=True),
+            FieldSpec(
+                "x",
+                "at",
+                1,
+                "number",
+                required=True,
+                error=f"{name} is missing position (at)",
+            ),
+            FieldSpec(
+                "y",
+                "at",
+                2,
+                "number",
+                required=True,
+                error=f"{name} is missing position (at)",
+            ),
+            FieldSpec("rotation", "at", 3, "number", default=0),
+        ),
+    )
+
+
+LABEL_SPEC = label_spec("label", "Label")
+extract_label = compile_element_spec(LABEL_SPEC)
 
 
 def process_label(label_expr: ListExpr) -> Label:
@@ -340,27 +662,75 @@ def process_label(label_expr: ListExpr) -> Label:
     Raises:
         ValueError: If the label is missing text, position, or uuid.
     """
-    sub_exprs = expect_list(label_expr, "label")
-    text = expect_str(sub_exprs[0])
-    uuid = ""
-    x: float | None = None
-    y: float | None = None
-    rotation: float = 0
-    for sub_expr in sub_exprs[1:]:
-        if is_list(sub_expr, "at"):
-            assert isinstance(sub_expr, ListExpr)
-            x = expect_number(sub_expr.sub_exprs[1])
-            y = expect_number(sub_expr.sub_exprs[2])
-            if len(sub_expr.sub_exprs) > 3:
-                rotation = expect_number(sub_expr.sub_exprs[3])
-        elif is_list(sub_expr, "uuid"):
-            assert isinstance(sub_expr, ListExpr)
-            uuid = expect_str(sub_expr.sub_exprs[1])
-    if uuid == "":
-        raise ValueError("Label is missing uuid")
-    if x is None or y is None:
-        raise ValueError("Label is missing position (at)")
-    return Label(text=text, x=x, y=y, rotation=rotation, uuid=uuid)
+    return extract_label(label_expr)
+
+
+GLOBAL_LABEL_SPEC = label_spec("global_label", "GlobalLabel")
+extract_global_label = compile_element_spec(GLOBAL_LABEL_SPEC)
+
+
+def process_global_label(global_label_expr: ListExpr) -> Label:
+    """
+    Process a global label expression.
+
+    Parses a global_label expression per the KiCad schematic file format:
+        (global_label "TEXT" (shape input) (at X Y ROT) (effects ...) (uuid "...")
+            (property "Intersheetrefs" ...))
+
+    Returns:
+        Label: A Label of kind "global_label".
+
+    Raises:
+        ValueError: If the global label is missing text, position, or uuid.
+    """
+    return extract_global_label(global_label_expr)
+
+
+HIERARCHICAL_LABEL_SPEC = label_spec("hierarchical_label", "HierarchicalLabel")
+extract_hierarchical_label = compile_element_spec(HIERARCHICAL_LABEL_SPEC)
+
+
+def process_hierarchical_label(hierarchical_label_expr: ListExpr) -> Label:
+    """
+    Process a hierarchical label expression.
+
+    Parses a hierarchical_label expression per the KiCad schematic file format:
+        (hierarchical_label "TEXT" (shape input) (at X Y ROT) (effects ...) (uuid "..."))
+
+    Returns:
+        Label: A Label of kind "hierarchical_label".
+
+    Raises:
+        ValueError: If the hierarchical label is missing text, position, or uuid.
+    """
+    return extract_hierarchical_label(hierarchical_label_expr)
+
+
+NO_CONNECT_SPEC = ElementSpec(
+    head="no_connect",
+    name="NoConnect",
+    factory=NoConnect,
+    fields=(
+        FieldSpec("uuid", "uuid", required=True),
+        FieldSpec(
+            "x",
+            "at",
+            1,
+            "number",
+            required=True,
+            error="NoConnect is missing position (at)",
+        ),
+        FieldSpec(
+            "y",
+            "at",
+            2,
+            "number",
+            required=True,
+            error="NoConnect is missing position (at)",
+        ),
+    ),
+)
+extract_no_connect = compile_element_spec(NO_CONNECT_SPEC)
 
 
 def process_no_connect(no_connect_expr: ListExpr) -> NoConnect:
@@ -379,26 +749,36 @@ def process_no_connect(no_connect_expr: ListExpr) -> NoConnect:
     Raises:
         ValueError: If the no_connect is missing position or uuid.
     """
-    sub_exprs = expect_list(no_connect_expr, "no_connect")
-    uuid = ""
-    x: float | None = None
-    y: float | None = None
-
-    for sub_expr in sub_exprs:
-        if is_list(sub_expr, "at"):
-            assert isinstance(sub_expr, ListExpr)
-            x = expect_number(sub_expr.sub_exprs[1])
-            y = expect_number(sub_expr.sub_exprs[2])
-        elif is_list(sub_expr, "uuid"):
-            assert isinstance(sub_expr, ListExpr)
-            uuid = expect_str(sub_expr.sub_exprs[1])
-
-    if uuid == "":
-        raise ValueError("NoConnect is missing uuid")
-    if x is None or y is None:
-        raise ValueError("NoConnect is missing position (at)")
-
-    return NoConnect(x=x, y=y, uuid=uuid)
+    return extract_no_connect(no_connect_expr)
+
+
+BUS_ENTRY_SPEC = ElementSpec(
+    head="bus_entry",
+    name="BusEntry",
+    factory=BusEntry,
+    fields=(
+        FieldSpec("uuid", "uuid", required=True),
+        FieldSpec(
+            "x",
+            "at",
+            1,
+            "number",
+            required=True,
+            error="BusEntry is missing position (at)",
+        ),
+        FieldSpec(
+            "y",
+            "at",
+            2,
+            "number",
+            required=True,
+            error="BusEntry is missing position (at)",
+        ),
+        FieldSpec("size_x", "size", 1, "number", default=0),
+        FieldSpec("size_y", "size", 2, "number", default=0),
+    ),
+)
+extract_bus_entry = compile_element_spec(BUS_ENTRY_SPEC)
 
 
 def process_bus_entry(bus_entry_expr: ListExpr) -> BusEntry:
@@ -417,59 +797,122 @@ def process_bus_entry(bus_entry_expr: ListExpr) -> BusEntry:
     Raises:
         ValueError: If the bus_entry is missing required fields.
     """
-    sub_exprs = expect_list(bus_entry_expr, "bus_entry")
-    uuid = ""
-    x: float | None = None
-    y: float | None = None
-    size_x: float = 0  # Default to 0
-    size_y: float = 0  # Default to 0
+    return extract_bus_entry(bus_entry_expr)
+
+
+JUNCTION_SPEC = ElementSpec(
+    head="junction",
+    name="Junction",
+    factory=Junction,
+    fields=(
+        FieldSpec(
+            "x",
+            "at",
+            1,
+            "number",
+            required=True,
+            error="Junction is missing position (at)",
+        ),
+        FieldSpec(
+            "y",
+            "at",
+            2,
+            "number",
+            required=True,
+            error="Junction is missing position (at)",
+        ),
+        FieldSpec("uuid", "uuid", required=True),
+    ),
+)
+extract_junction = compile_element_spec(JUNCTION_SPEC)
+
+
+def process_junction(junction_expr: ListExpr) -> Junction:
+    """
+    Process a junction expression.
 
-    for sub_expr in sub_exprs:
-        if is_list(sub_expr, "at"):
-            assert isinstance(sub_expr, ListExpr)
-            x = expect_number(sub_expr.sub_exprs[1])
-            y = expect_number(sub_expr.sub_exprs[2])
-        elif is_list(sub_expr, "size"):
-            assert isinstance(sub_expr, ListExpr)
-            size_x = expect_number(sub_expr.sub_exprs[1])
-            size_y = expect_number(sub_expr.sub_exprs[2])
-        elif is_list(sub_expr, "uuid"):
-            assert isinstance(sub_expr, ListExpr)
-            uuid = expect_str(sub_expr.sub_exprs[1])
+    Parses a junction expression per the KiCad schematic file format:
+        (junction (at X Y) (diameter D) (color R G B A) (uuid "..."))
 
-    if uuid == "":
-        raise ValueError("BusEntry is missing uuid")
-    if x is None or y is None:
-        raise ValueError("BusEntry is missing position (at)")
+    Args:
+        junction_expr: A list expression representing a junction.
 
-    return BusEntry(x=x, y=y, size_x=size_x, size_y=size_y, uuid=uuid)
+    Returns:
+        Junction: A Junction object with position and uuid.
 
+    Raises:
+        ValueError: If the junction is missing position or uuid.
+    """
+    return extract_junction(junction_expr)
+
+
+def cifconv_eval(
+    expr: Expr | None,
+    *,
+    used_symbols_only: bool = False,
+    columnar: bool = False,
+    compact: bool = False,
+):
+    """
+    Evaluate a parsed KiCad schematic into a Schema.
+
+    If `used_symbols_only` is True, the `lib_symbols` entries are not evaluated
+    up front: each one is evaluated when the first symbol instance refers to it,
+    and entries no instance refers to are never evaluated and are left out of
+    `Schema.symbols`.
 
-def cifconv_eval(expr: Expr | None):
+    If `columnar` is True, the points of every wire and bus are moved into the
+    schema's columnar stores as they are read (see `Schema.pack_geometry`).
+
+    If `compact` is True, every instance is compacted as it is read and the
+    symbols at the end (see `Schema.compact`).
+    """
     schema = Schema()
+    if columnar:
+        schema.pack_geometry()
     if expr is None:
         return schema
+    deferred_symbols: dict[str, ListExpr] = {}
+    library_order: list[str] = []
     for expr in eat_header(expr):
         if is_list(expr, "lib_symbols"):
             ident_exprs = expect_list(expr, "lib_symbols")
             for ident_expr in ident_exprs:
                 assert isinstance(ident_expr, ListExpr)
+                if used_symbols_only:
+                    lib_id = expect_str(expect_list(ident_expr, "symbol")[0])
+                    deferred_symbols[lib_id] = ident_expr
+                    library_order.append(lib_id)
+                    continue
                 symbol = process_symbol(ident_expr)
                 schema.symbols[symbol.lib_id] = symbol
         elif is_list(expr, "symbol"):
             assert isinstance(expr, ListExpr)
-            schema.instances.append(process_symbol_instance(expr, schema))
+            instance = process_symbol_instance(expr, schema, deferred_symbols)
+            if compact:
+                compact_instance(instance, schema.attribute_keys)
+            schema.instances.append(instance)
         elif is_list(expr, "wire"):
             assert isinstance(expr, ListExpr)
             wire = process_wire(expr)
+            if schema.wire_store is not None:
+                schema.wire_store.pack(wire)
             schema.wires[wire.uuid] = wire
         elif is_list(expr, "bus"):
             assert isinstance(expr, ListExpr)
             bus = process_bus(expr)
+            if schema.bus_store is not None:
+                schema.bus_store.pack(bus)
             schema.buses[bus.uuid] = bus
         elif is_list(expr, "label"):
             assert isinstance(expr, ListExpr)
             schema.labels.append(process_label(expr))
+        elif is_list(expr, "global_label"):
+            assert isinstance(expr, ListExpr)
+            schema.labels.append(process_global_label(expr))
+        elif is_list(expr, "hierarchical_label"):
+            assert isinstance(expr, ListExpr)
+            schema.labels.append(process_hierarchical_label(expr))
         elif is_list(expr, "no_connect"):
             assert isinstance(expr, ListExpr)
             schema.no_connects.append(process_no_connect(expr))
@@ -477,4 +920,21 @@ def cifconv_eval(expr: Expr | None):
             assert isinstance(expr, ListExpr)
             bus_entry = process_bus_entry(expr)
             schema.bus_entries[bus_entry.uuid] = bus_entry
+        elif is_list(expr, "junction"):
+            assert isinstance(expr, ListExpr)
+            schema.junctions.append(process_junction(expr))
+        elif is_list(expr, "sheet"):
+            assert isinstance(expr, ListExpr)
+            schema.sheets.append(process_sheet(expr))
+        elif is_list(expr, "uuid"):
+            schema.uuid = expect_str(expect_list(expr, "uuid")[0])
+    if used_symbols_only:
+        # keep the library in file order rather than in order of first use
+        schema.symbols = {
+            lib_id: schema.symbols[lib_id]
+            for lib_id in library_order
+            if lib_id in schema.symbols
+        }
+    if compact:
+        schema.compact()
     return schema
@@ -5,8 +5,13 @@ import json5
 from loguru import logger
 
 from cifconv.cifconv_eval import cifconv_eval
+from cifconv.csr import build_csr
+from cifconv.diff import diff_schemas
+from cifconv.erc import run_erc
 from cifconv.kicad_schematic_tokenizer import kicad_sch_tokenize
+from cifconv.project import load_project
 from cifconv.read_expr import read_expr
+from cifconv.schema import OUTPUT_SECTIONS, Schema
 
 
 def setup_logger(output_dir: str, *, with_color: bool = False):
@@ -33,18 +38,235 @@ def setup_logger(output_dir: str, *, with_color: bool = False):
     )
 
 
-def main():
+def load_schema(
+    input_file: str,
+    *,
+    project: bool = False,
+    jobs: int | None = None,
+    used_symbols_only: bool = False,
+    columnar: bool = False,
+    compact: bool = False,
+) -> Schema:
+    """Load a schematic file, or the project rooted at it if `project` is True."""
+    if project:
+        schema = load_project(
+            input_file, max_workers=jobs, used_symbols_only=used_symbols_only
+        )
+        if columnar:
+            schema.pack_geometry()
+        if compact:
+            schema.compact()
+        return schema
+    with open(input_file, "r") as f:
+        input_data = f.read()
+    return cifconv_eval(
+        read_expr(kicad_sch_tokenize(input_data)),
+        used_symbols_only=used_symbols_only,
+        columnar=columnar,
+        compact=compact,
+    )
+
+
+def query_main(argv: list[str]):
     parser = argparse.ArgumentParser(
-        description="Convert circuit intermediate format to target JSON format"
+        prog="cifconv query",
+        description="Find the symbol instances whose attributes match all conditions",
     )
     parser.add_argument(
         "input_file",
         help="Path to the input circuit intermediate format file, e.g., KiCad Schematic file",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "conditions",
+        nargs="*",
+        metavar="KEY=VALUE",
+        help="Attribute condition, e.g. Value=10k or Footprint=*0603*. Values with *, ? or [ are glob patterns",
+    )
+    parser.add_argument(
+        "--project",
+        action="store_true",
+        help="Treat the input file as the root sheet of a hierarchical project and load all sheets it refers to",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of processes parsing sheet files in project mode, defaults to the number of CPUs",
+    )
+    args = parser.parse_args(argv)
+    conditions: dict[str, str] = {}
+    for condition in args.conditions:
+        key, separator, value = condition.partition("=")
+        if not separator or not key:
+            parser.error(f"Condition {condition!r} is not of the form KEY=VALUE")
+        conditions[key] = value
     setup_logger(output_dir="logs", with_color=True)
-    with open(args.input_file, "r") as f:
-        input_data = f.read()
-        schema = cifconv_eval(read_expr(kicad_sch_tokenize(input_data)))
+    schema = load_schema(
+        args.input_file, project=args.project, jobs=args.jobs, used_symbols_only=True
+    )
+    matches = schema.find_instances(conditions)
+    logger.info(f"{len(matches)} of {len(schema.instances)} instances match")
+    output = [
+        {
+            "attributes": dict(instance.attributes or {}),
+            "designator": instance.designator,
+            "lib_id": instance.lib_id,
+            "uuid": instance.uuid,
+        }
+        for instance in matches
+    ]
+    print(json5.dumps(output, indent=4))
+
+
+def diff_main(argv: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="cifconv diff",
+        description="List the elements and pin net memberships that differ between two revisions of a schematic",
+    )
+    parser.add_argument("old_file", help="Path to the old revision")
+    parser.add_argument("new_file", help="Path to the new revision")
+    parser.add_argument(
+        "--no-nets",
+        action="store_true",
+        help="Only compare the elements, without computing the nets of both revisions",
+    )
+    parser.add_argument(
+        "--project",
+        action="store_true",
+        help="Treat the input files as the root sheets of hierarchical projects and load all sheets they refer to",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of processes parsing sheet files in project mode, defaults to the number of CPUs",
+    )
+    args = parser.parse_args(argv)
+    setup_logger(output_dir="logs", with_color=True)
+    old = load_schema(args.old_file, project=args.project, jobs=args.jobs)
+    new = load_schema(args.new_file, project=args.project, jobs=args.jobs)
+    diff = diff_schemas(old, new, nets=not args.no_nets)
+    logger.info(
+        f"{len(diff.added)} added, {len(diff.removed)} removed, "
+        f"{len(diff.modified)} modified, {len(diff.net_changes)} pin net changes"
+    )
+    print(json5.dumps(diff.to_json(), indent=4))
+
 
-        print(json5.dumps(schema.to_json(), indent=4))
+def main(argv: list[str] | None = None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["query"]:
+        return query_main(argv[1:])
+    if argv[:1] == ["diff"]:
+        return diff_main(argv[1:])
+    parser = argparse.ArgumentParser(
+        description="Convert circuit intermediate format to target JSON format",
+        epilog="Run `cifconv query INPUT KEY=VALUE ...` to search the symbol instances by attribute, "
+        "`cifconv diff OLD NEW` to compare two revisions",
+    )
+    parser.add_argument(
+        "input_file",
+        help="Path to the input circuit intermediate format file, e.g., KiCad Schematic file",
+    )
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=OUTPUT_SECTIONS,
+        help="Only output the given section, may be repeated. Sections that are not requested are not computed",
+    )
+    parser.add_argument(
+        "--library-aliases",
+        action="store_true",
+        help="Deduplicate structurally identical library symbols and output an alias table",
+    )
+    parser.add_argument(
+        "--used-symbols-only",
+        action="store_true",
+        help="Only evaluate and output the library symbols used by at least one instance",
+    )
+    parser.add_argument(
+        "--project",
+        action="store_true",
+        help="Treat the input file as the root sheet of a hierarchical project and load all sheets it refers to",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of processes parsing sheet files in project mode, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "--simplify-wires",
+        action="store_true",
+        help="Merge collinear and overlapping wires and drop duplicate wires before computing nets",
+    )
+    parser.add_argument(
+        "--erc",
+        action="store_true",
+        help="Run the electrical rules check and log the violations",
+    )
+    parser.add_argument(
+        "--csr",
+        metavar="PATH",
+        help="Also write the pin/net graph as CSR arrays, to a .npz file or else as a JSON header at PATH and raw arrays next to it with the suffix .bin",
+    )
+    parser.add_argument(
+        "--bboxes",
+        action="store_true",
+        help="Output the bounding box of the symbol body of every instance",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Store the points of wires and buses in contiguous arrays to save memory on large designs",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Intern pin names and attribute keys and store attributes compactly to save memory on large designs",
+    )
+    args = parser.parse_args(argv)
+    if args.csr and args.csr.endswith(".bin"):
+        parser.error(
+            "--csr takes the path of the JSON header, the arrays go next to it"
+        )
+    setup_logger(output_dir="logs", with_color=True)
+    schema = load_schema(
+        args.input_file,
+        project=args.project,
+        jobs=args.jobs,
+        used_symbols_only=args.used_symbols_only,
+        columnar=args.columnar,
+        compact=args.compact,
+    )
+
+    if args.simplify_wires:
+        stats = schema.simplify_wires()
+        logger.info(
+            f"Simplified wires: {stats.wires_before} -> {stats.wires_after} "
+            f"({stats.removed} removed)"
+        )
+
+    if args.erc:
+        violations = run_erc(schema)
+        for violation in violations:
+            log = logger.error if violation.severity == "error" else logger.warning
+            log(f"ERC {violation.rule}: {violation.message}")
+        logger.info(f"ERC found {len(violations)} violations")
+
+    if args.csr:
+        graph = build_csr(schema)
+        if args.csr.endswith(".npz"):
+            graph.write_npz(args.csr)
+        else:
+            graph.write_raw(args.csr)
+        logger.info(f"Wrote CSR graph of {len(graph.net_names)} nets to {args.csr}")
+
+    output = schema.to_json(
+        sections=args.only,
+        library_aliases=args.library_aliases,
+        used_symbols_only=args.used_symbols_only,
+        bboxes=args.bboxes,
+    )
+    print(json5.dumps(output, indent=4))
@@ -0,0 +1,106 @@
+"""
+Compact in-memory representation of large schematics.
+
+Compacting a schema (see `Schema.compact`) interns the strings repeated
+across many objects, the pin numbers and names and the attribute keys, and
+replaces every instance's attribute dict by an `AttributeMap`: a tuple of
+values next to a key tuple shared by all instances with the same keys, e.g.
+every instance with Reference, Value, Footprint and Datasheet. The shared key
+tuples are kept by the Schema (see `Schema.attribute_keys`) and released with
+it.
+
+An `AttributeMap` is read-only: code changing the attributes of an instance
+assigns a new mapping, e.g. from `with_attribute`, which works on plain dicts
+and `AttributeMap`s alike.
+"""
+
+import sys
+from typing import TYPE_CHECKING, Iterator, Mapping
+
+if TYPE_CHECKING:
+    from cifconv.symbol import Symbol
+    from cifconv.symbol_instance import SymbolInstance
+
+# every attribute key tuple in use -> itself, to share one tuple per key set
+KeyTuples = dict[tuple[str, ...], tuple[str, ...]]
+
+
+class AttributeMap(Mapping[str, str]):
+    """Read-only attribute mapping storing its values next to a shared key tuple."""
+
+    __slots__ = ("keys_tuple", "values_tuple")
+
+    def __init__(self, keys: tuple[str, ...], values: tuple[str, ...]):
+        self.keys_tuple = keys
+        self.values_tuple = values
+
+    def __getitem__(self, key: str) -> str:
+        try:
+            return self.values_tuple[self.keys_tuple.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys_tuple)
+
+    def __len__(self) -> int:
+        return len(self.keys_tuple)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def with_value(self, key: str, value: str) -> "AttributeMap":
+        """Return a copy with `key` set to `value`, sharing the keys if it has `key`."""
+        try:
+            index = self.keys_tuple.index(key)
+        except ValueError:
+            return AttributeMap(
+                (*self.keys_tuple, sys.intern(key)), (*self.values_tuple, value)
+            )
+        values = self.values_tuple
+        return AttributeMap(
+            self.keys_tuple, (*values[:index], value, *values[index + 1 :])
+        )
+
+
+def with_attribute(
+    attributes: Mapping[str, str] | None, key: str, value: str
+) -> Mapping[str, str]:
+    """
+    Return a copy of the attributes of an instance with `key` set to `value`.
+
+    An `AttributeMap` stays one; anything else is copied into a dict, so the
+    attributes shared with another instance are left as they are.
+    """
+    if isinstance(attributes, AttributeMap):
+        return attributes.with_value(key, value)
+    return {**(attributes or {}), key: value}
+
+
+def compact_attributes(
+    attributes: Mapping[str, str], key_tuples: KeyTuples
+) -> AttributeMap:
+    """
+    Return the attributes as an `AttributeMap` with interned, shared keys.
+
+    The key tuple is shared through `key_tuples`, which maps every key tuple
+    in use to itself.
+    """
+    if isinstance(attributes, AttributeMap):
+        return attributes
+    keys = tuple(sys.intern(key) for key in attributes)
+    keys = key_tuples.setdefault(keys, keys)
+    return AttributeMap(keys, tuple(attributes.values()))
+
+
+def compact_symbol(symbol: "Symbol") -> None:
+    """Intern the pin numbers and names of a symbol, shared by its pin instances."""
+    for pin in symbol.pins:
+        pin.number = sys.intern(pin.number)
+        pin.name = sys.intern(pin.name)
+
+
+def compact_instance(instance: "SymbolInstance", key_tuples: KeyTuples) -> None:
+    """Replace the attributes of an instance by an `AttributeMap`."""
+    if instance.attributes is not None:
+        instance.attributes = compact_attributes(instance.attributes, key_tuples)
@@ -0,0 +1,737 @@
+import bisect
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Sequence
+
+from loguru import logger
+
+from cifconv.bus import Bus
+from cifconv.bus_entry import BusEntry
+from cifconv.junction import Junction
+from cifconv.label import Label
+from cifconv.net import Net, net_id, net_name
+from cifconv.no_connect import NoConnect
+from cifconv.pin_instance import PinInstance
+from cifconv.point import Point
+from cifconv.point_index import PointIndex
+from cifconv.segment_index import SegmentIndex
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.union_find import UnionFind
+from cifconv.wire import Wire
+
+if TYPE_CHECKING:
+    from cifconv.schema import Schema
+
+Element = Wire | Bus | BusEntry
+
+# the indexes place the elements of every sheet instance (see `Wire.sheet`)
+# this far apart along x, so elements of different sheets never connect
+# geometrically; KiCad pages are at most a few meters wide
+SHEET_SPACING = 100_000.0
+
+
+def sheet_shift(sheet: int) -> float:
+    """Return the x offset of a sheet instance in the connectivity indexes."""
+    return sheet * SHEET_SPACING
+
+
+@dataclass(eq=False)
+class _Attachment:
+    """A label, pin or junction attached to the element it sits on."""
+
+    # position in the indexes, moved along x by the shift of its sheet
+    x: float
+    y: float
+    item: Label | PinInstance | Junction
+    # (sequence number of the owning label/instance/junction, pin index), the
+    # order of pins and labels within a net
+    order: tuple[int, int]
+    instance: SymbolInstance | None = None
+    # id of the element the attachment sits on, None if it sits on nothing
+    element_id: int | None = None
+    # (scope, name) of the global name that connects the element the
+    # attachment sits on to all others with the same name, see `_name_node`
+    name: tuple[str, str] | None = None
+
+
+class Connectivity:
+    """
+    Connected components of the wires, buses and bus entries of a Schema.
+
+    Built in one pass over the schema like `Schema.nets` always was, and then
+    kept up to date by the `add_*`/`remove_*` methods: an addition merges the
+    components it touches in the Union-Find, and a removal re-splits only the
+    component that contained the removed element. Net objects are rebuilt only
+    for the components that changed; the nets of all other components are
+    reused as they are.
+
+    Elements are numbered densely in the order they were added (initially
+    wires, buses, bus entries). Removed elements leave a hole in the numbering.
+
+    Elements only connect geometrically with elements on the same sheet
+    instance. The coordinate keys and spatial indexes see every sheet moved
+    along x by `sheet_shift`; the elements and nets keep their coordinates.
+
+    Power symbols, global labels, hierarchical labels and sheet pins connect
+    everything carrying the same name. Each such name is a virtual node in the
+    Union-Find that the elements carrying the name are merged with, so
+    name-based merging happens in the same pass as geometric merging. Virtual
+    nodes have no element (`elements[node]` is None) but are members of their
+    component.
+    """
+
+    def __init__(self, schema: "Schema"):
+        grid = self.grid = schema.grid
+        self.union_find = UnionFind()
+        self.elements: list[Element | None] = []
+        self.element_points: list[Sequence[Point]] = []
+        self.element_keys: list[list[int]] = []
+        # id() of every element -> its element id
+        self._element_ids: dict[int, int] = {}
+        # coordinate key -> ids of the elements with a point there
+        self.elements_at: dict[int, list[int]] = {}
+        self.segment_index = SegmentIndex(
+            resolution=grid.resolution, tolerance=grid.tolerance
+        )
+        # root -> element ids of its component
+        self.members: dict[int, list[int]] = {}
+        # coordinate key -> number of no-connects there
+        self.no_connect_keys: dict[int, int] = {}
+        self._attachments_by_element: dict[int, list[_Attachment]] = {}
+        # id() of every label, instance and junction -> its attachments
+        self._attachments_by_owner: dict[int, list[_Attachment]] = {}
+        self._sequence = 0
+        # point indexes over element points and attachments, only needed to
+        # find what a newly added element passes through, so built on the first
+        # addition
+        self._point_index: PointIndex | None = None
+        self._attachment_index: PointIndex | None = None
+
+        self._nets_by_root: dict[int, Net] = {}
+        self._first_member: dict[int, int] = {}
+        # (first element id, root) of every built net, kept sorted
+        self._net_order: list[tuple[int, int]] = []
+        self._unlabelled_roots: set[int] = set()
+        self._dirty: set[int] = set()
+        self._nets: list[Net] | None = None
+        # id() of every element -> its net, see `Schema.net_of`
+        self.net_by_element: dict[int, Net] = {}
+        # (scope, name) -> virtual node of that name
+        self._name_nodes: dict[tuple[str, str], int] = {}
+        self._built = False
+
+        self._build(schema)
+        self._built = True
+
+    def _build(self, schema: "Schema") -> None:
+        grid = self.grid
+        key_of = grid.key
+        snap = grid.snap
+        elements_at = self.elements_at
+        add_segment = self.segment_index.add
+        elements: list[Element | None] = [
+            *schema.wires.values(),
+            *schema.buses.values(),
+            *schema.bus_entries.values(),
+        ]
+        # the same as `_register` for every element, unrolled for speed
+        self.union_find = UnionFind(len(elements))
+        union = self.union_find.union
+        self.elements = elements
+        for element_id, element in enumerate(elements):
+            self._element_ids[id(element)] = element_id
+            is_bus_entry = isinstance(element, BusEntry)
+            points = (
+                [element.start_point, element.end_point]  # type: ignore[union-attr]
+                if is_bus_entry
+                else element.points  # type: ignore[union-attr]
+            )
+            self.element_points.append(points)
+            shift = sheet_shift(element.sheet)  # type: ignore[union-attr]
+            keys: list[int] = []
+            for point in points:
+                key = snap(key_of(point.x + shift, point.y), elements_at)
+                keys.append(key)
+                at_key = elements_at.get(key)
+                if at_key is None:
+                    elements_at[key] = [element_id]
+                elif element_id not in at_key:
+                    # merged into the group of the first element at the key
+                    union(at_key[0], element_id)
+                    at_key.append(element_id)
+            self.element_keys.append(keys)
+            if not is_bus_entry:
+                for start, end in zip(points, points[1:]):
+                    add_segment(
+                        element_id, start.x + shift, start.y, end.x + shift, end.y
+                    )
+
+        # ends and vertices landing on the interior of another segment (T-joints)
+        query_point = self.segment_index.query_point
+        for element_id, points in enumerate(self.element_points):
+            shift = sheet_shift(elements[element_id].sheet)  # type: ignore[union-attr]
+            for point in points:
+                for other_id in query_point(
+                    point.x + shift, point.y, interior_only=True
+                ):
+                    if other_id != element_id:
+                        union(other_id, element_id)
+
+        for junction in schema.junctions:
+            self._apply_junction(self._attach_junction(junction), union)
+        for label in schema.labels:
+            self._link_name(self._attach_label(label), union)
+        for no_connect in schema.no_connects:
+            self._count_no_connect(no_connect, 1)
+        for instance in schema.instances:
+            for attachment in self._attach_instance(instance):
+                self._link_name(attachment, union)
+
+        # components are keyed by their root
+        for element_id in range(len(self.elements)):
+            root = self.union_find.find(element_id)
+            if root not in self.members:
+                self.members[root] = []
+            self.members[root].append(element_id)
+        self._dirty.update(self.members)
+
+    def nets(self) -> list[Net]:
+        """
+        Return the nets of all components, ordered by their first element.
+
+        Nets of components that did not change since the last call are reused.
+        Unlabelled nets are numbered `net_{n}` in that order.
+        """
+        if self._nets is not None:
+            return self._nets
+        dirty, self._dirty = self._dirty, set()
+        for root in dirty:
+            if root in self.members:
+                self._build_net(root)
+
+        nets: list[Net] = []
+        net_counter = 0
+        for _, root in self._net_order:
+            net = self._nets_by_root[root]
+            if root in self._unlabelled_roots:
+                net.name = f"net_{net_counter}"
+                net_counter += 1
+            nets.append(net)
+        self._nets = nets
+        return nets
+
+    def _build_net(self, root: int) -> None:
+        element_ids = sorted(
+            element_id
+            for element_id in self.members[root]
+            if self.elements[element_id] is not None
+        )
+        if not element_ids:
+            # only virtual nodes, e.g. a global label sitting on nothing
+            self._forget(root)
+            return
+        wires_for_net: list[Wire] = []
+        buses_for_net: list[Bus] = []
+        bus_entries_for_net: list[BusEntry] = []
+        points_for_net: list[Point] = []
+        names_for_group: list[tuple[str, str, str]] = []
+        pin_attachments: list[_Attachment] = []
+        seen_keys: set[int] = set()
+
+        for element_id in element_ids:
+            element = self.elements[element_id]
+            if isinstance(element, Wire):
+                wires_for_net.append(element)
+            elif isinstance(element, Bus):
+                buses_for_net.append(element)
+            else:
+                bus_entries_for_net.append(element)
+
+            for point, key in zip(
+                self.element_points[element_id], self.element_keys[element_id]
+            ):
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+                points_for_net.append(point)
+
+            for attachment in self._attachments_by_element.get(element_id, ()):
+                if isinstance(attachment.item, Label):
+                    names_for_group.append(
+                        (
+                            attachment.item.kind,
+                            attachment.item.text,
+                            attachment.item.sheet_path,
+                        )
+                    )
+                elif isinstance(attachment.item, PinInstance):
+                    if self._at_no_connect(attachment):
+                        logger.debug(
+                            f"Pin {attachment.item} at {Point(attachment.item.x, attachment.item.y)} is no connect position"
+                        )
+                        continue
+                    if attachment.name is not None:
+                        names_for_group.append(("power", attachment.name[1], "/"))
+                    pin_attachments.append(attachment)
+
+        pin_attachments.sort(key=lambda attachment: attachment.order)
+        connected_pins_for_net = [
+            (attachment.instance, attachment.item) for attachment in pin_attachments
+        ]
+
+        name = net_name(names_for_group)
+        if name is not None:
+            self._unlabelled_roots.discard(root)
+        else:
+            # numbered when the nets are listed
+            name = ""
+            self._unlabelled_roots.add(root)
+
+        net = Net(
+            uuid=net_id(
+                element.uuid
+                for element in (*wires_for_net, *buses_for_net, *bus_entries_for_net)
+            ),
+            name=name,
+            wires=wires_for_net,
+            buses=buses_for_net,
+            bus_entries=bus_entries_for_net,
+            points=points_for_net,
+            connected_pins=connected_pins_for_net  # type: ignore[arg-type]
+            if connected_pins_for_net
+            else None,
+        )
+        self._nets_by_root[root] = net
+        self._drop_net_order(root)
+        self._first_member[root] = element_ids[0]
+        bisect.insort(self._net_order, (element_ids[0], root))
+        for element_id in element_ids:
+            self.net_by_element[id(self.elements[element_id])] = net
+
+    def net_of_attachment(self, owner: Label | Junction) -> Net | None:
+        """
+        Return the net of the element a label or junction sits on, if any.
+
+        Only valid after `nets`, like `net_by_element`.
+        """
+        attachments = self._attachments_by_owner.get(id(owner))
+        if not attachments or attachments[0].element_id is None:
+            return None
+        return self.net_by_element.get(id(self.elements[attachments[0].element_id]))
+
+    # -- mutations ---------------------------------------------------------
+
+    def add_element(self, element: Element) -> None:
+        """Add a wire, bus or bus entry and merge the components it connects."""
+        self._ensure_point_indexes()
+        element_id = self._register(element)
+        self.members[element_id] = [element_id]
+        self._mark(element_id)
+        self._connect(element_id, self._union)
+
+        assert self._point_index is not None and self._attachment_index is not None
+        # elements a name moved away from, whose components may fall apart
+        unnamed: list[int] = []
+        for x1, y1, x2, y2 in self._segments(element_id):
+            # other elements ending or bending on this element
+            for other_id in self._point_index.query_segment(
+                x1, y1, x2, y2, interior_only=True
+            ):
+                self._union(element_id, other_id)
+            for attachment in self._attachment_index.query_segment(x1, y1, x2, y2):
+                element_at = self._element_at(attachment.x, attachment.y)
+                if element_at != attachment.element_id:
+                    if attachment.name is not None and attachment.element_id is not None:
+                        unnamed.append(attachment.element_id)
+                    self._detach(attachment)
+                    self._attach(attachment, element_at)  # type: ignore[arg-type]
+                    self._link_name(attachment, self._union)
+                    self._mark(element_id)
+                if isinstance(attachment.item, Junction):
+                    self._apply_junction(attachment, self._union)
+        for other_id in unnamed:
+            self._resplit_component(other_id)
+
+    def remove_element(self, element: Element) -> None:
+        """Remove a wire, bus or bus entry and re-split its component."""
+        element_id = self._element_ids.pop(id(element))
+        root = self.union_find.find(element_id)
+        members = self.members.pop(root)
+        members.remove(element_id)
+        self._forget(root)
+        self.net_by_element.pop(id(element), None)
+
+        for key in set(self.element_keys[element_id]):
+            at_key = self.elements_at[key]
+            at_key.remove(element_id)
+            if not at_key:
+                del self.elements_at[key]
+        if self._point_index is not None:
+            shift = sheet_shift(element.sheet)
+            for point in self.element_points[element_id]:
+                self._point_index.remove(element_id, point.x + shift, point.y)
+        if not isinstance(element, BusEntry):
+            for x1, y1, x2, y2 in self._segments(element_id):
+                self.segment_index.remove(element_id, x1, y1, x2, y2)
+        self.elements[element_id] = None
+        self.union_find.parent[element_id] = element_id
+
+        # whatever sat on the removed element moves to what else is there
+        moved: list[_Attachment] = []
+        for attachment in self._attachments_by_element.pop(element_id, []):
+            attachment.element_id = None
+            element_at = self._element_at(attachment.x, attachment.y)
+            if element_at is not None:
+                self._attach(attachment, element_at)
+                moved.append(attachment)
+        self._resplit(members)
+        for attachment in moved:
+            self._link_name(attachment, self._union)
+            self._mark_attachment(attachment)
+
+    def add_label(self, label: Label) -> None:
+        attachment = self._attach_label(label)
+        self._index_attachment(attachment)
+        self._link_name(attachment, self._union)
+        self._mark_attachment(attachment)
+
+    def add_instance(self, instance: SymbolInstance) -> None:
+        for attachment in self._attach_instance(instance):
+            self._index_attachment(attachment)
+            self._link_name(attachment, self._union)
+            self._mark_attachment(attachment)
+
+    def add_junction(self, junction: Junction) -> None:
+        attachment = self._attach_junction(junction)
+        self._index_attachment(attachment)
+        self._apply_junction(attachment, self._union)
+
+    def remove_attachments(self, owner: Label | SymbolInstance | Junction) -> None:
+        """Remove the attachments of a label, instance or junction."""
+        # elements that lose a connection, whose components may fall apart
+        disconnected: list[int] = []
+        for attachment in self._attachments_by_owner.pop(id(owner), []):
+            if self._attachment_index is not None:
+                self._attachment_index.remove(attachment, attachment.x, attachment.y)
+            if attachment.element_id is None:
+                continue
+            if isinstance(owner, Junction) or attachment.name is not None:
+                disconnected.append(attachment.element_id)
+            self._detach(attachment)
+        for element_id in disconnected:
+            self._resplit_component(element_id)
+
+    def add_no_connect(self, no_connect: NoConnect) -> None:
+        self._count_no_connect(no_connect, 1)
+        self._mark_pins_at(no_connect)
+
+    def remove_no_connect(self, no_connect: NoConnect) -> None:
+        self._count_no_connect(no_connect, -1)
+        self._mark_pins_at(no_connect)
+
+    # -- internals ---------------------------------------------------------
+
+    def _register(self, element: Element) -> int:
+        """Number an element and index its points and segments."""
+        grid = self.grid
+        key_of = grid.key
+        snap = grid.snap
+        elements_at = self.elements_at
+        element_id = self.union_find.add()
+        points = (
+            [element.start_point, element.end_point]
+            if isinstance(element, BusEntry)
+            else element.points
+        )
+        self.elements.append(element)
+        self.element_points.append(points)
+        self._element_ids[id(element)] = element_id
+        shift = sheet_shift(element.sheet)
+        keys: list[int] = []
+        for point in points:
+            key = snap(key_of(point.x + shift, point.y), elements_at)
+            keys.append(key)
+            at_key = elements_at.get(key)
+            if at_key is None:
+                elements_at[key] = [element_id]
+            elif element_id not in at_key:
+                at_key.append(element_id)
+        self.element_keys.append(keys)
+        if self._point_index is not None:
+            for point in points:
+                self._point_index.add(element_id, point.x + shift, point.y)
+        if not isinstance(element, BusEntry):
+            add_segment = self.segment_index.add
+            for start, end in zip(points, points[1:]):
+                add_segment(element_id, start.x + shift, start.y, end.x + shift, end.y)
+        return element_id
+
+    def _segments(self, element_id: int) -> list[tuple[float, float, float, float]]:
+        """
+        Segments of an element in the indexes; a bus entry only connects at its
+        two points.
+        """
+        points = self.element_points[element_id]
+        element = self.elements[element_id]
+        shift = sheet_shift(element.sheet)  # type: ignore[union-attr]
+        if isinstance(element, BusEntry):
+            return [
+                (point.x + shift, point.y, point.x + shift, point.y) for point in points
+            ]
+        return [
+            (start.x + shift, start.y, end.x + shift, end.y)
+            for start, end in zip(points, points[1:])
+        ]
+
+    def _connect(self, element_id: int, union: Callable[[int, int], int]) -> None:
+        """Union an element with everything at its points."""
+        query_point = self.segment_index.query_point
+        elements_at = self.elements_at
+        element = self.elements[element_id]
+        # virtual nodes have no points
+        shift = sheet_shift(element.sheet) if element is not None else 0
+        for point, key in zip(
+            self.element_points[element_id], self.element_keys[element_id]
+        ):
+            at_key = elements_at[key]
+            if len(at_key) > 1:
+                for other_id in at_key:
+                    if other_id != element_id:
+                        union(other_id, element_id)
+            for other_id in query_point(point.x + shift, point.y, interior_only=True):
+                if other_id != element_id:
+                    union(other_id, element_id)
+
+    def _element_at(self, x: float, y: float) -> int | None:
+        """
+        Return an element with a point or a segment at (x, y) in the indexes, if any.
+
+        All elements with a point at (x, y) are connected, so any of them will
+        do. Segments crossing there without a junction are not connected, so of
+        those the one with the lowest uuid is taken, which does not depend on the
+        order the elements were added in.
+        """
+        grid = self.grid
+        element_ids = self.elements_at.get(grid.snap(grid.key(x, y), self.elements_at))
+        if element_ids:
+            return element_ids[0]
+        owners = self.segment_index.query_point(x, y)
+        if len(owners) > 1:
+            elements = self.elements
+            return min(owners, key=lambda owner: elements[owner].uuid)  # type: ignore[union-attr]
+        return owners[0] if owners else None
+
+    def _apply_junction(
+        self, attachment: _Attachment, union: Callable[[int, int], int]
+    ) -> None:
+        """A junction connects everything passing through it, including crossing wires."""
+        element_ids = self.segment_index.query_point(attachment.x, attachment.y)
+        if attachment.element_id is not None:
+            element_ids.append(attachment.element_id)
+        for other_id in element_ids[1:]:
+            union(element_ids[0], other_id)
+
+    def _name_node(self, name: tuple[str, str]) -> int:
+        """Return the virtual node of a (scope, name), adding it on first use."""
+        node = self._name_nodes.get(name)
+        if node is None:
+            node = self.union_find.add()
+            self.elements.append(None)
+            self.element_points.append([])
+            self.element_keys.append([])
+            self._name_nodes[name] = node
+            if self._built:
+                self.members[node] = [node]
+        return node
+
+    def _link_name(
+        self, attachment: _Attachment, union: Callable[[int, int], int]
+    ) -> None:
+        """Union the element a named attachment sits on with the node of its name."""
+        if attachment.name is not None and attachment.element_id is not None:
+            union(attachment.element_id, self._name_node(attachment.name))
+
+    def _union(self, element1: int, element2: int) -> int:
+        """Union two elements and merge the member lists of their components."""
+        find = self.union_find.find
+        root1 = find(element1)
+        root2 = find(element2)
+        if root1 == root2:
+            return root1
+        root = self.union_find.union(root1, root2)
+        other = root2 if root == root1 else root1
+        kept = self.members.pop(root)
+        merged = self.members.pop(other)
+        if len(kept) < len(merged):
+            kept, merged = merged, kept
+        kept.extend(merged)
+        self.members[root] = kept
+        self._forget(root)
+        self._forget(other)
+        self._mark(root)
+        return root
+
+    def _resplit_component(self, element_id: int) -> None:
+        """Recompute the components of the elements of the component of an element."""
+        root = self.union_find.find(element_id)
+        members = self.members.pop(root, None)
+        if members is None:
+            return
+        self._forget(root)
+        self._resplit(members)
+
+    def _resplit(self, members: list[int]) -> None:
+        """Recompute the components of the elements of a former component."""
+        union_find = self.union_find
+        for element_id in members:
+            union_find.parent[element_id] = element_id
+            union_find.rank[element_id] = 0
+        # every neighbour of a member is a member itself, so the components can
+        # be rebuilt from the members alone
+        for element_id in members:
+            self._connect(element_id, union_find.union)
+        for element_id in members:
+            for attachment in self._attachments_by_element.get(element_id, ()):
+                if isinstance(attachment.item, Junction):
+                    self._apply_junction(attachment, union_find.union)
+                self._link_name(attachment, union_find.union)
+        for element_id in members:
+            root = union_find.find(element_id)
+            if root not in self.members:
+                self.members[root] = []
+                self._mark(root)
+            self.members[root].append(element_id)
+
+    def _forget(self, root: int) -> None:
+        """Drop the net of a component that no longer exists or has changed."""
+        self._nets_by_root.pop(root, None)
+        self._drop_net_order(root)
+        self._unlabelled_roots.discard(root)
+        self._dirty.discard(root)
+        self._nets = None
+
+    def _drop_net_order(self, root: int) -> None:
+        first_member = self._first_member.pop(root, None)
+        if first_member is not None:
+            del self._net_order[bisect.bisect_left(self._net_order, (first_member, root))]
+
+    def _mark(self, element_id: int) -> None:
+        """Mark the component of an element as changed."""
+        root = self.union_find.find(element_id)
+        self._dirty.add(root)
+        self._nets = None
+
+    def _mark_attachment(self, attachment: _Attachment) -> None:
+        if attachment.element_id is not None:
+            self._mark(attachment.element_id)
+
+    def _detach(self, attachment: _Attachment) -> None:
+        if attachment.element_id is None:
+            return
+        self._mark(attachment.element_id)
+        self._attachments_by_element[attachment.element_id].remove(attachment)
+        attachment.element_id = None
+
+    def _attach(self, attachment: _Attachment, element_id: int) -> None:
+        attachment.element_id = element_id
+        if element_id in self._attachments_by_element:
+            self._attachments_by_element[element_id].append(attachment)
+        else:
+            self._attachments_by_element[element_id] = [attachment]
+
+    def _new_attachment(
+        self,
+        owner: Label | SymbolInstance | Junction,
+        x: float,
+        y: float,
+        item: Label | PinInstance | Junction,
+        index: int = 0,
+    ) -> _Attachment:
+        attachment = _Attachment(
+            x=x + sheet_shift(owner.sheet),
+            y=y,
+            item=item,
+            order=(self._sequence, index),
+            instance=owner if isinstance(owner, SymbolInstance) else None,
+        )
+        self._attachments_by_owner.setdefault(id(owner), []).append(attachment)
+        element_id = self._element_at(attachment.x, y)
+        if element_id is not None:
+            self._attach(attachment, element_id)
+        return attachment
+
+    def _attach_label(self, label: Label) -> _Attachment:
+        attachment = self._new_attachment(label, label.x, label.y, label)
+        if label.kind == "global_label":
+            attachment.name = ("global", label.text)
+        elif label.kind in ("hierarchical_label", "sheet_pin"):
+            # hierarchical labels are scoped to their sheet instance
+            attachment.name = (f"sheet:{label.sheet_path}", label.text)
+        self._sequence += 1
+        return attachment
+
+    def _attach_junction(self, junction: Junction) -> _Attachment:
+        attachment = self._new_attachment(junction, junction.x, junction.y, junction)
+        self._sequence += 1
+        return attachment
+
+    def _attach_instance(self, instance: SymbolInstance) -> list[_Attachment]:
+        attachments = [
+            self._new_attachment(instance, pin.x, pin.y, pin, index)
+            for index, pin in enumerate(instance.pin_instances or ())
+        ]
+        if instance.symbol is not None and instance.symbol.power:
+            # a power symbol connects its pin to the global net of its value
+            for attachment in attachments:
+                value = (instance.attributes or {}).get("Value")
+                attachment.name = ("global", value or attachment.item.name)  # type: ignore[union-attr]
+        self._sequence += 1
+        return attachments
+
+    def _index_attachment(self, attachment: _Attachment) -> None:
+        if self._attachment_index is not None:
+            self._attachment_index.add(attachment, attachment.x, attachment.y)
+
+    def _at_no_connect(self, attachment: _Attachment) -> bool:
+        if not self.no_connect_keys:
+            return False
+        grid = self.grid
+        key = grid.key(attachment.x, attachment.y)
+        return grid.snap(key, self.no_connect_keys) in self.no_connect_keys
+
+    def _count_no_connect(self, no_connect: NoConnect, delta: int) -> None:
+        key = self.grid.key(no_connect.x + sheet_shift(no_connect.sheet), no_connect.y)
+        count = self.no_connect_keys.get(key, 0) + delta
+        if count > 0:
+            self.no_connect_keys[key] = count
+        else:
+            self.no_connect_keys.pop(key, None)
+
+    def _mark_pins_at(self, no_connect: NoConnect) -> None:
+        """Pins at a no-connect that was added or removed join or leave their net."""
+        self._ensure_point_indexes()
+        assert self._attachment_index is not None
+        x = no_connect.x + sheet_shift(no_connect.sheet)
+        for attachment in self._attachment_index.query_segment(
+            x, no_connect.y, x, no_connect.y
+        ):
+            self._mark_attachment(attachment)
+
+    def _ensure_point_indexes(self) -> None:
+        if self._point_index is not None:
+            return
+        grid = self.grid
+        self._point_index = PointIndex(
+            resolution=grid.resolution, tolerance=grid.tolerance
+        )
+        for element_id, element in enumerate(self.elements):
+            if element is None:
+                continue
+            shift = sheet_shift(element.sheet)
+            for point in self.element_points[element_id]:
+                self._point_index.add(element_id, point.x + shift, point.y)
+        self._attachment_index = PointIndex(
+            resolution=grid.resolution, tolerance=grid.tolerance
+        )
+        for attachments in self._attachments_by_owner.values():
+            for attachment in attachments:
+                self._attachment_index.add(attachment, attachment.x, attachment.y)
@@ -0,0 +1,70 @@
+import math
+from typing import Container
+
+# KiCad stores schematic coordinates in integer units of 100nm (1e-4 mm)
+KICAD_RESOLUTION = 1e-4
+
+# the y grid index is packed into the low 32 bits of a key
+_Y_BITS = 32
+_Y_LIMIT = 1 << (_Y_BITS - 1)
+
+
+class CoordGrid:
+    """
+    Quantizes coordinates onto an integer grid and packs them into a single int key.
+
+    Two points have the same key if they round to the same grid cell, which makes
+    connectivity immune to floating point noise such as the 1e-12 offsets of
+    rotated pins, and hashing an int is much cheaper than hashing a Point.
+
+    With a `tolerance`, `snap` additionally matches a key against the keys of the
+    neighbouring grid cells within that distance.
+    """
+
+    def __init__(self, resolution: float = KICAD_RESOLUTION, tolerance: float = 0):
+        if resolution <= 0:
+            raise ValueError("Grid resolution must be positive")
+        if tolerance < 0:
+            raise ValueError("Grid tolerance must not be negative")
+        self.resolution = resolution
+        self.tolerance = tolerance
+        self._scale = 1 / resolution
+        radius = math.ceil(tolerance / resolution - 1e-9) if tolerance else 0
+        # key offsets of the neighbouring cells, nearest first
+        self._neighbour_offsets = [
+            (dx << _Y_BITS) + dy
+            for dx, dy in sorted(
+                (
+                    (dx, dy)
+                    for dx in range(-radius, radius + 1)
+                    for dy in range(-radius, radius + 1)
+                    if (dx, dy) != (0, 0)
+                    and math.hypot(dx, dy) * resolution <= tolerance + 1e-12
+                ),
+                key=lambda offset: offset[0] ** 2 + offset[1] ** 2,
+            )
+        ]
+
+    def key(self, x: float, y: float) -> int:
+        """Return the packed grid key of the point (x, y)."""
+        iy = round(y * self._scale)
+        if not -_Y_LIMIT <= iy < _Y_LIMIT:
+            raise ValueError(f"Coordinate {y} is out of range for the grid")
+        return (round(x * self._scale) << _Y_BITS) + iy
+
+    def unpack(self, key: int) -> tuple[float, float]:
+        """Return the coordinates of the grid cell of a key."""
+        ix, iy = divmod(key + _Y_LIMIT, 1 << _Y_BITS)
+        return ix * self.resolution, (iy - _Y_LIMIT) * self.resolution
+
+    def snap(self, key: int, keys: Container[int]) -> int:
+        """
+        Return `key` if it is in `keys`, else the nearest key within tolerance
+        that is in `keys`, else `key` itself.
+        """
+        if key in keys:
+            return key
+        for offset in self._neighbour_offsets:
+            if key + offset in keys:
+                return key + offset
+        return key
@@ -0,0 +1,193 @@
+"""
+Export of the pin/net connectivity of a Schema as compressed sparse row arrays.
+
+The pins of all symbol instances are numbered in instance order. The pins of
+net `n` are `net_pins[net_indptr[n]:net_indptr[n + 1]]`, and pin `p` belongs
+to instance `pin_instance[p]` and has the type code `pin_type[p]` (see
+`cifconv.erc.PIN_TYPES`). Pins on no net appear in the pin arrays only.
+
+`write_raw` stores the arrays as one little-endian binary file plus a small
+JSON header with their dtypes and offsets, so they can be memory mapped, e.g.
+with `numpy.memmap`. `write_npz` stores them as a NumPy `.npz` archive.
+"""
+
+import json
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from cifconv.erc import PIN_TYPES, pin_type_code
+
+if TYPE_CHECKING:
+    from cifconv.schema import Schema
+
+CSR_FORMAT = "cifconv-csr"
+CSR_VERSION = 1
+
+# array name -> (array typecode, NumPy dtype of its little-endian encoding)
+CSR_ARRAYS: dict[str, tuple[str, str]] = {
+    "net_indptr": ("q", "<i8"),
+    "net_pins": ("i", "<i4"),
+    "pin_instance": ("i", "<i4"),
+    "pin_type": ("b", "|i1"),
+}
+# offsets of the arrays in the data file are multiples of this, in bytes
+_ALIGNMENT = 8
+
+
+@dataclass
+class CsrGraph:
+    """The pin/net graph of a schema in compressed sparse row form."""
+
+    net_indptr: array
+    net_pins: array
+    pin_instance: array
+    pin_type: array
+    net_names: list[str]
+    net_ids: list[str]
+    instance_designators: list[str]
+    pin_numbers: list[str]
+
+    def header(self) -> dict[str, Any]:
+        """The JSON header of the arrays, without their data file offsets."""
+        return {
+            "format": CSR_FORMAT,
+            "version": CSR_VERSION,
+            "pin_types": list(PIN_TYPES),
+            "net_names": self.net_names,
+            "net_ids": self.net_ids,
+            "instance_designators": self.instance_designators,
+            "pin_numbers": self.pin_numbers,
+        }
+
+    def write_raw(self, header_path: str | Path) -> None:
+        """
+        Write the JSON header to `header_path` and the arrays to the file next
+        to it with the suffix `.bin`, in little-endian byte order.
+
+        Raises:
+            ValueError: If `header_path` has the suffix `.bin` itself, so the
+                arrays would overwrite the header.
+        """
+        header_path = Path(header_path)
+        data_path = header_path.with_suffix(".bin")
+        if data_path == header_path:
+            raise ValueError(
+                f"{header_path} is where the arrays go, write the header to a .json file"
+            )
+        header = self.header()
+        header["data"] = data_path.name
+        header["arrays"] = {}
+        offset = 0
+        with open(data_path, "wb") as f:
+            for name, (_, dtype) in CSR_ARRAYS.items():
+                values: array = getattr(self, name)
+                if sys.byteorder == "big":
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                padding = -offset % _ALIGNMENT
+                f.write(b"\0" * padding)
+                offset += padding
+                header["arrays"][name] = {
+                    "dtype": dtype,
+                    "offset": offset,
+                    "length": len(values),
+                }
+                f.write(values.tobytes())
+                offset += len(values) * values.itemsize
+        with open(header_path, "w") as f:
+            json.dump(header, f)
+
+    def write_npz(self, path: str | Path) -> None:
+        """Write the arrays and the string tables as a NumPy `.npz` archive."""
+        try:
+            import numpy as np
+        except ImportError as e:
+            raise ImportError(
+                "Writing .npz files requires NumPy, write raw arrays instead"
+            ) from e
+        np.savez(
+            path,
+            **{
+                name: np.asarray(getattr(self, name), dtype=dtype)
+                for name, (_, dtype) in CSR_ARRAYS.items()
+            },
+            pin_types=np.array(PIN_TYPES, dtype=str),
+            net_names=np.array(self.net_names, dtype=str),
+            net_ids=np.array(self.net_ids, dtype=str),
+            instance_designators=np.array(self.instance_designators, dtype=str),
+            pin_numbers=np.array(self.pin_numbers, dtype=str),
+        )
+
+
+def build_csr(schema: "Schema") -> CsrGraph:
+    """Build the CSR arrays from the nets of a schema."""
+    pin_instance = array(CSR_ARRAYS["pin_instance"][0])
+    pin_type = array(CSR_ARRAYS["pin_type"][0])
+    instance_designators: list[str] = []
+    pin_numbers: list[str] = []
+    # id() of every pin -> its pin index
+    pin_indices: dict[int, int] = {}
+    for instance_index, instance in enumerate(schema.instances):
+        instance_designators.append(instance.designator)
+        for pin in instance.pin_instances or ():
+            pin_indices[id(pin)] = len(pin_numbers)
+            pin_numbers.append(pin.number)
+            pin_instance.append(instance_index)
+            pin_type.append(pin_type_code(pin.type))
+
+    net_indptr = array(CSR_ARRAYS["net_indptr"][0], [0])
+    net_pins = array(CSR_ARRAYS["net_pins"][0])
+    net_names: list[str] = []
+    net_ids: list[str] = []
+    for net in schema.nets:
+        net_names.append(net.name)
+        net_ids.append(net.uuid)
+        for _, pin in net.connected_pins or ():
+            net_pins.append(pin_indices[id(pin)])
+        net_indptr.append(len(net_pins))
+
+    return CsrGraph(
+        net_indptr=net_indptr,
+        net_pins=net_pins,
+        pin_instance=pin_instance,
+        pin_type=pin_type,
+        net_names=net_names,
+        net_ids=net_ids,
+        instance_designators=instance_designators,
+        pin_numbers=pin_numbers,
+    )
+
+
+def read_raw(header_path: str | Path) -> CsrGraph:
+    """
+    Read a CSR graph written by `CsrGraph.write_raw`.
+
+    Raises:
+        ValueError: If the header is not a cifconv CSR header of a known version.
+    """
+    header_path = Path(header_path)
+    with open(header_path, "r") as f:
+        header = json.load(f)
+    if header.get("format") != CSR_FORMAT or header.get("version") != CSR_VERSION:
+        raise ValueError(f"{header_path} is not a {CSR_FORMAT} v{CSR_VERSION} header")
+    data = (header_path.parent / header["data"]).read_bytes()
+    arrays: dict[str, array] = {}
+    for name, (typecode, _) in CSR_ARRAYS.items():
+        spec = header["arrays"][name]
+        values = array(typecode)
+        values.frombytes(
+            data[spec["offset"] : spec["offset"] + spec["length"] * values.itemsize]
+        )
+        if sys.byteorder == "big":
+            values.byteswap()
+        arrays[name] = values
+    return CsrGraph(
+        **arrays,
+        net_names=header["net_names"],
+        net_ids=header["net_ids"],
+        instance_designators=header["instance_designators"],
+        pin_numbers=header["pin_numbers"],
+    )
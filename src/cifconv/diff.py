@@ -0,0 +1,216 @@
+"""
+Differences between two revisions of a schematic.
+
+Every KiCad element carries a stable uuid, so elements are matched between
+the revisions by a hash join on it, and a matched pair is compared through a
+content hash of its fields. Nets are compared through the pins on them: a
+pin's membership changed if its net got another name or another set of pins.
+Everything is linear in the number of elements and pins.
+"""
+
+import dataclasses
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Literal, Mapping, Sequence
+
+from cifconv.point import Point
+from cifconv.schema import Schema
+
+ElementKind = Literal[
+    "instance", "wire", "bus", "bus_entry", "label", "junction", "no_connect"
+]
+
+# the elements of each kind of a schema, in output order
+ELEMENT_KINDS: dict[ElementKind, Callable[[Schema], Iterable[Any]]] = {
+    "instance": lambda schema: schema.instances,
+    "wire": lambda schema: schema.wires.values(),
+    "bus": lambda schema: schema.buses.values(),
+    "bus_entry": lambda schema: schema.bus_entries.values(),
+    "label": lambda schema: schema.labels,
+    "junction": lambda schema: schema.junctions,
+    "no_connect": lambda schema: schema.no_connects,
+}
+
+# fields derived from others, which are not compared
+_DERIVED_FIELDS = frozenset({"pin_instances"})
+
+# names given to unlabelled nets (see `Connectivity.nets`), which shift when
+# other nets are added or removed and so are not compared
+_NUMBERED_NET = re.compile(r"net_\d+")
+
+# (designator, pin number)
+PinKey = tuple[str, str]
+
+
+@dataclass
+class ElementChange:
+    kind: ElementKind
+    uuid: str
+    # the element in the old and the new revision, None if added or removed
+    old: Any | None
+    new: Any | None
+    # names of the fields that differ, for modified elements
+    fields: list[str] = dataclasses.field(default_factory=list)
+
+
+@dataclass
+class PinNetChange:
+    """A pin whose net got another name or another set of pins."""
+
+    designator: str
+    pin_number: str
+    # names of the nets of the pin, None if the pin is on no net in that revision
+    old_net: str | None
+    new_net: str | None
+
+
+@dataclass
+class SchemaDiff:
+    added: list[ElementChange]
+    removed: list[ElementChange]
+    modified: list[ElementChange]
+    net_changes: list[PinNetChange]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified or self.net_changes)
+
+    def to_json(self) -> dict[str, Any]:
+        def element_json(change: ElementChange) -> dict[str, Any]:
+            element = change.new if change.new is not None else change.old
+            result: dict[str, Any] = {"kind": change.kind, "uuid": change.uuid}
+            if change.kind == "instance":
+                result["designator"] = element.designator
+            if change.fields:
+                result["fields"] = change.fields
+            return result
+
+        return {
+            "added": [element_json(change) for change in self.added],
+            "removed": [element_json(change) for change in self.removed],
+            "modified": [element_json(change) for change in self.modified],
+            "net_changes": [
+                {
+                    "designator": change.designator,
+                    "pin": change.pin_number,
+                    "old_net": change.old_net,
+                    "new_net": change.new_net,
+                }
+                for change in self.net_changes
+            ],
+        }
+
+
+def _normalize(value: Any) -> Any:
+    """A hashable, order-stable form of a field value."""
+    if isinstance(value, Point):
+        return (float(value.x), float(value.y))
+    if isinstance(value, Mapping):
+        return tuple(sorted(value.items()))
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        return tuple(_normalize(item) for item in value)
+    return value
+
+
+def element_content(element: Any) -> dict[str, Any]:
+    """Return the compared fields of an element, normalized (see `content_hash`)."""
+    return {
+        field.name: _normalize(getattr(element, field.name))
+        for field in dataclasses.fields(element)
+        if field.compare and field.name not in _DERIVED_FIELDS
+    }
+
+
+def content_hash(element: Any) -> str:
+    """
+    Return a hash of the content of an element, stable across runs.
+
+    Covers the fields of the element except the ones derived from others,
+    like the pin instances of a symbol instance.
+    """
+    content = repr(tuple(element_content(element).items())).encode()
+    return hashlib.blake2b(content, digest_size=8).hexdigest()
+
+
+def diff_schemas(old: Schema, new: Schema, *, nets: bool = True) -> SchemaDiff:
+    """
+    Compare two revisions of a schematic.
+
+    Elements are matched by uuid. Elements only in `new` are added, elements
+    only in `old` removed, and matched elements with different content hashes
+    modified. If `nets` is True, the nets of both revisions are computed and
+    the pins whose net membership changed are listed, ordered by designator
+    and pin number.
+    """
+    diff = SchemaDiff(added=[], removed=[], modified=[], net_changes=[])
+    for kind, elements_of in ELEMENT_KINDS.items():
+        old_by_uuid = {element.uuid: element for element in elements_of(old)}
+        new_uuids: set[str] = set()
+        for element in elements_of(new):
+            new_uuids.add(element.uuid)
+            previous = old_by_uuid.get(element.uuid)
+            if previous is None:
+                diff.added.append(ElementChange(kind, element.uuid, None, element))
+            elif content_hash(previous) != content_hash(element):
+                before = element_content(previous)
+                after = element_content(element)
+                diff.modified.append(
+                    ElementChange(
+                        kind,
+                        element.uuid,
+                        previous,
+                        element,
+                        [name for name in after if before.get(name) != after[name]],
+                    )
+                )
+        for uuid, element in old_by_uuid.items():
+            if uuid not in new_uuids:
+                diff.removed.append(ElementChange(kind, uuid, element, None))
+    if nets:
+        diff.net_changes = _net_changes(old, new)
+    return diff
+
+
+# (name of the net if labelled, the pins on the net)
+_Membership = tuple[str | None, frozenset[PinKey]]
+
+
+def _pin_memberships(
+    schema: Schema,
+) -> tuple[dict[PinKey, _Membership], dict[PinKey, str]]:
+    """Pin -> the membership of its net, and pin -> the name of its net."""
+    memberships: dict[PinKey, _Membership] = {}
+    names: dict[PinKey, str] = {}
+    for net in schema.nets:
+        pins = frozenset(
+            (instance.designator, pin.number)
+            for instance, pin in net.connected_pins or ()
+        )
+        # shared by the pins of the net, so each pair of nets is compared once
+        membership = (None if _NUMBERED_NET.fullmatch(net.name) else net.name, pins)
+        for pin in pins:
+            memberships[pin] = membership
+            names[pin] = net.name
+    return memberships, names
+
+
+def _net_changes(old: Schema, new: Schema) -> list[PinNetChange]:
+    old_memberships, old_names = _pin_memberships(old)
+    new_memberships, new_names = _pin_memberships(new)
+    # (id of old membership, id of new membership) -> whether they are equal
+    compared: dict[tuple[int, int], bool] = {}
+    changes: list[PinNetChange] = []
+    for pin in sorted(old_memberships.keys() | new_memberships.keys()):
+        before = old_memberships.get(pin)
+        after = new_memberships.get(pin)
+        if before is not None and after is not None:
+            pair = (id(before), id(after))
+            same = compared.get(pair)
+            if same is None:
+                same = compared[pair] = before == after
+            if same:
+                continue
+        changes.append(
+            PinNetChange(pin[0], pin[1], old_names.get(pin), new_names.get(pin))
+        )
+    return changes
@@ -0,0 +1,150 @@
+"""
+Declarative specs for simple schematic elements, compiled into extractor functions.
+
+An `ElementSpec` describes an element such as `(wire (pts ...) (uuid "..."))`:
+its head, and for every field the child list it is read from, the position of
+the value in that child, its type, whether it is required and its default.
+`compile_element_spec` turns a spec into a specialized Python function that
+reads all fields in a single pass over the element's children.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Literal
+
+from cifconv.cifconv_token import TokenType
+from cifconv.expect import expect_list, expect_number, expect_str
+from cifconv.expr import AtomExpr, ListExpr
+from cifconv.point import Point
+
+FieldType = Literal["str", "number", "points"]
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """A field of an element, passed as keyword argument `name` to the element factory."""
+
+    name: str
+    # head of the child list the value is read from, e.g. "at" for
+    # `(at X Y ROT)`; None for an atom of the element itself, e.g. the text of
+    # `(label "TEXT" ...)`
+    child: str | None
+    # position of the value in the child list (the head is at 0), or in the
+    # element after its head if `child` is None
+    index: int = 1
+    type: FieldType = "str"
+    required: bool = False
+    default: Any = None
+    # minimum number of items of a "points" field
+    min_items: int = 0
+    # error raised if the field is missing (or has too few items), defaults to
+    # "<Element> is missing <child>"
+    error: str | None = None
+
+
+@dataclass(frozen=True)
+class ElementSpec:
+    head: str
+    # name used in error messages, e.g. "Wire"
+    name: str
+    factory: Callable[..., Any]
+    fields: tuple[FieldSpec, ...]
+
+
+def compile_element_spec(spec: ElementSpec) -> Callable[[ListExpr], Any]:
+    """
+    Compile an element spec into an extractor function.
+
+    The returned function takes the list expression of the element, reads every
+    field in one pass over its children, validates the required fields and
+    returns `spec.factory(**fields)`. It raises ValueError for a missing
+    required field or an atom of the wrong type.
+    """
+    converters = {"str": "expect_str", "number": "expect_number"}
+    fn_name = f"extract_{spec.head}"
+    lines = [
+        f"def {fn_name}(expr):",
+        f"    sub_exprs = expect_list(expr, {spec.head!r})",
+    ]
+
+    positional = [field for field in spec.fields if field.child is None]
+    for field in positional:
+        if field.type == "points":
+            raise ValueError(f"Positional field {field.name} can not be of type points")
+        lines.append(f"    {field.name} = {converters[field.type]}(sub_exprs[{field.index}])")
+    first_child = max((field.index + 1 for field in positional), default=0)
+
+    children: dict[str, list[FieldSpec]] = {}
+    for field in spec.fields:
+        if field.child is None:
+            continue
+        children.setdefault(field.child, []).append(field)
+        if field.type == "points":
+            lines.append(f"    {field.name} = []")
+        else:
+            initial = None if field.required else field.default
+            lines.append(f"    {field.name} = {initial!r}")
+
+    if children:
+        lines += [
+            f"    for sub_expr in sub_exprs[{first_child}:]:",
+            "        if type(sub_expr) is not ListExpr or not sub_expr.sub_exprs:",
+            "            continue",
+            "        items = sub_expr.sub_exprs",
+            "        head = items[0]",
+            "        if type(head) is not AtomExpr or head.value.type is not IDENT:",
+            "            continue",
+            "        head = head.value.value",
+        ]
+        keyword = "if"
+        for child, fields in children.items():
+            lines.append(f"        {keyword} head == {child!r}:")
+            keyword = "elif"
+            for field in fields:
+                if field.type == "points":
+                    lines += [
+                        f"            for pt_expr in items[{field.index}:]:",
+                        "                assert isinstance(pt_expr, ListExpr)",
+                        f"                {field.name}.append(Point(expect_number(pt_expr.sub_exprs[1]), expect_number(pt_expr.sub_exprs[2])))",
+                    ]
+                elif field.required:
+                    lines.append(
+                        f"            {field.name} = {converters[field.type]}(items[{field.index}])"
+                    )
+                else:
+                    lines += [
+                        f"            if len(items) > {field.index}:",
+                        f"                {field.name} = {converters[field.type]}(items[{field.index}])",
+                    ]
+
+    for field in spec.fields:
+        error = field.error or f"{spec.name} is missing {field.child or field.name}"
+        if field.type == "points":
+            if field.min_items > 0:
+                lines += [
+                    f"    if len({field.name}) < {field.min_items}:",
+                    f"        raise ValueError({error!r})",
+                ]
+        elif field.required and field.child is not None:
+            condition = f"{field.name} is None"
+            if field.type == "str":
+                condition += f" or {field.name} == ''"
+            lines += [f"    if {condition}:", f"        raise ValueError({error!r})"]
+
+    arguments = ", ".join(f"{field.name}={field.name}" for field in spec.fields)
+    lines.append(f"    return factory({arguments})")
+
+    namespace: dict[str, Any] = {
+        "ListExpr": ListExpr,
+        "AtomExpr": AtomExpr,
+        "IDENT": TokenType.IDENT,
+        "Point": Point,
+        "expect_list": expect_list,
+        "expect_number": expect_number,
+        "expect_str": expect_str,
+        "factory": spec.factory,
+    }
+    source = "\n".join(lines) + "\n"
+    exec(compile(source, f"<element spec {spec.head}>", "exec"), namespace)
+    extractor = namespace[fn_name]
+    extractor.__source__ = source
+    return extractor
@@ -0,0 +1,223 @@
+"""
+Electrical rules check of the nets of a Schema.
+
+Pin types are encoded as small integers (their index in `PIN_TYPES`), and a
+net is summarized in one pass over its pins as a bit mask of the types on it
+plus a mask of the types occurring more than once. The pin type conflicts of
+a net only depend on these two masks, so they are looked up in `PIN_CONFLICTS`
+and cached per mask pair; checking a net costs one pass over its pins.
+"""
+
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Literal, get_args
+
+from cifconv.pin import PinType
+from cifconv.pin_instance import PinInstance
+
+if TYPE_CHECKING:
+    from cifconv.schema import Schema
+    from cifconv.symbol_instance import SymbolInstance
+
+# pin types in the order of their codes, the order of the KiCad ERC matrix
+PIN_TYPES: tuple[PinType, ...] = get_args(PinType)
+PIN_TYPE_CODES: dict[str, int] = {
+    pin_type: code for code, pin_type in enumerate(PIN_TYPES)
+}
+_UNSPECIFIED = PIN_TYPE_CODES["unspecified"]
+_OUTPUT = PIN_TYPE_CODES["output"]
+_POWER_IN = PIN_TYPE_CODES["power_in"]
+_POWER_OUT = PIN_TYPE_CODES["power_out"]
+_NO_CONNECT = PIN_TYPE_CODES["no_connect"]
+
+Severity = Literal["error", "warning"]
+Rule = Literal["pin_conflict", "undriven_power_in", "unconnected_pin", "single_pin_net"]
+
+OK, WARNING, ERROR = 0, 1, 2
+# severity of connecting two pin types, indexed by their codes; KiCad's
+# default pin-to-pin ERC matrix
+_ = OK
+W = WARNING
+E = ERROR
+# fmt: off
+PIN_CONFLICTS: tuple[tuple[int, ...], ...] = (
+    #  in out bi  3s pas free uns pin pout oc oe nc
+    (_,  _,  _,  _,  _,  _,   W,  _,  _,   _, _,  E),  # input
+    (_,  E,  _,  W,  _,  _,   W,  _,  E,   E, E,  E),  # output
+    (_,  _,  _,  _,  _,  _,   W,  _,  W,   _, W,  E),  # bidirectional
+    (_,  W,  _,  _,  _,  _,   W,  W,  E,   W, W,  E),  # tri_state
+    (_,  _,  _,  _,  _,  _,   W,  _,  _,   _, _,  E),  # passive
+    (_,  _,  _,  _,  _,  _,   _,  _,  _,   _, _,  E),  # free
+    (W,  W,  W,  W,  W,  _,   W,  W,  W,   W, W,  E),  # unspecified
+    (_,  _,  _,  W,  _,  _,   W,  _,  _,   _, _,  E),  # power_in
+    (_,  E,  W,  E,  _,  _,   W,  _,  E,   E, E,  E),  # power_out
+    (_,  E,  _,  W,  _,  _,   W,  _,  E,   _, _,  E),  # open_collector
+    (_,  E,  W,  W,  _,  _,   W,  _,  E,   _, _,  E),  # open_emitter
+    (E,  E,  E,  E,  E,  E,   E,  E,  E,   E, E,  E),  # no_connect
+)
+# fmt: on
+del _, W, E
+
+_SEVERITY_NAMES: dict[int, Severity] = {WARNING: "warning", ERROR: "error"}
+
+
+@dataclass
+class ErcViolation:
+    """A rule violation found by `run_erc`."""
+
+    rule: Rule
+    severity: Severity
+    message: str
+    # name of the net, None for pins on no net
+    net: str | None
+    # (designator, pin number) of the pins involved
+    pins: list[tuple[str, str]] = field(default_factory=list)
+
+
+def pin_type_code(pin_type: str | None) -> int:
+    """Return the code of a pin type; missing or unknown types are unspecified."""
+    if pin_type is None:
+        return _UNSPECIFIED
+    return PIN_TYPE_CODES.get(pin_type, _UNSPECIFIED)
+
+
+# (type mask, repeated type mask) -> (severity, code, code) of the conflicts
+_conflict_cache: dict[tuple[int, int], list[tuple[int, int, int]]] = {}
+
+
+def net_conflicts(types: int, repeated: int) -> list[tuple[int, int, int]]:
+    """
+    Return the (severity, code, code) of the pin type conflicts of a net.
+
+    `types` has bit `code` set for every pin type on the net, `repeated` for
+    every pin type occurring more than once, which can conflict with itself.
+    """
+    key = (types, repeated)
+    conflicts = _conflict_cache.get(key)
+    if conflicts is not None:
+        return conflicts
+    codes = [code for code in range(len(PIN_TYPES)) if types >> code & 1]
+    conflicts = []
+    for position, first in enumerate(codes):
+        for second in codes[position:]:
+            if first == second and not repeated >> first & 1:
+                continue
+            severity = PIN_CONFLICTS[first][second]
+            if severity != OK:
+                conflicts.append((severity, first, second))
+    _conflict_cache[key] = conflicts
+    return conflicts
+
+
+def run_erc(schema: "Schema") -> list[ErcViolation]:
+    """
+    Check the nets of a schema against the electrical rules.
+
+    Reports, per net in net order:
+    - pairs of pin types that conflict per `PIN_CONFLICTS`, e.g. two outputs,
+    - `power_in` pins on a net without a `power_out` pin,
+    - nets with a single pin,
+    and then pins on no net that are not marked by a no-connect and are not of
+    type `no_connect`. Pins at the same position of the same sheet that are
+    on no net are connected to each other and checked like a net without a
+    name.
+    """
+    violations: list[ErcViolation] = []
+    connected: set[int] = set()
+    for net in schema.nets:
+        pins = net.connected_pins or []
+        for _, pin in pins:
+            connected.add(id(pin))
+        _check_net(net.name, pins, violations)
+
+    grid = schema.grid
+    # sheet -> grid keys of the no-connects on it
+    no_connect_keys: dict[int, set[int]] = {}
+    for item in schema.no_connects:
+        no_connect_keys.setdefault(item.sheet, set()).add(grid.key(item.x, item.y))
+    # (sheet, grid key) -> the pins on no net at that position
+    loose_pins: dict[tuple[int, int], list[tuple["SymbolInstance", PinInstance]]] = {}
+    for instance in schema.instances:
+        sheet_keys = no_connect_keys.get(instance.sheet, set())
+        for pin in instance.pin_instances or ():
+            if id(pin) in connected:
+                continue
+            key = grid.key(pin.x, pin.y)
+            if grid.snap(key, sheet_keys) in sheet_keys:
+                continue
+            loose_pins.setdefault((instance.sheet, key), []).append((instance, pin))
+    for pins in loose_pins.values():
+        if len(pins) > 1:
+            _check_net(None, pins, violations)
+            continue
+        instance, pin = pins[0]
+        if pin_type_code(pin.type) == _NO_CONNECT:
+            continue
+        violations.append(
+            ErcViolation(
+                rule="unconnected_pin",
+                severity="error",
+                message=f"Pin {pin.number} of {instance.designator} is not connected",
+                net=None,
+                pins=[(instance.designator, pin.number)],
+            )
+        )
+    return violations
+
+
+def _check_net(
+    name: str | None,
+    pins: list[tuple["SymbolInstance", PinInstance]],
+    violations: list[ErcViolation],
+) -> None:
+    types = 0
+    repeated = 0
+    codes: list[int] = []
+    for _, pin in pins:
+        code = pin_type_code(pin.type)
+        codes.append(code)
+        bit = 1 << code
+        repeated |= types & bit
+        types |= bit
+    where = f"net {name}" if name is not None else "unnamed pin connection"
+
+    for severity, first, second in net_conflicts(types, repeated):
+        involved = [
+            (instance.designator, pin.number)
+            for (instance, pin), code in zip(pins, codes)
+            if code in (first, second)
+        ]
+        violations.append(
+            ErcViolation(
+                rule="pin_conflict",
+                severity=_SEVERITY_NAMES[severity],
+                message=f"Pins of type {PIN_TYPES[first]} and {PIN_TYPES[second]} "
+                f"are connected on {where}",
+                net=name,
+                pins=involved,
+            )
+        )
+    if types >> _POWER_IN & 1 and not types >> _POWER_OUT & 1:
+        violations.append(
+            ErcViolation(
+                rule="undriven_power_in",
+                severity="error",
+                message=f"Power input pins on {where} are not driven by a power output pin",
+                net=name,
+                pins=[
+                    (instance.designator, pin.number)
+                    for (instance, pin), code in zip(pins, codes)
+                    if code == _POWER_IN
+                ],
+            )
+        )
+    if len(pins) == 1:
+        instance, pin = pins[0]
+        violations.append(
+            ErcViolation(
+                rule="single_pin_net",
+                severity="warning",
+                message=f"Pin {pin.number} of {instance.designator} is the only pin on {where}",
+                net=name,
+                pins=[(instance.designator, pin.number)],
+            )
+        )
@@ -0,0 +1,40 @@
+"""Checked accessors for the atoms and lists of parsed s-expressions."""
+
+from cifconv.expr import AtomExpr, Expr, ListExpr
+
+
+def expect_list(expr: Expr, first_token_value: str) -> list[Expr]:
+    msg = f"Expected a list starting with '{first_token_value}' at line {expr.line}, column {expr.col}, but got {expr}"
+    if not isinstance(expr, ListExpr) or len(expr.sub_exprs) == 0:
+        raise ValueError(msg)
+    first_token = expr.sub_exprs[0]
+    if (
+        not isinstance(first_token, AtomExpr)
+        or first_token.value.type != first_token.value.type.IDENT
+        or first_token.value.value != first_token_value
+    ):
+        raise ValueError(msg)
+    return expr.sub_exprs[1:]
+
+
+def expect_number(expr: Expr) -> float:
+    if not isinstance(expr, AtomExpr) or expr.value.type != expr.value.type.NUMBER:
+        raise ValueError(
+            f"Error: Expected a number atom at line {expr.line}, column {expr.col}, but got {expr}"
+        )
+    return float(expr.value.value)
+
+
+def expect_str(expr: Expr) -> str:
+    if not isinstance(expr, AtomExpr) or expr.value.type != expr.value.type.STRING:
+        msg = f"Error: Expected a string atom at line {expr.line}, column {expr.col}, but got {expr}"
+        raise ValueError(msg)
+    return expr.value.value
+
+
+def expect_ident(expr: Expr) -> str:
+    if not isinstance(expr, AtomExpr) or expr.value.type != expr.value.type.IDENT:
+        raise ValueError(
+            f"Error: Expected a ident atom at line {expr.line}, column {expr.col}, but got {expr}"
+        )
+    return expr.value.value
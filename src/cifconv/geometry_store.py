@@ -0,0 +1,219 @@
+"""
+Columnar storage of the points of wires and buses.
+
+A design with hundreds of thousands of segments holds as many small `Point`
+objects. A `GeometryStore` keeps the coordinates of many elements instead in
+two contiguous float64 arrays, with an offset array marking where the points
+of each element start, and the uuids alongside. A packed element's `points`
+becomes a `PointsView` that creates `Point` objects only when they are read.
+
+The arrays are stdlib `array`s, so no extra dependency is needed; with NumPy
+installed, `as_numpy` exposes them as arrays without copying, and
+`grid_keys`/`bboxes` run as array operations.
+
+The rows describe the elements as of the last `repack` (see
+`Schema.pack_geometry`). Removing or replacing a packed element leaves its row
+in the store until then; `repack` drops such rows and frees their memory.
+"""
+
+from array import array
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Sequence, overload
+
+from cifconv.point import Point
+
+if TYPE_CHECKING:
+    from cifconv.bus import Bus
+    from cifconv.coord import CoordGrid
+    from cifconv.wire import Wire
+
+
+class GeometryStore:
+    """Columnar store of the points of wires or buses, compacted by `repack`."""
+
+    def __init__(self):
+        self.xs = array("d")
+        self.ys = array("d")
+        # the points of element i are at offsets[i]:offsets[i + 1]
+        self.offsets = array("q", [0])
+        self.uuids: list[str] = []
+        # the view handed out for each element
+        self._views: list[PointsView] = []
+
+    def __len__(self) -> int:
+        return len(self.uuids)
+
+    def append(self, uuid: str, points: Iterable[Point]) -> "PointsView":
+        """Store the points of an element and return a view of them."""
+        for point in points:
+            self.xs.append(point.x)
+            self.ys.append(point.y)
+        self.offsets.append(len(self.xs))
+        self.uuids.append(uuid)
+        view = PointsView(self, self.offsets[-2], self.offsets[-1])
+        self._views.append(view)
+        return view
+
+    def pack(self, element: "Wire | Bus") -> None:
+        """Move the points of a wire or bus into the store, replacing them by a view."""
+        points = element.points
+        if isinstance(points, PointsView) and points.store is self:
+            return
+        element.points = self.append(element.uuid, points)  # type: ignore[assignment]
+
+    def repack(self, elements: "Iterable[Wire | Bus]") -> None:
+        """
+        Make the store hold the points of exactly `elements`, in their order.
+
+        Elements that are not packed yet are appended. If the store holds rows
+        of elements that were removed, replaced or reordered since, the points
+        of `elements` are copied into new arrays and their views moved there.
+        Views no longer used by any of `elements` keep reading the old arrays,
+        which are freed with the last of them.
+        """
+        elements = list(elements)
+        if len(elements) == len(self) and all(
+            element.points is view and element.uuid == uuid
+            for element, view, uuid in zip(elements, self._views, self.uuids)
+        ):
+            return
+        # the old arrays, kept for the views that are dropped
+        old = GeometryStore()
+        old.xs, old.ys, old.offsets, old.uuids = (
+            self.xs,
+            self.ys,
+            self.offsets,
+            self.uuids,
+        )
+        views, self._views = self._views, []
+        self.xs, self.ys = array("d"), array("d")
+        self.offsets, self.uuids = array("q", [0]), []
+        kept: set[int] = set()
+        for element in elements:
+            points = element.points
+            if (
+                not isinstance(points, PointsView)
+                or points.store is not self
+                or id(points) in kept
+            ):
+                element.points = self.append(  # type: ignore[assignment]
+                    element.uuid, list(points)
+                )
+                continue
+            kept.add(id(points))
+            start = len(self.xs)
+            self.xs.extend(old.xs[points.start : points.stop])
+            self.ys.extend(old.ys[points.start : points.stop])
+            points.start, points.stop = start, len(self.xs)
+            self.offsets.append(points.stop)
+            self.uuids.append(element.uuid)
+            self._views.append(points)
+        for view in views:
+            if id(view) not in kept:
+                view.store = old
+
+    def as_numpy(self) -> dict[str, Any]:
+        """
+        Return the coordinate and offset arrays as NumPy arrays sharing their memory.
+
+        The arrays are invalidated by the next `append` or `repack`.
+        """
+        import numpy as np
+
+        return {
+            "xs": np.frombuffer(self.xs, dtype=np.float64),
+            "ys": np.frombuffer(self.ys, dtype=np.float64),
+            "offsets": np.frombuffer(self.offsets, dtype=np.int64),
+        }
+
+    def grid_keys(self, grid: "CoordGrid") -> Any:
+        """Return the packed grid keys (see `CoordGrid.key`) of all points as an array."""
+        import numpy as np
+
+        arrays = self.as_numpy()
+        scale = 1 / grid.resolution
+        ix = np.rint(arrays["xs"] * scale).astype(np.int64)
+        iy = np.rint(arrays["ys"] * scale).astype(np.int64)
+        return (ix << 32) + iy
+
+    def bboxes(self) -> Any:
+        """Return the (x min, y min, x max, y max) of every element as an (n, 4) array."""
+        import numpy as np
+
+        arrays = self.as_numpy()
+        starts = arrays["offsets"][:-1]
+        if len(starts) == 0:
+            return np.empty((0, 4))
+        if np.any(starts == arrays["offsets"][1:]):
+            raise ValueError("Elements without points have no bounding box")
+        xs, ys = arrays["xs"], arrays["ys"]
+        return np.stack(
+            [
+                np.minimum.reduceat(xs, starts),
+                np.minimum.reduceat(ys, starts),
+                np.maximum.reduceat(xs, starts),
+                np.maximum.reduceat(ys, starts),
+            ],
+            axis=1,
+        )
+
+
+class PointsView(Sequence[Point]):
+    """The points of one element in a `GeometryStore`, read as `Point`s on access."""
+
+    __slots__ = ("store", "start", "stop")
+
+    def __init__(self, store: GeometryStore, start: int, stop: int):
+        self.store = store
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    @overload
+    def __getitem__(self, index: int) -> Point: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Point]: ...
+
+    def __getitem__(self, index: int | slice) -> Point | list[Point]:
+        if isinstance(index, slice):
+            return [
+                self[position] for position in range(*index.indices(len(self)))
+            ]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("point index out of range")
+        position = self.start + index
+        return Point(self.store.xs[position], self.store.ys[position])
+
+    def __iter__(self) -> Iterator[Point]:
+        xs = self.store.xs
+        ys = self.store.ys
+        for position in range(self.start, self.stop):
+            yield Point(xs[position], ys[position])
+
+    def coordinates(self) -> list[tuple[float, float]]:
+        """Return the (x, y) of the points without creating `Point` objects."""
+        return list(
+            zip(
+                self.store.xs[self.start : self.stop],
+                self.store.ys[self.start : self.stop],
+            )
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def point_coordinates(points: Sequence[Point]) -> list[tuple[float, float]]:
+    """Return the (x, y) of a list of points or of a `PointsView`."""
+    if isinstance(points, PointsView):
+        return points.coordinates()
+    return [(point.x, point.y) for point in points]
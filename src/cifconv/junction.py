@@ -7,4 +7,6 @@ class Junction:
     
     x: float
     y: float
-    uuid: str
\ No newline at end of file
+    uuid: str
+    # number of the sheet instance the element is on, see `Label.sheet`
+    sheet: int = 0
\ No newline at end of file
@@ -1,4 +1,11 @@
 from dataclasses import dataclass
+from typing import Literal
+
+# `label` is local to its sheet, `global_label` connects across all sheets of a
+# project and `hierarchical_label` connects to the sheet pin of the same name;
+# `sheet_pin` stands for the pin of a sheet symbol in a project loaded by
+# `load_project`
+LabelKind = Literal["label", "global_label", "hierarchical_label", "sheet_pin"]
 
 
 @dataclass
@@ -8,3 +15,11 @@ class Label:
     y: float
     rotation: float
     uuid: str
+    kind: LabelKind = "label"
+    # name path of the sheet instance the label is on (see
+    # `SheetInstance.name_path`), which scopes hierarchical labels; for the
+    # label standing for a sheet pin, the name path of the sheet it leads into
+    sheet_path: str = "/"
+    # number of the sheet instance the element is on, 0 for the root sheet (see
+    # `load_project`); elements only connect geometrically on the same sheet
+    sheet: int = 0
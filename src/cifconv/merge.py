@@ -0,0 +1,335 @@
+"""
+Merging of several schematics into one.
+
+`merge_schemas` composes whole designs, e.g. to panelize a board: the elements
+of every source are copied into one Schema, moved by a per-source offset, with
+the uuids, designators and library ids that collide with earlier sources
+remapped. The sub-sheets and hierarchical labels of each source are kept
+apart from the other sources. Each source is copied in one pass, so merging is
+linear in the total size of the sources.
+
+Merging into a Schema whose nets were already computed (see `Schema.merge`)
+adds the copies through the `add_*` methods, so only the nets the copies touch
+or share a global name with are recomputed.
+"""
+
+import dataclasses
+import re
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Iterable
+
+from cifconv.compact import with_attribute
+from cifconv.point import Point
+from cifconv.symbol import Symbol, add_library_symbol
+
+if TYPE_CHECKING:
+    from cifconv.schema import Schema
+
+# a designator made of a prefix and a number, e.g. "R12" or "#PWR01"
+_NUMBERED_DESIGNATOR = re.compile(r"(.*?)(\d+)")
+
+
+@dataclass
+class MergeSource:
+    """A schema to merge, moved by (dx, dy)."""
+
+    schema: "Schema"
+    dx: float = 0
+    dy: float = 0
+
+
+@dataclass
+class MergeMap:
+    """The identifiers of a source that were remapped because they were taken."""
+
+    uuids: dict[str, str] = field(default_factory=dict)
+    designators: dict[str, str] = field(default_factory=dict)
+    lib_ids: dict[str, str] = field(default_factory=dict)
+
+
+class SchemaMerger:
+    """
+    Copies sources into a target Schema, keeping its identifiers unique.
+
+    The uuids and designators in use are collected once from the target and
+    then kept up to date, so adding N sources costs their total size, not N
+    times the size of the target.
+    """
+
+    def __init__(self, target: "Schema"):
+        self.target = target
+        self._sources = 0
+        self._uuids: set[str] = set()
+        for elements in (
+            target.instances,
+            target.wires.values(),
+            target.buses.values(),
+            target.bus_entries.values(),
+            target.labels,
+            target.junctions,
+            target.no_connects,
+            target.sheets,
+        ):
+            self._uuids.update(element.uuid for element in elements)
+        self._designators: set[str] = set()
+        # designator prefix -> the highest number in use with it
+        self._numbers: dict[str, int] = {}
+        for instance in target.instances:
+            self._designators.add(instance.designator)
+            self._reserve_number(instance.designator)
+        # sheet numbers in use (see `Label.sheet`)
+        self._sheets = _sheet_count(target)
+
+    def add(self, source: "Schema | MergeSource") -> MergeMap:
+        """
+        Copy the elements of a source into the target and return what was remapped.
+
+        - Library symbols are shared with the target symbol of the same lib_id
+          if their bodies are equal (see `Symbol.body_key`), and otherwise added
+          under a new lib_id.
+        - Every element is moved by the offset of the source.
+        - uuids already in use are prefixed with the number of the source,
+          e.g. "2/<uuid>".
+        - Designators already in use get the next free number of their prefix,
+          e.g. R1 becomes R5 if R1 to R4 are taken. All units of an instance
+          are renamed alike, and so are their Reference attribute and the per
+          sheet instance references.
+        - The root sheet of the source is placed on the root sheet of the
+          target, its other sheet instances get sheet numbers of their own and
+          are appended to `Schema.sheet_instances`.
+        - If the target is not empty, the sheet paths of the labels below the
+          root sheet and the paths of the sheet instances are prefixed with the
+          number of the source, e.g. "2:/Channel 1/", so hierarchical labels
+          and sheet pins only connect within the source.
+        """
+        if not isinstance(source, MergeSource):
+            source = MergeSource(source)
+        schema, dx, dy = source.schema, source.dx, source.dy
+        target = self.target
+        self._sources += 1
+        mapping = MergeMap()
+        symbols = self._merge_symbols(schema.symbols, mapping)
+        scoped = bool(self._uuids)
+        sheet_base = self._sheets - 1
+        self._sheets += _sheet_count(schema) - 1
+
+        def new_sheet(sheet: int) -> int:
+            return sheet + sheet_base if sheet else sheet
+
+        def new_path(path: str) -> str:
+            # the root sheet is shared with the target
+            return f"{self._sources}:{path}" if scoped and path != "/" else path
+
+        def new_uuid(old: str) -> str:
+            new = old
+            if old in self._uuids:
+                # prefixed like the elements of a sheet instance in a project
+                new = f"{self._sources}/{old}"
+                mapping.uuids[old] = new
+            self._uuids.add(new)
+            return new
+
+        def moved(points: Iterable[Point]) -> list[Point]:
+            return [Point(point.x + dx, point.y + dy) for point in points]
+
+        for wire in schema.wires.values():
+            target.add_wire(
+                dataclasses.replace(
+                    wire,
+                    uuid=new_uuid(wire.uuid),
+                    points=moved(wire.points),
+                    sheet=new_sheet(wire.sheet),
+                )
+            )
+        for bus in schema.buses.values():
+            target.add_bus(
+                dataclasses.replace(
+                    bus,
+                    uuid=new_uuid(bus.uuid),
+                    points=moved(bus.points),
+                    sheet=new_sheet(bus.sheet),
+                )
+            )
+        for bus_entry in schema.bus_entries.values():
+            target.add_bus_entry(
+                dataclasses.replace(
+                    bus_entry,
+                    uuid=new_uuid(bus_entry.uuid),
+                    x=bus_entry.x + dx,
+                    y=bus_entry.y + dy,
+                    sheet=new_sheet(bus_entry.sheet),
+                )
+            )
+        for junction in schema.junctions:
+            target.add_junction(
+                dataclasses.replace(
+                    junction,
+                    uuid=new_uuid(junction.uuid),
+                    x=junction.x + dx,
+                    y=junction.y + dy,
+                    sheet=new_sheet(junction.sheet),
+                )
+            )
+        for label in schema.labels:
+            target.add_label(
+                dataclasses.replace(
+                    label,
+                    uuid=new_uuid(label.uuid),
+                    x=label.x + dx,
+                    y=label.y + dy,
+                    sheet_path=new_path(label.sheet_path),
+                    sheet=new_sheet(label.sheet),
+                )
+            )
+
+        source_designators = dict.fromkeys(
+            instance.designator for instance in schema.instances
+        )
+        # new numbers must not collide with the designators kept either
+        for designator in source_designators:
+            self._reserve_number(designator)
+        designators = {
+            designator: self._new_designator(designator, mapping)
+            for designator in source_designators
+        }
+        self._designators.update(designators.values())
+        for instance in schema.instances:
+            symbol = symbols.get(instance.lib_id, instance.symbol)
+            pin_instances = None
+            if instance.symbol is None and instance.pin_instances:
+                # given explicitly rather than placed from the symbol
+                pin_instances = [
+                    dataclasses.replace(pin, x=pin.x + dx, y=pin.y + dy)
+                    for pin in instance.pin_instances
+                ]
+            designator = designators[instance.designator]
+            attributes = instance.attributes
+            if attributes is not None and designator != instance.designator:
+                attributes = with_attribute(attributes, "Reference", designator)
+            target.add_instance(
+                dataclasses.replace(
+                    instance,
+                    uuid=new_uuid(instance.uuid),
+                    lib_id=symbol.lib_id if symbol is not None else instance.lib_id,
+                    designator=designator,
+                    attributes=attributes,
+                    references=(
+                        {
+                            new_path(path): designators.get(reference, reference)
+                            for path, reference in instance.references.items()
+                        }
+                        if instance.references is not None
+                        else None
+                    ),
+                    x=instance.x + dx,
+                    y=instance.y + dy,
+                    sheet=new_sheet(instance.sheet),
+                    # None places them again from the symbol at the new position
+                    pin_instances=pin_instances,
+                    symbol=symbol,
+                )
+            )
+        for no_connect in schema.no_connects:
+            target.add_no_connect(
+                dataclasses.replace(
+                    no_connect,
+                    uuid=new_uuid(no_connect.uuid),
+                    x=no_connect.x + dx,
+                    y=no_connect.y + dy,
+                    sheet=new_sheet(no_connect.sheet),
+                )
+            )
+        for sheet in schema.sheets:
+            target.sheets.append(
+                dataclasses.replace(
+                    sheet,
+                    uuid=new_uuid(sheet.uuid),
+                    x=sheet.x + dx,
+                    y=sheet.y + dy,
+                    pins=[
+                        dataclasses.replace(pin, x=pin.x + dx, y=pin.y + dy)
+                        for pin in sheet.pins
+                    ],
+                )
+            )
+        if schema.sheet_instances and not target.sheet_instances:
+            # the root sheet, shared with the target
+            target.sheet_instances.append(schema.sheet_instances[0])
+        for sheet_instance in schema.sheet_instances[1:]:
+            target.sheet_instances.append(
+                dataclasses.replace(
+                    sheet_instance,
+                    path=new_path(sheet_instance.path),
+                    name_path=new_path(sheet_instance.name_path),
+                )
+            )
+        return mapping
+
+    def _merge_symbols(
+        self, symbols: dict[str, Symbol], mapping: MergeMap
+    ) -> dict[str, Symbol]:
+        """Add the symbols of a source to the target; source lib_id -> target symbol."""
+        merged: dict[str, Symbol] = {}
+        for lib_id, symbol in symbols.items():
+            merged[lib_id] = add_library_symbol(self.target.symbols, symbol)
+            if merged[lib_id].lib_id != lib_id:
+                mapping.lib_ids[lib_id] = merged[lib_id].lib_id
+        return merged
+
+    def _new_designator(self, designator: str, mapping: MergeMap) -> str:
+        if designator not in self._designators:
+            return designator
+        match = _NUMBERED_DESIGNATOR.fullmatch(designator)
+        if match is None:
+            # not annotated with a number, e.g. "R?"
+            return designator
+        prefix = match.group(1)
+        number = self._numbers[prefix] + 1
+        self._numbers[prefix] = number
+        # keep zero padding, e.g. "#PWR01" -> "#PWR05"
+        new = f"{prefix}{number:0{len(match.group(2))}d}"
+        mapping.designators[designator] = new
+        return new
+
+    def _reserve_number(self, designator: str) -> None:
+        match = _NUMBERED_DESIGNATOR.fullmatch(designator)
+        if match is not None:
+            prefix, number = match.group(1), int(match.group(2))
+            if number > self._numbers.get(prefix, 0):
+                self._numbers[prefix] = number
+
+
+def _sheet_count(schema: "Schema") -> int:
+    """The number of sheet numbers a schema uses, at least 1 for the root sheet."""
+    count = max(len(schema.sheet_instances), 1)
+    for elements in (
+        schema.instances,
+        schema.wires.values(),
+        schema.buses.values(),
+        schema.bus_entries.values(),
+        schema.labels,
+        schema.junctions,
+        schema.no_connects,
+    ):
+        for element in elements:
+            count = max(count, element.sheet + 1)
+    return count
+
+
+def merge_schemas(sources: "Iterable[Schema | MergeSource]") -> "Schema":
+    """
+    Merge schematics into a new Schema (see `SchemaMerger.add`).
+
+    The result uses the coordinate grid of the first source. Its nets are
+    computed on first access, in one pass over all merged elements.
+    """
+    # imported here, the schema module imports this one
+    from cifconv.schema import Schema
+
+    merge_sources = [
+        source if isinstance(source, MergeSource) else MergeSource(source)
+        for source in sources
+    ]
+    schema = Schema(merge_sources[0].schema.grid if merge_sources else None)
+    schema.merge(merge_sources)
+    return schema
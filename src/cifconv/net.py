@@ -1,5 +1,6 @@
+import uuid
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from cifconv.bus import Bus
 from cifconv.bus_entry import BusEntry
@@ -10,6 +11,70 @@ if TYPE_CHECKING:
     from cifconv.pin_instance import PinInstance
     from cifconv.symbol_instance import SymbolInstance
 
+# namespace of the name-based UUIDs of nets, see `net_id`
+NET_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "net.cifconv")
+
+
+def net_id(member_uuids: Iterable[str]) -> str:
+    """
+    Return the id of the net made up of the elements with the given uuids.
+
+    The id is a UUID derived from the sorted member uuids (a version 5 UUID),
+    so the same net gets the same id on every run, independent of the order
+    its elements appear in the file.
+    """
+    return str(uuid.uuid5(NET_ID_NAMESPACE, "\n".join(sorted(member_uuids))))
+
+
+# kinds of net names in order of precedence, see `net_name`
+NET_NAME_PRIORITY = (
+    "power",
+    "global_label",
+    "label",
+    "hierarchical_label",
+    "sheet_pin",
+)
+
+# kinds of net names qualified with the path of their sheet, see `net_name`
+SHEET_LOCAL_NAMES = frozenset({"label", "hierarchical_label", "sheet_pin"})
+
+
+def net_name(labels: Iterable[tuple[str, str, str]]) -> str | None:
+    """
+    Return the name of a net from the (kind, text, sheet path) of the names on it.
+
+    The kind is a label kind or "power" for the value of a power symbol, the
+    sheet path the `Label.sheet_path` of the label. As in KiCad, power symbols
+    take precedence over global labels, global labels over local labels, those
+    over hierarchical labels and those over sheet pins, so a net crossing
+    sheets is named after the label in the higher-level sheet. Among names of
+    the same kind, the one on the sheet nearest the root wins, then the
+    alphabetically first text, so the name does not depend on the order labels
+    appear in the file. Returns None for a net without names.
+
+    Local names below the root sheet are qualified with the sheet path, e.g.
+    "/Channel 1/IN", so the nets of two instances of a sheet get two names.
+    """
+    best = min(
+        (
+            (
+                NET_NAME_PRIORITY.index(kind),
+                sheet_path.count("/"),
+                text,
+                kind,
+                sheet_path,
+            )
+            for kind, text, sheet_path in labels
+        ),
+        default=None,
+    )
+    if best is None:
+        return None
+    _, _, text, kind, sheet_path = best
+    if kind in SHEET_LOCAL_NAMES and sheet_path != "/":
+        return f"{sheet_path}{text}"
+    return text
+
 
 @dataclass
 class Net:
@@ -0,0 +1,85 @@
+from typing import TYPE_CHECKING
+
+from cifconv.net import Net
+
+if TYPE_CHECKING:
+    from cifconv.pin_instance import PinInstance
+    from cifconv.symbol_instance import SymbolInstance
+
+
+class NetIndex:
+    """
+    Lookup tables over a list of nets for connectivity queries.
+
+    Built in one pass over the nets and their pins. Every query is a dict
+    lookup, plus a walk over the k items it returns. The index does not follow
+    changes of the nets; `Schema` rebuilds it whenever its nets change.
+    """
+
+    def __init__(self, nets: list[Net]):
+        self.nets = nets
+        self._by_name: dict[str, Net] = {}
+        self._by_id: dict[str, Net] = {}
+        # (designator, pin number) -> the net of the pin
+        self._by_pin: dict[tuple[str, str], Net] = {}
+        # id() of a pin -> its net
+        self._by_pin_instance: dict[int, Net] = {}
+        # net uuid -> the instances with a pin on it, in pin order
+        self._instances: dict[str, list["SymbolInstance"]] = {}
+        # id() of an instance -> the nets its pins are on, in net order
+        self._instance_nets: dict[int, list[Net]] = {}
+        for net in nets:
+            # names are not unique, e.g. the nets of two instances of a sheet;
+            # the first net in net order wins
+            self._by_name.setdefault(net.name, net)
+            self._by_id[net.uuid] = net
+            instances: list["SymbolInstance"] = []
+            seen: set[int] = set()
+            for instance, pin in net.connected_pins or ():
+                self._by_pin.setdefault((instance.designator, pin.number), net)
+                self._by_pin_instance[id(pin)] = net
+                if id(instance) in seen:
+                    continue
+                seen.add(id(instance))
+                instances.append(instance)
+                self._instance_nets.setdefault(id(instance), []).append(net)
+            self._instances[net.uuid] = instances
+
+    def net_by_name(self, name: str) -> Net | None:
+        """Return the first net named `name`, or None."""
+        return self._by_name.get(name)
+
+    def net_by_id(self, net_id: str) -> Net | None:
+        """Return the net with the uuid `net_id`, or None."""
+        return self._by_id.get(net_id)
+
+    def net_of_pin(self, designator: str, pin_number: str) -> Net | None:
+        """Return the net of pin `pin_number` of the instance `designator`, or None."""
+        return self._by_pin.get((designator, pin_number))
+
+    def net_of_pin_instance(self, pin: "PinInstance") -> Net | None:
+        """Return the net of a placed pin, looked up by identity, or None."""
+        return self._by_pin_instance.get(id(pin))
+
+    def pins_of_net(self, net: Net) -> list[tuple["SymbolInstance", "PinInstance"]]:
+        """Return the (instance, pin) of the pins on a net."""
+        return net.connected_pins or []
+
+    def instances_on_net(self, net: Net) -> list["SymbolInstance"]:
+        """Return the instances with at least one pin on a net, each once."""
+        return self._instances.get(net.uuid, [])
+
+    def nets_of_instance(self, instance: "SymbolInstance") -> list[Net]:
+        """Return the nets the pins of an instance are on, each once."""
+        return self._instance_nets.get(id(instance), [])
+
+    def neighbours(self, instance: "SymbolInstance") -> list["SymbolInstance"]:
+        """Return the other instances sharing a net with `instance`, each once."""
+        neighbours: list["SymbolInstance"] = []
+        seen = {id(instance)}
+        for net in self.nets_of_instance(instance):
+            for other in self._instances[net.uuid]:
+                if id(other) not in seen:
+                    seen.add(id(other))
+                    neighbours.append(other)
+        return neighbours
@@ -26,3 +26,5 @@ class Pin:
     rel_x: float
     rel_y: float
     rotation: float = 0
+    # distance from the connection point at (rel_x, rel_y) to the body
+    length: float = 0
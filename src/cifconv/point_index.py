@@ -0,0 +1,93 @@
+import math
+from typing import Any
+
+from cifconv.coord import KICAD_RESOLUTION
+from cifconv.segment_index import DEFAULT_CELL_SIZE, _point_on_segment
+
+
+class PointIndex:
+    """
+    Uniform grid index over points for points-on-segment queries.
+
+    The counterpart of `SegmentIndex`: it answers which of the indexed points lie
+    on a given segment, e.g. which labels, pins or wire ends a newly added wire
+    passes through. Points are bucketed by the 2D cell of `cell_size` they fall
+    in, and a query only looks at the cells covered by the segment.
+    """
+
+    def __init__(
+        self,
+        cell_size: float = DEFAULT_CELL_SIZE,
+        resolution: float = KICAD_RESOLUTION,
+        tolerance: float = 0,
+    ):
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+        self.cell_size = cell_size
+        # points within this distance of a segment are on it
+        self.tolerance = max(tolerance, resolution / 2)
+        self._count = 0
+        # (x cell, y cell) -> (x, y, item) of the points in that cell
+        self._cells: dict[tuple[int, int], list[tuple[float, float, Any]]] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, item: Any, x: float, y: float) -> None:
+        """Add the point (x, y), reported as `item` by queries."""
+        self._count += 1
+        key = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        cell = self._cells.get(key)
+        if cell is None:
+            self._cells[key] = [(x, y, item)]
+        else:
+            cell.append((x, y, item))
+
+    def remove(self, item: Any, x: float, y: float) -> None:
+        """Remove the point (x, y) added for `item`, compared by identity."""
+        key = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+        cell = self._cells.get(key, [])
+        for position, (_, _, other) in enumerate(cell):
+            if other is item:
+                del cell[position]
+                self._count -= 1
+                break
+        if not cell:
+            self._cells.pop(key, None)
+
+    def query_segment(
+        self,
+        x1: float,
+        y1: float,
+        x2: float,
+        y2: float,
+        *,
+        interior_only: bool = False,
+    ) -> list[Any]:
+        """
+        Return the items of all points on the segment (x1, y1)-(x2, y2), within tolerance.
+
+        With `interior_only`, points at either end of the segment are skipped.
+        A zero-length segment returns the points at (x1, y1).
+        """
+        tolerance = self.tolerance
+        cell_size = self.cell_size
+        items: list[Any] = []
+        for cell_x in range(
+            math.floor((min(x1, x2) - tolerance) / cell_size),
+            math.floor((max(x1, x2) + tolerance) / cell_size) + 1,
+        ):
+            for cell_y in range(
+                math.floor((min(y1, y2) - tolerance) / cell_size),
+                math.floor((max(y1, y2) + tolerance) / cell_size) + 1,
+            ):
+                for x, y, item in self._cells.get((cell_x, cell_y), ()):
+                    if not _point_on_segment(x, y, x1, y1, x2, y2, tolerance):
+                        continue
+                    if interior_only and (
+                        math.hypot(x - x1, y - y1) <= tolerance
+                        or math.hypot(x - x2, y - y2) <= tolerance
+                    ):
+                        continue
+                    items.append(item)
+        return items
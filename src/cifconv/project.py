@@ -0,0 +1,245 @@
+"""
+Loading of hierarchical KiCad projects.
+
+A project is a root schematic whose `(sheet ...)` symbols refer to other
+schematic files, which may contain sheets themselves. `load_project` parses
+every distinct file once, in parallel, and stitches all sheet instances into
+a single Schema.
+"""
+
+import dataclasses
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from loguru import logger
+
+from cifconv.compact import with_attribute
+from cifconv.label import Label
+from cifconv.schema import Schema
+from cifconv.sheet import SheetInstance
+from cifconv.symbol import add_library_symbol
+
+
+def parse_sheet_file(path: str, used_symbols_only: bool = False) -> Schema:
+    """Parse a single schematic file. Runs in the worker processes of `load_project`."""
+    # imported here so the worker processes only import what they need
+    from cifconv.cifconv_eval import cifconv_eval
+    from cifconv.kicad_schematic_tokenizer import kicad_sch_tokenize
+    from cifconv.read_expr import read_expr
+
+    with open(path, "r") as f:
+        input_data = f.read()
+    return cifconv_eval(
+        read_expr(kicad_sch_tokenize(input_data)), used_symbols_only=used_symbols_only
+    )
+
+
+def load_project(
+    root_file: str | Path,
+    *,
+    max_workers: int | None = None,
+    used_symbols_only: bool = False,
+) -> Schema:
+    """
+    Load a hierarchical project into a single Schema.
+
+    The sheet files referenced by the `Sheetfile` property of the sheet symbols
+    are discovered starting from `root_file` and parsed in a process pool of
+    `max_workers` processes (the number of CPUs by default; 1 parses in this
+    process). Each distinct file is parsed once, no matter how many times it is
+    placed, so the load time scales with the number of unique sheet files.
+
+    Every sheet instance is then copied into the result (see `stitch_project`).
+
+    Raises:
+        ValueError: If a sheet file (indirectly) contains itself.
+    """
+    root_path = Path(root_file).resolve()
+    parsed = parse_sheet_files(root_path, max_workers, used_symbols_only)
+    return stitch_project(root_path, parsed)
+
+
+def parse_sheet_files(
+    root_path: Path, max_workers: int | None, used_symbols_only: bool
+) -> dict[Path, Schema]:
+    """Parse the root file and every sheet file reachable from it, each once."""
+    parsed: dict[Path, Schema] = {}
+    if max_workers == 1:
+        pending = [root_path]
+        while pending:
+            path = pending.pop()
+            if path in parsed:
+                continue
+            parsed[path] = parse_sheet_file(str(path), used_symbols_only)
+            pending.extend(_sheet_paths(path, parsed[path]))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            submitted = {root_path}
+            futures: dict[Future[Schema], Path] = {
+                executor.submit(
+                    parse_sheet_file, str(root_path), used_symbols_only
+                ): root_path
+            }
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = futures.pop(future)
+                    parsed[path] = future.result()
+                    # sheets are submitted as soon as the file placing them is
+                    # parsed, so independent branches of the hierarchy overlap
+                    for sheet_path in _sheet_paths(path, parsed[path]):
+                        if sheet_path not in submitted:
+                            submitted.add(sheet_path)
+                            futures[
+                                executor.submit(
+                                    parse_sheet_file, str(sheet_path), used_symbols_only
+                                )
+                            ] = sheet_path
+    logger.debug(f"Parsed {len(parsed)} distinct sheet files")
+    return parsed
+
+
+def _sheet_paths(path: Path, schema: Schema) -> list[Path]:
+    return [(path.parent / sheet.file).resolve() for sheet in schema.sheets]
+
+
+def stitch_project(root_path: Path, parsed: dict[Path, Schema]) -> Schema:
+    """
+    Stitch the parsed files of a project into a single Schema.
+
+    The root sheet is copied as is. The elements of every other sheet instance
+    are copied with:
+
+    - their uuid prefixed with the instance path of the sheet,
+    - their `sheet` set to the number of the sheet instance, its index in
+      `Schema.sheet_instances`, so the sheets do not connect geometrically
+      although their coordinates overlap,
+    - symbol instances designated by their reference for that instance path
+      if the file has one, else by the sheet name path and their reference in
+      the file, e.g. "/Channel 1/R1", which also becomes their Reference
+      attribute.
+
+    The pins of a sheet symbol become labels of kind "sheet_pin" in the parent
+    sheet, scoped to the sheet instance, so they connect to the hierarchical
+    labels inside it. Power symbols and global labels connect across all sheets.
+
+    Library symbols are shared between the files if their bodies are equal
+    (see `Symbol.body_key`); a symbol whose lib_id is taken by another body is
+    added as "<lib_id>_<n>" and the instances of its file refer to that.
+    """
+    root = parsed[root_path]
+    schema = Schema(root.grid)
+    schema.uuid = root.uuid
+    root_instance_path = f"/{root.uuid}" if root.uuid else ""
+    _copy_sheet(
+        schema,
+        parsed,
+        root_path,
+        instance_path=root_instance_path,
+        name_path="/",
+        ancestors=(),
+    )
+    return schema
+
+
+def _copy_sheet(
+    schema: Schema,
+    parsed: dict[Path, Schema],
+    path: Path,
+    instance_path: str,
+    name_path: str,
+    ancestors: tuple[Path, ...],
+) -> None:
+    if path in ancestors:
+        raise ValueError(f"Sheet file {path} contains itself")
+    source = parsed[path]
+    is_root = not ancestors
+    sheet = len(schema.sheet_instances)
+    schema.sheet_instances.append(
+        SheetInstance(path=instance_path or "/", name_path=name_path, file=str(path))
+    )
+
+    def new_uuid(uuid: str) -> str:
+        return uuid if is_root else f"{instance_path}/{uuid}"
+
+    # lib_id in the file -> the symbol in the project
+    symbols = {
+        lib_id: add_library_symbol(schema.symbols, symbol)
+        for lib_id, symbol in source.symbols.items()
+    }
+    for wire in source.wires.values():
+        copy = dataclasses.replace(
+            wire, uuid=new_uuid(wire.uuid), points=list(wire.points), sheet=sheet
+        )
+        schema.wires[copy.uuid] = copy
+    for bus in source.buses.values():
+        copy = dataclasses.replace(
+            bus, uuid=new_uuid(bus.uuid), points=list(bus.points), sheet=sheet
+        )
+        schema.buses[copy.uuid] = copy
+    for bus_entry in source.bus_entries.values():
+        copy = dataclasses.replace(
+            bus_entry, uuid=new_uuid(bus_entry.uuid), sheet=sheet
+        )
+        schema.bus_entries[copy.uuid] = copy
+    for label in source.labels:
+        schema.labels.append(
+            dataclasses.replace(
+                label, uuid=new_uuid(label.uuid), sheet_path=name_path, sheet=sheet
+            )
+        )
+    for junction in source.junctions:
+        schema.junctions.append(
+            dataclasses.replace(junction, uuid=new_uuid(junction.uuid), sheet=sheet)
+        )
+    for no_connect in source.no_connects:
+        schema.no_connects.append(
+            dataclasses.replace(no_connect, uuid=new_uuid(no_connect.uuid), sheet=sheet)
+        )
+    for instance in source.instances:
+        designator = (instance.references or {}).get(instance_path)
+        if designator is None:
+            designator = (
+                instance.designator if is_root else f"{name_path}{instance.designator}"
+            )
+        attributes = instance.attributes
+        if attributes is not None and attributes.get("Reference") != designator:
+            attributes = with_attribute(attributes, "Reference", designator)
+        symbol = symbols.get(instance.lib_id, instance.symbol)
+        schema.instances.append(
+            dataclasses.replace(
+                instance,
+                uuid=new_uuid(instance.uuid),
+                lib_id=symbol.lib_id if symbol is not None else instance.lib_id,
+                designator=designator,
+                attributes=attributes,
+                sheet=sheet,
+                # placed again, so every sheet instance has pin instances of its own
+                pin_instances=None,
+                symbol=symbol,
+            )
+        )
+
+    for sheet_symbol in source.sheets:
+        sheet_name_path = f"{name_path}{sheet_symbol.name or sheet_symbol.uuid}/"
+        for pin in sheet_symbol.pins:
+            schema.labels.append(
+                Label(
+                    text=pin.name,
+                    x=pin.x,
+                    y=pin.y,
+                    rotation=0,
+                    uuid=new_uuid(pin.uuid or f"{sheet_symbol.uuid}:{pin.name}"),
+                    kind="sheet_pin",
+                    sheet_path=sheet_name_path,
+                    sheet=sheet,
+                )
+            )
+        _copy_sheet(
+            schema,
+            parsed,
+            (path.parent / sheet_symbol.file).resolve(),
+            instance_path=f"{instance_path}/{sheet_symbol.uuid}",
+            name_path=sheet_name_path,
+            ancestors=(*ancestors, path),
+        )
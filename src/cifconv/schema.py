@@ -1,71 +1,350 @@
-import uuid
-from functools import cached_property
-from typing import Any
-
-from loguru import logger
+from typing import Any, Collection, Hashable, Iterable, Mapping
 
+from cifconv.attribute_index import AttributeIndex
+from cifconv.bbox import place_bboxes
 from cifconv.bus import Bus
 from cifconv.bus_entry import BusEntry
+from cifconv.compact import KeyTuples, compact_instance, compact_symbol
+from cifconv.connectivity import Connectivity
+from cifconv.coord import CoordGrid
+from cifconv.geometry_store import GeometryStore, point_coordinates
+from cifconv.junction import Junction
 from cifconv.label import Label
+from cifconv.merge import MergeMap, MergeSource, SchemaMerger
 from cifconv.net import Net
+from cifconv.net_index import NetIndex
 from cifconv.no_connect import NoConnect
-from cifconv.pin_instance import PinInstance
-from cifconv.point import Point
+from cifconv.sheet import Sheet, SheetInstance
+from cifconv.simplify import WireSimplification, simplify_wires
+from cifconv.spatial_index import SpatialIndex
 from cifconv.symbol import Symbol
 from cifconv.symbol_instance import SymbolInstance
 from cifconv.wire import Wire
 
+# top-level keys of the circuit intermediate format, in output order
+OUTPUT_SECTIONS = ("buses", "instances", "library", "nets", "wires")
+
 
 class Schema:
-    def __init__(self):
+    def __init__(self, grid: CoordGrid | None = None):
+        # grid coordinates are quantized on to decide which elements connect
+        self.grid = grid or CoordGrid()
         self.symbols: dict[str, Symbol] = {}
         self.instances: list[SymbolInstance] = []
         self.wires: dict[str, Wire] = {}
         self.buses: dict[str, Bus] = {}
         self.labels: list[Label] = []
         self.no_connects: list[NoConnect] = []
+        self.junctions: list[Junction] = []
         self.bus_entries: dict[str, BusEntry] = {}
+        # uuid of the schematic file, the root of the instance paths of its sheets
+        self.uuid: str | None = None
+        # hierarchical sheet symbols placed in this schematic
+        self.sheets: list[Sheet] = []
+        # every sheet placement, when loaded as a project (see `load_project`)
+        self.sheet_instances: list[SheetInstance] = []
+        # connectivity of the elements, computed on first access of `nets`
+        self._connectivity: Connectivity | None = None
+        # lookup tables over the nets, rebuilt when the nets change
+        self._net_index: NetIndex | None = None
+        # spatial index over all elements and the nets it was built for
+        self._spatial_index: tuple[list[Net], SpatialIndex] | None = None
+        # inverted index over the instance attributes, built on first query
+        self._attribute_index: AttributeIndex | None = None
+        # lib_id -> lib_id of the structurally identical symbol that replaced
+        # it in `symbols`, filled by `dedup_symbols`
+        self.symbol_aliases: dict[str, str] = {}
+        # columnar point storage of the wires and buses, after `pack_geometry`
+        self.wire_store: GeometryStore | None = None
+        self.bus_store: GeometryStore | None = None
+        # the attribute key tuples shared by the compacted instances (see
+        # `Schema.compact`)
+        self.attribute_keys: KeyTuples = {}
+
+    def symbol_alias_table(self) -> dict[str, str]:
+        """
+        Return the lib_ids of library symbols whose body equals an earlier one.
 
-    def to_json(self) -> dict[str, Any]:
-        net_name_to_id: dict[str, str] = {}
-        for net in self.nets:
-            net_name_to_id[net.name] = net.uuid
+        Maps each such alias lib_id to the lib_id of the first symbol with the
+        same body (see `Symbol.body_key`). Unlike `dedup_symbols`, the symbols
+        are left as they are.
+        """
+        canonical_by_body: dict[Hashable, str] = {}
+        aliases: dict[str, str] = {}
+        for lib_id, symbol in self.symbols.items():
+            canonical = canonical_by_body.setdefault(symbol.body_key(), lib_id)
+            if canonical != lib_id:
+                aliases[lib_id] = canonical
+        return aliases
+
+    def dedup_symbols(self) -> dict[str, str]:
+        """
+        Detect library symbols with identical bodies and keep one definition of each.
+
+        The first symbol with a given body (see `Symbol.body_key`) is kept as the
+        canonical definition; every later symbol with the same body is dropped
+        from `symbols` and recorded in `symbol_aliases`, and the instances placing
+        it are pointed at the canonical symbol. The instances keep their lib_id.
+
+        Returns the alias table, mapping each alias lib_id to its canonical lib_id.
+        """
+        aliases = self.symbol_alias_table()
+        for lib_id, canonical_lib_id in aliases.items():
+            del self.symbols[lib_id]
+            self.symbol_aliases[lib_id] = canonical_lib_id
+        for instance in self.instances:
+            if instance.lib_id in aliases:
+                instance.symbol = self.symbols[aliases[instance.lib_id]]
+        return self.symbol_aliases
+
+    def pack_geometry(self) -> None:
+        """
+        Move the points of all wires and buses into columnar storage.
+
+        The points of each wire and bus are stored in `wire_store` or
+        `bus_store` and replaced by a read-only view of them (see
+        `cifconv.geometry_store`). Elements added later keep their lists of
+        points until this is called again. The stores describe the wires and
+        buses as of the last call: the rows of elements removed or replaced
+        since are dropped by the next call (see `GeometryStore.repack`). The
+        nets are unchanged.
+        """
+        if self.wire_store is None:
+            self.wire_store = GeometryStore()
+        if self.bus_store is None:
+            self.bus_store = GeometryStore()
+        self.wire_store.repack(self.wires.values())
+        self.bus_store.repack(self.buses.values())
+
+    def compact(self) -> None:
+        """
+        Shrink the memory taken by the symbols and instances in place.
+
+        Interns pin numbers, pin names and attribute keys and stores the
+        attributes of every instance as an `AttributeMap` (see
+        `cifconv.compact`), sharing the key tuples in `attribute_keys`. The
+        output is unchanged.
+        """
+        for symbol in self.symbols.values():
+            compact_symbol(symbol)
+        for instance in self.instances:
+            compact_instance(instance, self.attribute_keys)
+
+    def merge(self, sources: "Iterable[Schema | MergeSource]") -> list[MergeMap]:
+        """
+        Copy other schematics into this one, each moved by its offset.
+
+        Colliding uuids, designators and library ids are remapped (see
+        `SchemaMerger.add`); returns what was remapped for each source. If
+        the nets were already computed, only the nets the copies touch or
+        share a global name with are recomputed.
+        """
+        merger = SchemaMerger(self)
+        return [merger.add(source) for source in sources]
+
+    def simplify_wires(self) -> WireSimplification:
+        """
+        Merge collinear and overlapping wires and drop duplicate wires in place.
+
+        An optional normalization before computing the nets, which keeps the
+        connectivity unchanged (see `cifconv.simplify.simplify_wires`). Returns
+        the number of wires before and after.
+        """
+        return simplify_wires(self)
+
+    def to_json(
+        self,
+        sections: Collection[str] | None = None,
+        *,
+        library_aliases: bool = False,
+        used_symbols_only: bool = False,
+        bboxes: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Serialize the schema into the circuit intermediate format.
+
+        `sections` restricts the output to the given top-level keys (see
+        `OUTPUT_SECTIONS`). Sections that are not requested are not computed, so
+        e.g. emitting only `instances` never computes nets or pin instances.
+
+        If `library_aliases` is True, structurally identical library symbols are
+        listed once (see `symbol_alias_table`): the library only contains the
+        canonical symbols and an extra `library_aliases` section maps every
+        other lib_id to its canonical lib_id. The symbols are not modified.
+        The symbols dropped by `dedup_symbols` are always listed there.
+
+        If `used_symbols_only` is True, the library only contains the symbols
+        referenced by at least one instance.
+
+        If `bboxes` is True, every instance gets a `bbox` with the extents of its
+        placed symbol body (see `SymbolInstance.bbox`), or null if unknown.
+        """
+        if sections is None:
+            sections = OUTPUT_SECTIONS
+        unknown = set(sections) - set(OUTPUT_SECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown output sections: {sorted(unknown)}")
+
+        result: dict[str, Any] = {}
+        if "buses" in sections:
+            result["buses"] = self._buses_json()
+        if "instances" in sections:
+            result["instances"] = self._instances_json(bboxes=bboxes)
+        if "library" in sections:
+            aliases = dict(self.symbol_aliases)
+            if library_aliases:
+                aliases.update(self.symbol_alias_table())
+            result["library"] = self._library_json(
+                aliases=aliases, used_symbols_only=used_symbols_only
+            )
+            if aliases or library_aliases:
+                result["library_aliases"] = aliases
+        if "nets" in sections:
+            result["nets"] = self._nets_json()
+        if "wires" in sections:
+            result["wires"] = self._wires_json()
+        return result
+
+    def net_of(self, element: Wire | Bus | BusEntry | Label | Junction) -> Net | None:
+        """
+        Return the net containing the given wire, bus or bus entry in O(1).
+
+        For a label or junction, returns the net of the element it sits on.
+        Elements are looked up by identity, so `element` must be the object stored
+        in this schema. Returns None for elements that are not part of the schema.
+        """
+        # computing the nets fills the element -> net index
+        self.nets
+        assert self._connectivity is not None
+        if isinstance(element, (Label, Junction)):
+            return self._connectivity.net_of_attachment(element)
+        return self._connectivity.net_by_element.get(id(element))
+
+    @property
+    def net_index(self) -> NetIndex:
+        """
+        Lookup tables for connectivity queries over the current nets.
+
+        Built on first access after the nets changed, in one pass over the nets;
+        queries are then O(1) plus the size of their result.
+        """
+        nets = self.nets
+        if self._net_index is None or self._net_index.nets is not nets:
+            self._net_index = NetIndex(nets)
+        return self._net_index
+
+    @property
+    def spatial_index(self) -> SpatialIndex:
+        """
+        Spatial index over every placed element for point and rectangle queries.
+
+        Built in bulk on first access after the nets changed (see `SpatialIndex`).
+        """
+        nets = self.nets
+        if self._spatial_index is None or self._spatial_index[0] is not nets:
+            self._spatial_index = (nets, SpatialIndex(self))
+        return self._spatial_index[1]
+
+    @property
+    def attribute_index(self) -> AttributeIndex:
+        """
+        Inverted index from instance attribute (key, value) to instances.
+
+        Built on first access and kept until instances are added or removed
+        through `add_instance`/`remove_instance` or `invalidate_nets` is called.
+        """
+        if self._attribute_index is None:
+            self._attribute_index = AttributeIndex(self.instances)
+        return self._attribute_index
+
+    def find_instances(self, conditions: Mapping[str, str]) -> list[SymbolInstance]:
+        """
+        Return the instances whose attributes match all conditions, e.g.
+        `{"Value": "10k", "Footprint": "*0603*"}` (see `AttributeIndex.query`).
+        """
+        return self.attribute_index.query(conditions)
+
+    def net_by_name(self, name: str) -> Net | None:
+        """Return the first net named `name`, or None."""
+        return self.net_index.net_by_name(name)
+
+    def net_by_id(self, net_id: str) -> Net | None:
+        """Return the net with the uuid `net_id`, or None."""
+        return self.net_index.net_by_id(net_id)
+
+    def net_of_pin(self, designator: str, pin_number: str) -> Net | None:
+        """Return the net of pin `pin_number` of the instance `designator`, or None."""
+        return self.net_index.net_of_pin(designator, pin_number)
 
+    def instances_on_net(self, net: Net) -> list[SymbolInstance]:
+        """Return the instances with at least one pin on a net, each once."""
+        return self.net_index.instances_on_net(net)
+
+    def neighbours(self, instance: SymbolInstance) -> list[SymbolInstance]:
+        """Return the other instances sharing a net with `instance`, each once."""
+        return self.net_index.neighbours(instance)
+
+    def _buses_json(self) -> list[dict[str, Any]]:
         buses_json: list[dict[str, Any]] = []
         for bus in self.buses.values():
-            net_name = None
-            for net in self.nets:
-                if bus in net.buses:
-                    net_name = net.name
-                    break
+            net = self.net_of(bus)
             buses_json.append(
                 {
                     "name": bus.uuid,
-                    "net": net_name_to_id.get(net_name, "") if net_name else "",
-                    "points": [{"x": p.x, "y": p.y} for p in bus.points],
+                    "net": net.uuid if net else "",
+                    "points": [
+                        {"x": x, "y": y} for x, y in point_coordinates(bus.points)
+                    ],
                     "uuid": bus.uuid,
                 }
             )
+        return buses_json
 
+    def _instances_json(self, bboxes: bool = False) -> list[dict[str, Any]]:
+        if bboxes:
+            place_bboxes(self.instances)
         instances_json: list[dict[str, Any]] = []
         for instance in self.instances:
-            instances_json.append(
-                {
-                    "attributes": instance.attributes or {},
-                    "designator": instance.designator,
-                    "lib_id": instance.lib_id,
-                    "placement": {
-                        "mirror": False,
-                        "rotation": instance.rotation,
-                        "x": instance.x,
-                        "y": instance.y,
-                    },
-                    "uuid": instance.uuid,
-                }
-            )
-
+            instance_json: dict[str, Any] = {
+                "attributes": dict(instance.attributes or {}),
+                "designator": instance.designator,
+                "lib_id": instance.lib_id,
+                "placement": {
+                    "mirror": instance.mirror is not None,
+                    "rotation": instance.rotation,
+                    "x": instance.x,
+                    "y": instance.y,
+                },
+                "uuid": instance.uuid,
+            }
+            if bboxes:
+                bbox = instance.bbox
+                instance_json["bbox"] = (
+                    dict(zip(("x_min", "y_min", "x_max", "y_max"), bbox))
+                    if bbox is not None
+                    else None
+                )
+            instances_json.append(instance_json)
+        return instances_json
+
+    def _library_json(
+        self,
+        aliases: Mapping[str, str] | None = None,
+        used_symbols_only: bool = False,
+    ) -> list[dict[str, Any]]:
+        aliases = aliases or {}
+        used_lib_ids: set[str] = set()
+        if used_symbols_only:
+            for instance in self.instances:
+                used_lib_ids.add(instance.lib_id)
+                if instance.lib_id in aliases:
+                    used_lib_ids.add(aliases[instance.lib_id])
         library_json: list[dict[str, Any]] = []
         for lib_id, symbol in self.symbols.items():
+            if lib_id in aliases:
+                continue
+            if used_symbols_only and lib_id not in used_lib_ids:
+                continue
             pins_json: list[dict[str, Any]] = []
             for pin in symbol.pins:
                 pins_json.append(
@@ -86,7 +365,9 @@ class Schema:
                     }
                 }
             )
+        return library_json
 
+    def _nets_json(self) -> list[dict[str, Any]]:
         nets_json: list[dict[str, Any]] = []
         for net in self.nets:
             pins_json: list[dict[str, Any]] = []
@@ -105,228 +386,152 @@ class Schema:
                     "pins": pins_json,
                 }
             )
+        return nets_json
 
+    def _wires_json(self) -> list[dict[str, Any]]:
         wires_json: list[dict[str, Any]] = []
         for wire in self.wires.values():
-            net_name = None
-            for net in self.nets:
-                if wire in net.wires:
-                    net_name = net.name
-                    break
+            net = self.net_of(wire)
             wires_json.append(
                 {
-                    "net": net_name_to_id.get(net_name, "") if net_name else "",
-                    "points": [{"x": p.x, "y": p.y} for p in wire.points],
+                    "net": net.uuid if net else "",
+                    "points": [
+                        {"x": x, "y": y} for x, y in point_coordinates(wire.points)
+                    ],
                     "uuid": wire.uuid,
                 }
             )
+        return wires_json
 
-        return {
-            "buses": buses_json,
-            "instances": instances_json,
-            "library": library_json,
-            "nets": nets_json,
-            "wires": wires_json,
-        }
-
-    @cached_property
+    @property
     def nets(self) -> list["Net"]:
         """
         Returns a list of Net objects based on connected components in the schematic.
 
         A net is formed by electrically connected elements (wires, buses, bus entries).
-        Junctions are not used for connectivity detection because in KiCad, when a junction
-        is placed on a wire, the wire is split into segments with the junction position as
-        an endpoint. Therefore, connectivity can be determined purely from wire/bus points.
-        If a net contains a label, it is named after that label.
+        Elements connect where they share a point, where the end or vertex of one
+        lies on a segment of a wire or bus, and through junctions, which connect
+        every element passing through them.
+        Pins and labels attach to the net of the element point or segment they sit on.
+        If a net contains labels, it is named after them (see `net_name`).
         Otherwise, it is named as 'net_{n}' where n is the sequence number.
-        """
-        from cifconv.bus import Bus
-        from cifconv.bus_entry import BusEntry
-        from cifconv.wire import Wire
+        Net uuids are derived from the uuids of their elements (see `net_id`),
+        so unchanged inputs produce identical nets.
 
-        coord_to_elements: dict[Point, list[tuple[str, str]]] = {}
-
-        for wire in self.wires.values():
-            for point in wire.points:
-                if point not in coord_to_elements:
-                    coord_to_elements[point] = []
-                coord_to_elements[point].append(("wire", wire.uuid))
-
-        for bus in self.buses.values():
-            for point in bus.points:
-                if point not in coord_to_elements:
-                    coord_to_elements[point] = []
-                coord_to_elements[point].append(("bus", bus.uuid))
-
-        for bus_entry in self.bus_entries.values():
-            start_point = bus_entry.start_point
-            end_point = bus_entry.end_point
-
-            if start_point not in coord_to_elements:
-                coord_to_elements[start_point] = []
-            coord_to_elements[start_point].append(("bus_entry", bus_entry.uuid))
-
-            if end_point not in coord_to_elements:
-                coord_to_elements[end_point] = []
-            coord_to_elements[end_point].append(("bus_entry", bus_entry.uuid))
-
-        element_to_group: dict[tuple[str, str], tuple[str, str]] = {}
-
-        def find(element: tuple[str, str]) -> tuple[str, str]:
-            """
-            Find the root representative of the connected component that contains the given element.
-
-            This helper implements the 'find' operation of a Union-Find (Disjoint-Set Union) data
-            structure. It returns the canonical tuple that represents the entire connected group
-            to which the supplied element belongs. Path compression is applied so that future
-            queries for the same element (and its ancestors) are faster.
-
-            Parameters
-            ----------
-            element : tuple[str, str]
-                A 2-tuple consisting of (element_type, element_uuid) that uniquely identifies
-                a schematic element (wire, bus, or bus entry).
-
-            Returns
-            -------
-            tuple[str, str]
-                The root tuple of the connected component. All elements sharing the same root
-                are electrically connected.
-            """
-            if element not in element_to_group:
-                element_to_group[element] = element
-                return element
-            if element_to_group[element] != element:
-                element_to_group[element] = find(element_to_group[element])
-            return element_to_group[element]
-
-        def union(elem1: tuple[str, str], elem2: tuple[str, str]) -> None:
-            root1 = find(elem1)
-            root2 = find(elem2)
-            if root1 != root2:
-                element_to_group[root1] = root2
-
-        for elements in coord_to_elements.values():
-            for element in elements:
-                find(element)
-
-        for elements in coord_to_elements.values():
-            if len(elements) > 1:
-                first_element = elements[0]
-                for other_element in elements[1:]:
-                    union(first_element, other_element)
-
-        groups: dict[tuple[str, str], list[tuple[str, str]]] = {}
-        for element in element_to_group.keys():
-            root = find(element)
-            if root not in groups:
-                groups[root] = []
-            groups[root].append(element)
-
-        coord_to_label: dict[Point, str] = {}
-        for label in self.labels:
-            coord_to_label[Point(label.x, label.y)] = label.text
-
-        group_labels: dict[tuple[str, str], str] = {}
-        for group_root, elements in groups.items():
-            labels_for_group: set[str] = set()
-            for elem_type, elem_uuid in elements:
-                if elem_type == "wire":
-                    wire = self.wires[elem_uuid]
-                    for point in wire.points:
-                        if point in coord_to_label:
-                            labels_for_group.add(coord_to_label[point])
-                elif elem_type == "bus":
-                    bus = self.buses[elem_uuid]
-                    for point in bus.points:
-                        if point in coord_to_label:
-                            labels_for_group.add(coord_to_label[point])
-                elif elem_type == "bus_entry":
-                    bus_entry = self.bus_entries[elem_uuid]
-                    start_point = bus_entry.start_point
-                    end_point = bus_entry.end_point
-                    if start_point in coord_to_label:
-                        labels_for_group.add(coord_to_label[start_point])
-                    if end_point in coord_to_label:
-                        labels_for_group.add(coord_to_label[end_point])
-
-            if labels_for_group:
-                group_labels[group_root] = next(iter(labels_for_group))
-
-        net_point_to_group: dict[Point, tuple[str, str]] = {}
-        for group_root, elements in groups.items():
-            for elem_type, elem_uuid in elements:
-                if elem_type == "wire":
-                    wire = self.wires[elem_uuid]
-                    for point in wire.points:
-                        net_point_to_group[point] = group_root
-                elif elem_type == "bus":
-                    bus = self.buses[elem_uuid]
-                    for point in bus.points:
-                        net_point_to_group[point] = group_root
-                elif elem_type == "bus_entry":
-                    bus_entry = self.bus_entries[elem_uuid]
-                    net_point_to_group[bus_entry.start_point] = group_root
-                    net_point_to_group[bus_entry.end_point] = group_root
-
-        no_connect_positions: set[Point] = set()
-        for no_connect in self.no_connects:
-            no_connect_positions.add(Point(no_connect.x, no_connect.y))
-
-        pin_pos_to_instance: dict[Point, tuple[SymbolInstance, PinInstance]] = {}
-        for instance in self.instances:
-            if instance.pin_instances:
-                for pin in instance.pin_instances:
-                    pin_pos = Point(pin.x, pin.y)
-                    if pin_pos in no_connect_positions:
-                        logger.debug(f"Pin {pin} at {pin_pos} is no connect position")
-                        continue
-                    pin_pos_to_instance[pin_pos] = (instance, pin)
-
-        net_objects: list[Net] = []
-        net_counter: int = 0
-
-        for group_root in sorted(groups.keys()):
-            if group_root in group_labels:
-                net_name = group_labels[group_root]
-            else:
-                net_name = f"net_{net_counter}"
-                net_counter += 1
-
-            wires_for_net: list[Wire] = []
-            buses_for_net: list[Bus] = []
-            bus_entries_for_net: list[BusEntry] = []
-
-            for elem_type, elem_uuid in groups[group_root]:
-                if elem_type == "wire":
-                    wires_for_net.append(self.wires[elem_uuid])
-                elif elem_type == "bus":
-                    buses_for_net.append(self.buses[elem_uuid])
-                elif elem_type == "bus_entry":
-                    bus_entries_for_net.append(self.bus_entries[elem_uuid])
-
-            points_for_net: list[Point] = []
-            for point, grp in net_point_to_group.items():
-                if grp == group_root:
-                    points_for_net.append(point)
-
-            connected_pins_for_net: list[tuple[SymbolInstance, PinInstance]] = []
-            for point, grp in net_point_to_group.items():
-                if grp == group_root and point in pin_pos_to_instance:
-                    connected_pins_for_net.append(pin_pos_to_instance[point])
-
-            net_obj = Net(
-                uuid=str(uuid.uuid4()),
-                name=net_name,
-                wires=wires_for_net,
-                buses=buses_for_net,
-                bus_entries=bus_entries_for_net,
-                points=points_for_net,
-                connected_pins=connected_pins_for_net
-                if connected_pins_for_net
-                else None,
-            )
-            net_objects.append(net_obj)
+        The connectivity is computed on first access (see `Connectivity`) and kept
+        up to date by the `add_*`/`remove_*` methods, which only recompute the
+        nets they affect. After modifying the element containers directly, call
+        `invalidate_nets` to have everything recomputed on the next access.
+        """
+        if self._connectivity is None:
+            self._connectivity = Connectivity(self)
+        return self._connectivity.nets()
 
-        return net_objects
+    def invalidate_nets(self) -> None:
+        """
+        Drop the computed connectivity and attribute index, e.g. after editing
+        the containers directly.
+        """
+        self._connectivity = None
+        self._attribute_index = None
+
+    def add_wire(self, wire: Wire) -> None:
+        """Add a wire, replacing the wire with the same uuid, and update the nets."""
+        if wire.uuid in self.wires:
+            self.remove_wire(self.wires[wire.uuid])
+        self.wires[wire.uuid] = wire
+        if self._connectivity is not None:
+            self._connectivity.add_element(wire)
+
+    def remove_wire(self, wire: Wire) -> None:
+        """Remove the wire with the uuid of `wire` and update the nets."""
+        removed = self.wires.pop(wire.uuid)
+        if self._connectivity is not None:
+            self._connectivity.remove_element(removed)
+
+    def add_bus(self, bus: Bus) -> None:
+        """Add a bus, replacing the bus with the same uuid, and update the nets."""
+        if bus.uuid in self.buses:
+            self.remove_bus(self.buses[bus.uuid])
+        self.buses[bus.uuid] = bus
+        if self._connectivity is not None:
+            self._connectivity.add_element(bus)
+
+    def remove_bus(self, bus: Bus) -> None:
+        """Remove the bus with the uuid of `bus` and update the nets."""
+        removed = self.buses.pop(bus.uuid)
+        if self._connectivity is not None:
+            self._connectivity.remove_element(removed)
+
+    def add_bus_entry(self, bus_entry: BusEntry) -> None:
+        """Add a bus entry, replacing the one with the same uuid, and update the nets."""
+        if bus_entry.uuid in self.bus_entries:
+            self.remove_bus_entry(self.bus_entries[bus_entry.uuid])
+        self.bus_entries[bus_entry.uuid] = bus_entry
+        if self._connectivity is not None:
+            self._connectivity.add_element(bus_entry)
+
+    def remove_bus_entry(self, bus_entry: BusEntry) -> None:
+        """Remove the bus entry with the uuid of `bus_entry` and update the nets."""
+        removed = self.bus_entries.pop(bus_entry.uuid)
+        if self._connectivity is not None:
+            self._connectivity.remove_element(removed)
+
+    def add_label(self, label: Label) -> None:
+        """Add a label and update the name of the net it sits on."""
+        self.labels.append(label)
+        if self._connectivity is not None:
+            self._connectivity.add_label(label)
+
+    def remove_label(self, label: Label) -> None:
+        """Remove a label, compared by identity, and update its net."""
+        _remove_identical(self.labels, label)
+        if self._connectivity is not None:
+            self._connectivity.remove_attachments(label)
+
+    def add_instance(self, instance: SymbolInstance) -> None:
+        """Add a symbol instance and connect its pins."""
+        self.instances.append(instance)
+        self._attribute_index = None
+        if self._connectivity is not None:
+            self._connectivity.add_instance(instance)
+
+    def remove_instance(self, instance: SymbolInstance) -> None:
+        """Remove a symbol instance, compared by identity, and disconnect its pins."""
+        _remove_identical(self.instances, instance)
+        self._attribute_index = None
+        if self._connectivity is not None:
+            self._connectivity.remove_attachments(instance)
+
+    def add_junction(self, junction: Junction) -> None:
+        """Add a junction, merging the nets passing through it."""
+        self.junctions.append(junction)
+        if self._connectivity is not None:
+            self._connectivity.add_junction(junction)
+
+    def remove_junction(self, junction: Junction) -> None:
+        """Remove a junction, compared by identity, and re-split its net."""
+        _remove_identical(self.junctions, junction)
+        if self._connectivity is not None:
+            self._connectivity.remove_attachments(junction)
+
+    def add_no_connect(self, no_connect: NoConnect) -> None:
+        """Add a no-connect, disconnecting the pins at its position."""
+        self.no_connects.append(no_connect)
+        if self._connectivity is not None:
+            self._connectivity.add_no_connect(no_connect)
+
+    def remove_no_connect(self, no_connect: NoConnect) -> None:
+        """Remove a no-connect, reconnecting the pins at its position."""
+        _remove_identical(self.no_connects, no_connect)
+        if self._connectivity is not None:
+            self._connectivity.remove_no_connect(no_connect)
+
+
+def _remove_identical(items: list[Any], item: Any) -> None:
+    """Remove `item` itself, not just an equal item, from `items`."""
+    for position, stored in enumerate(items):
+        if stored is item:
+            del items[position]
+            return
+    raise ValueError(f"{item} is not in the schema")
@@ -0,0 +1,183 @@
+import math
+from typing import Any
+
+from cifconv.coord import KICAD_RESOLUTION
+
+# default length of a grid cell along a line or edge of a 2D cell, in mm
+DEFAULT_CELL_SIZE = 12.7
+
+
+class SegmentIndex:
+    """
+    Uniform grid index over line segments for point-on-segment queries.
+
+    Schematic wires are nearly always horizontal or vertical, so those are
+    bucketed by the line they lie on (its coordinate quantized to `resolution`)
+    and by the cells of `cell_size` they span along that line. A query then only
+    looks at the segments on the point's own line near the point. Diagonal
+    segments go into a 2D grid over their bounding box instead.
+    """
+
+    def __init__(
+        self,
+        cell_size: float = DEFAULT_CELL_SIZE,
+        resolution: float = KICAD_RESOLUTION,
+        tolerance: float = 0,
+    ):
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+        self.cell_size = cell_size
+        self.resolution = resolution
+        # points within this distance of a segment are on it
+        self.tolerance = max(tolerance, resolution / 2)
+        # line keys to look at on each side of a point's own line
+        self._line_radius = math.ceil(tolerance / resolution - 1e-9) if tolerance else 0
+        self._count = 0
+        # (y line, x cell) -> (x min, x max, owner) of horizontal segments
+        self._horizontal: dict[tuple[int, int], list[tuple[float, float, int]]] = {}
+        # (x line, y cell) -> (y min, y max, owner) of vertical segments
+        self._vertical: dict[tuple[int, int], list[tuple[float, float, int]]] = {}
+        # (x cell, y cell) -> (x1, y1, x2, y2, owner) of other segments
+        self._cells: dict[
+            tuple[int, int], list[tuple[float, float, float, float, int]]
+        ] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, owner: int, x1: float, y1: float, x2: float, y2: float) -> None:
+        """Add the segment (x1, y1)-(x2, y2), reported as `owner` by queries."""
+        self._count += 1
+        resolution = self.resolution
+        line_y1 = round(y1 / resolution)
+        if line_y1 == round(y2 / resolution):
+            span = (min(x1, x2), max(x1, x2), owner)
+            for cell in self._cell_range(span[0], span[1]):
+                _append(self._horizontal, (line_y1, cell), span)
+            return
+        line_x1 = round(x1 / resolution)
+        if line_x1 == round(x2 / resolution):
+            span = (min(y1, y2), max(y1, y2), owner)
+            for cell in self._cell_range(span[0], span[1]):
+                _append(self._vertical, (line_x1, cell), span)
+            return
+        segment = (x1, y1, x2, y2, owner)
+        for cell_x in self._cell_range(min(x1, x2), max(x1, x2)):
+            for cell_y in self._cell_range(min(y1, y2), max(y1, y2)):
+                _append(self._cells, (cell_x, cell_y), segment)
+
+    def remove(self, owner: int, x1: float, y1: float, x2: float, y2: float) -> None:
+        """Remove the segment (x1, y1)-(x2, y2) added for `owner`."""
+        resolution = self.resolution
+        line_y1 = round(y1 / resolution)
+        line_x1 = round(x1 / resolution)
+        if line_y1 == round(y2 / resolution):
+            buckets: dict[tuple[int, int], list[Any]] = self._horizontal
+            item: tuple = (min(x1, x2), max(x1, x2), owner)
+            keys = [(line_y1, cell) for cell in self._cell_range(item[0], item[1])]
+        elif line_x1 == round(x2 / resolution):
+            buckets = self._vertical
+            item = (min(y1, y2), max(y1, y2), owner)
+            keys = [(line_x1, cell) for cell in self._cell_range(item[0], item[1])]
+        else:
+            buckets = self._cells
+            item = (x1, y1, x2, y2, owner)
+            keys = [
+                (cell_x, cell_y)
+                for cell_x in self._cell_range(min(x1, x2), max(x1, x2))
+                for cell_y in self._cell_range(min(y1, y2), max(y1, y2))
+            ]
+        removed = False
+        for key in keys:
+            bucket = buckets.get(key)
+            if bucket is None or item not in bucket:
+                continue
+            bucket.remove(item)
+            removed = True
+            if not bucket:
+                del buckets[key]
+        if removed:
+            self._count -= 1
+
+    def query_point(
+        self, x: float, y: float, *, interior_only: bool = False
+    ) -> list[int]:
+        """
+        Return the owners of all segments passing through (x, y), within tolerance.
+
+        With `interior_only`, segments that merely end at the point are skipped.
+        """
+        owners: list[int] = []
+        tolerance = self.tolerance
+        resolution = self.resolution
+        cell_size = self.cell_size
+        line_x = round(x / resolution)
+        line_y = round(y / resolution)
+        cell_x = math.floor(x / cell_size)
+        cell_y = math.floor(y / cell_size)
+        for line_offset in range(-self._line_radius, self._line_radius + 1):
+            for lines, key, value in (
+                (self._horizontal, (line_y + line_offset, cell_x), x),
+                (self._vertical, (line_x + line_offset, cell_y), y),
+            ):
+                spans = lines.get(key)
+                if spans is None:
+                    continue
+                for low, high, owner in spans:
+                    if not low - tolerance <= value <= high + tolerance:
+                        continue
+                    if interior_only and (
+                        value - low <= tolerance or high - value <= tolerance
+                    ):
+                        continue
+                    if owner not in owners:
+                        owners.append(owner)
+
+        segments = self._cells.get((cell_x, cell_y))
+        if segments is None:
+            return owners
+        for x1, y1, x2, y2, owner in segments:
+            if not _point_on_segment(x, y, x1, y1, x2, y2, tolerance):
+                continue
+            if interior_only and (
+                math.hypot(x - x1, y - y1) <= tolerance
+                or math.hypot(x - x2, y - y2) <= tolerance
+            ):
+                continue
+            if owner not in owners:
+                owners.append(owner)
+        return owners
+
+    def _cell_range(self, low: float, high: float) -> range:
+        """Cells spanned by the interval [low, high], grown by the tolerance."""
+        cell_size = self.cell_size
+        return range(
+            math.floor((low - self.tolerance) / cell_size),
+            math.floor((high + self.tolerance) / cell_size) + 1,
+        )
+
+
+def _append(cells: dict[tuple[int, int], list[Any]], key: tuple[int, int], item: Any):
+    cell = cells.get(key)
+    if cell is None:
+        cells[key] = [item]
+    else:
+        cell.append(item)
+
+
+def _point_on_segment(
+    x: float, y: float, x1: float, y1: float, x2: float, y2: float, tolerance: float
+) -> bool:
+    """Return True if (x, y) is within `tolerance` of the segment (x1, y1)-(x2, y2)."""
+    if not (
+        min(x1, x2) - tolerance <= x <= max(x1, x2) + tolerance
+        and min(y1, y2) - tolerance <= y <= max(y1, y2) + tolerance
+    ):
+        return False
+    dx = x2 - x1
+    dy = y2 - y1
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return math.hypot(x - x1, y - y1) <= tolerance
+    t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / length_squared))
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy)) <= tolerance
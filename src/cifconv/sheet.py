@@ -0,0 +1,42 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class SheetPin:
+    """A pin on a hierarchical sheet symbol, connected to the hierarchical label of the same name inside the sheet."""
+
+    name: str
+    type: str
+    x: float
+    y: float
+    uuid: str
+
+
+@dataclass
+class Sheet:
+    """Represents a hierarchical sheet symbol placed in a KiCad schematic."""
+
+    uuid: str
+    name: str
+    # path of the schematic file of the sheet, relative to the file containing
+    # the sheet symbol
+    file: str
+    x: float
+    y: float
+    width: float = 0
+    height: float = 0
+    pins: list[SheetPin] = field(default_factory=list)
+
+
+@dataclass
+class SheetInstance:
+    """One placement of a sheet file in a project loaded by `load_project`."""
+
+    # KiCad instance path of the sheet, the uuids of the root schematic and
+    # every sheet symbol down to this sheet, e.g. "/<root uuid>/<sheet uuid>"
+    path: str
+    # human readable path of sheet names, e.g. "/" for the root sheet and
+    # "/Channel 1/Filter/" below it
+    name_path: str
+    # path of the schematic file of the sheet
+    file: str
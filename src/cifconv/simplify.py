@@ -0,0 +1,330 @@
+"""
+Normalization of the wires of a Schema before computing its nets.
+
+Imported and machine generated schematics often contain duplicate wires and
+chains of collinear wires split at every grid step. `simplify_wires` merges
+them into as few wires as possible without changing the connectivity.
+"""
+
+import itertools
+import uuid
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable
+
+from cifconv.bus import Bus
+from cifconv.bus_entry import BusEntry
+from cifconv.coord import CoordGrid
+from cifconv.point import Point
+from cifconv.segment_index import SegmentIndex
+from cifconv.wire import Wire
+
+if TYPE_CHECKING:
+    from cifconv.schema import Schema
+
+# namespace of the uuids of merged wires that cannot keep an original uuid
+MERGED_WIRE_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, "merged-wire.cifconv")
+
+
+@dataclass
+class WireSimplification:
+    """Statistics of a `simplify_wires` run."""
+
+    wires_before: int
+    wires_after: int
+
+    @property
+    def removed(self) -> int:
+        return self.wires_before - self.wires_after
+
+
+@dataclass
+class _SheetElements:
+    """The elements of one sheet instance that wires can connect to."""
+
+    wires: list[Wire] = field(default_factory=list)
+    buses: list[Bus] = field(default_factory=list)
+    bus_entries: list[BusEntry] = field(default_factory=list)
+    # positions of the pins and labels, which attach to only one of the wires
+    # crossing where they are (see `Connectivity._element_at`)
+    pins_and_labels: list[tuple[float, float]] = field(default_factory=list)
+    # positions of the junctions and no-connects
+    junctions: list[tuple[float, float]] = field(default_factory=list)
+    no_connects: list[tuple[float, float]] = field(default_factory=list)
+
+
+@dataclass
+class _Segment:
+    """A horizontal or vertical 2-point wire, as a grid interval along its line."""
+
+    wire: Wire
+    low: int
+    high: int
+
+
+def simplify_wires(schema: "Schema") -> WireSimplification:
+    """
+    Merge the overlapping and collinear wires of a schema and drop duplicates.
+
+    Every sheet instance is simplified on its own. Horizontal and vertical
+    2-point wires are grouped by the grid line they lie on and sorted along
+    it; overlapping or touching wires are merged into runs in one sweep. A run is only split again at the original wire ends where
+    something else connects: a pin, label, junction or no-connect, or any wire,
+    bus or bus entry not on the same line. Diagonal 2-point wires with the same
+    ends as another are dropped. Other wires are kept as they are, and so are
+    the runs through a pin or label on a crossing of wires without a junction,
+    which attaches to the wire with the lowest uuid there (see
+    `Connectivity._element_at`) and could change nets if merging renamed it.
+
+    Each merged wire keeps the uuid of the lowest uuid wire it covers that is
+    not used by another merged wire, or else gets a uuid derived from it, so
+    repeated runs give the same result. The nets of the schema are invalidated.
+    """
+    wires_before = len(schema.wires)
+    sheets: dict[int, _SheetElements] = {}
+
+    def sheet_of(number: int) -> _SheetElements:
+        sheet = sheets.get(number)
+        if sheet is None:
+            sheet = sheets[number] = _SheetElements()
+        return sheet
+
+    for wire in schema.wires.values():
+        sheet_of(wire.sheet).wires.append(wire)
+    for bus in schema.buses.values():
+        sheet_of(bus.sheet).buses.append(bus)
+    for bus_entry in schema.bus_entries.values():
+        sheet_of(bus_entry.sheet).bus_entries.append(bus_entry)
+    for instance in schema.instances:
+        pins_and_labels = sheet_of(instance.sheet).pins_and_labels
+        for pin in instance.pin_instances or ():
+            pins_and_labels.append((pin.x, pin.y))
+    for label in schema.labels:
+        sheet_of(label.sheet).pins_and_labels.append((label.x, label.y))
+    for junction in schema.junctions:
+        sheet_of(junction.sheet).junctions.append((junction.x, junction.y))
+    for no_connect in schema.no_connects:
+        sheet_of(no_connect.sheet).no_connects.append((no_connect.x, no_connect.y))
+
+    # uuids of the dropped duplicate diagonals
+    duplicates: set[str] = set()
+    # uuid of a wire covered by merged wires -> the wires replacing it
+    replacements: dict[str, list[Wire]] = {}
+    for sheet in sheets.values():
+        _simplify_sheet(schema.grid, sheet, duplicates, replacements)
+
+    wires: dict[str, Wire] = {}
+    for wire_uuid, wire in schema.wires.items():
+        if wire_uuid in duplicates:
+            continue
+        for replacement in replacements.get(wire_uuid, (wire,)):
+            wires[replacement.uuid] = replacement
+    schema.wires = wires
+    schema.invalidate_nets()
+    return WireSimplification(wires_before=wires_before, wires_after=len(wires))
+
+
+def _simplify_sheet(
+    grid: CoordGrid,
+    sheet: _SheetElements,
+    duplicates: set[str],
+    replacements: dict[str, list[Wire]],
+) -> None:
+    """Collect the duplicate diagonals and the merged wires of one sheet instance."""
+    resolution = grid.resolution
+
+    # (axis, fixed coordinate) -> the segments on that line; axis 0 is
+    # horizontal with y fixed, axis 1 vertical with x fixed
+    lines: dict[tuple[int, int], list[_Segment]] = {}
+    # (end key, end key) -> the diagonal wire with those ends
+    diagonals: dict[tuple[int, int], Wire] = {}
+    # fixed coordinate of each line and every grid position along it, in the
+    # original floats, so unmerged ends are reproduced exactly
+    positions: dict[tuple[int, int], dict[int, float]] = {}
+    line_coordinates: dict[tuple[int, int], float] = {}
+    segment_index = SegmentIndex(resolution=resolution, tolerance=grid.tolerance)
+    # owners in the segment index: a line id for the segments of each line,
+    # negative ids for the other elements
+    line_ids: dict[tuple[int, int], int] = {}
+    other_owners = itertools.count(-1, -1)
+
+    for wire in sheet.wires:
+        if len(wire.points) != 2:
+            owner = next(other_owners)
+            for start, end in zip(wire.points, wire.points[1:]):
+                segment_index.add(owner, start.x, start.y, end.x, end.y)
+            continue
+        start, end = wire.points
+        ix1, iy1 = round(start.x / resolution), round(start.y / resolution)
+        ix2, iy2 = round(end.x / resolution), round(end.y / resolution)
+        if (ix1, iy1) == (ix2, iy2):
+            segment_index.add(next(other_owners), start.x, start.y, end.x, end.y)
+            continue
+        if iy1 == iy2:
+            line = (0, iy1)
+            low, high = sorted(((ix1, start.x), (ix2, end.x)))
+            fixed = start.y
+        elif ix1 == ix2:
+            line = (1, ix1)
+            low, high = sorted(((iy1, start.y), (iy2, end.y)))
+            fixed = start.x
+        else:
+            key1, key2 = grid.key(start.x, start.y), grid.key(end.x, end.y)
+            ends = (min(key1, key2), max(key1, key2))
+            kept = diagonals.setdefault(ends, wire)
+            if kept is not wire:
+                if wire.uuid < kept.uuid:
+                    diagonals[ends] = wire
+                    wire, kept = kept, wire
+                duplicates.add(wire.uuid)
+                continue
+            segment_index.add(next(other_owners), start.x, start.y, end.x, end.y)
+            continue
+        line_id = line_ids.setdefault(line, len(line_ids))
+        segment_index.add(line_id, start.x, start.y, end.x, end.y)
+        lines.setdefault(line, []).append(_Segment(wire, low[0], high[0]))
+        line_positions = positions.setdefault(line, {})
+        line_positions.setdefault(low[0], low[1])
+        line_positions.setdefault(high[0], high[1])
+        line_coordinates.setdefault(line, fixed)
+
+    for bus in sheet.buses:
+        owner = next(other_owners)
+        for start, end in zip(bus.points, bus.points[1:]):
+            segment_index.add(owner, start.x, start.y, end.x, end.y)
+    for bus_entry in sheet.bus_entries:
+        owner = next(other_owners)
+        for point in (bus_entry.start_point, bus_entry.end_point):
+            segment_index.add(owner, point.x, point.y, point.x, point.y)
+
+    attached_keys = {
+        grid.key(x, y)
+        for x, y in (*sheet.pins_and_labels, *sheet.junctions, *sheet.no_connects)
+    }
+    # grid keys of every wire vertex and every bus and bus entry point
+    point_keys = {
+        grid.key(point.x, point.y)
+        for element in (*sheet.wires, *sheet.buses)
+        for point in element.points
+    }
+    for bus_entry in sheet.bus_entries:
+        for point in (bus_entry.start_point, bus_entry.end_point):
+            point_keys.add(grid.key(point.x, point.y))
+    junction_keys = {grid.key(x, y) for x, y in sheet.junctions}
+    # line -> the positions along it where a pin or label sits on a crossing
+    crossings: dict[tuple[int, int], list[int]] = {}
+    lines_by_id = list(line_ids)
+    for x, y in sheet.pins_and_labels:
+        key = grid.key(x, y)
+        if (
+            grid.snap(key, point_keys) in point_keys
+            or grid.snap(key, junction_keys) in junction_keys
+        ):
+            # attached to what ends there, or connecting everything
+            continue
+        owners = set(segment_index.query_point(x, y))
+        if len(owners) < 2:
+            continue
+        for owner in owners:
+            if owner >= 0:
+                line = lines_by_id[owner]
+                position = x if line[0] == 0 else y
+                crossings.setdefault(line, []).append(round(position / resolution))
+
+    def is_attached(line: tuple[int, int], position: int) -> bool:
+        """Return True if anything but the wires of `line` connects at `position`."""
+        if line[0] == 0:
+            x, y = positions[line][position], line_coordinates[line]
+        else:
+            x, y = line_coordinates[line], positions[line][position]
+        if grid.snap(grid.key(x, y), attached_keys) in attached_keys:
+            return True
+        line_id = line_ids[line]
+        return any(owner != line_id for owner in segment_index.query_point(x, y))
+
+    def merge_run(line: tuple[int, int], run: list[_Segment], high: int) -> None:
+        low = run[0].low
+        if any(low < position < high for position in crossings.get(line, ())):
+            return
+        _merge_run(
+            line,
+            run,
+            is_attached,
+            positions[line],
+            line_coordinates[line],
+            replacements,
+        )
+
+    for line, segments in lines.items():
+        segments.sort(key=lambda segment: (segment.low, segment.high))
+        run: list[_Segment] = []
+        run_high = 0
+        for segment in segments:
+            if run and segment.low > run_high:
+                merge_run(line, run, run_high)
+                run = []
+            if not run or segment.high > run_high:
+                run_high = segment.high
+            run.append(segment)
+        merge_run(line, run, run_high)
+
+
+def _merge_run(
+    line: tuple[int, int],
+    run: list[_Segment],
+    is_attached: Callable[[tuple[int, int], int], bool],
+    line_positions: dict[int, float],
+    fixed: float,
+    replacements: dict[str, list[Wire]],
+) -> None:
+    """Replace the overlapping or touching segments of a run by merged wires."""
+    low = run[0].low
+    high = max(segment.high for segment in run)
+    breaks = sorted(
+        {
+            position
+            for segment in run
+            for position in (segment.low, segment.high)
+            if low < position < high and is_attached(line, position)
+        }
+    )
+    bounds = [low, *breaks, high]
+    by_uuid = sorted(run, key=lambda segment: segment.wire.uuid)
+    used: set[str] = set()
+    for piece_low, piece_high in zip(bounds, bounds[1:]):
+        covering = [
+            segment
+            for segment in by_uuid
+            if segment.low < piece_high and segment.high > piece_low
+        ]
+        source = next(
+            (segment for segment in covering if segment.wire.uuid not in used),
+            None,
+        )
+        if source is not None and (source.low, source.high) == (
+            piece_low,
+            piece_high,
+        ):
+            # a wire that is not merged with anything is kept as it is
+            wire = source.wire
+        else:
+            if source is None:
+                piece_uuid = str(
+                    uuid.uuid5(
+                        MERGED_WIRE_NAMESPACE,
+                        f"{covering[0].wire.uuid}:{piece_low}:{piece_high}",
+                    )
+                )
+                source = covering[0]
+            else:
+                piece_uuid = source.wire.uuid
+            start = line_positions[piece_low]
+            end = line_positions[piece_high]
+            if line[0] == 0:
+                points = [Point(start, fixed), Point(end, fixed)]
+            else:
+                points = [Point(fixed, start), Point(fixed, end)]
+            wire = Wire(uuid=piece_uuid, points=points, sheet=source.wire.sheet)
+        used.add(wire.uuid)
+        replacements.setdefault(source.wire.uuid, []).append(wire)
+    for segment in run:
+        replacements.setdefault(segment.wire.uuid, [])
@@ -0,0 +1,278 @@
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal, Sequence
+
+from cifconv.geometry_store import point_coordinates
+from cifconv.net import Net
+from cifconv.point import Point
+from cifconv.segment_index import DEFAULT_CELL_SIZE, _point_on_segment
+
+if TYPE_CHECKING:
+    from cifconv.schema import Schema
+    from cifconv.symbol_instance import SymbolInstance
+
+HitKind = Literal[
+    "wire", "bus", "bus_entry", "label", "pin", "junction", "no_connect", "instance"
+]
+
+
+@dataclass
+class SpatialHit:
+    """An element found by a `SpatialIndex` query."""
+
+    kind: HitKind
+    # the Wire, Bus, BusEntry, Label, PinInstance, Junction, NoConnect or
+    # SymbolInstance found
+    element: Any
+    # the net of the element, None for no-connects, instance anchors and
+    # elements on no net
+    net: Net | None
+    # the instance of a pin
+    instance: "SymbolInstance | None" = None
+    # number of the sheet instance the element is on, see `Label.sheet`
+    sheet: int = 0
+
+
+class SpatialIndex:
+    """
+    Uniform grid index over every placed element of a Schema for "what is here" queries.
+
+    Built in bulk from a schema: wire, bus and bus entry segments, labels,
+    pins, junctions, no-connects and instance anchor points. Every element is
+    bucketed into the 2D cells of `cell_size` its bounding box covers, together
+    with its net, so a query only looks at the elements in the cells it covers.
+    The sheet instances of a project share their coordinates, so queries take
+    the sheet to look at (see `Label.sheet`). The index is a snapshot;
+    `Schema.spatial_index` rebuilds it when the nets change.
+    """
+
+    def __init__(self, schema: "Schema", cell_size: float = DEFAULT_CELL_SIZE):
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+        self.cell_size = cell_size
+        self.resolution = schema.grid.resolution
+        self.hits: list[SpatialHit] = []
+        # segments of each hit, a zero-length segment for points
+        self._segments: list[list[tuple[float, float, float, float]]] = []
+        # (x cell, y cell) -> indexes of the hits in that cell
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        # bounds of the populated cells, inclusive, while there are any
+        self._min_cell_x = self._min_cell_y = 0
+        self._max_cell_x = self._max_cell_y = -1
+
+        net_index = schema.net_index
+        for wire in schema.wires.values():
+            self._add_polyline(
+                SpatialHit("wire", wire, schema.net_of(wire), sheet=wire.sheet),
+                wire.points,
+            )
+        for bus in schema.buses.values():
+            self._add_polyline(
+                SpatialHit("bus", bus, schema.net_of(bus), sheet=bus.sheet),
+                bus.points,
+            )
+        for bus_entry in schema.bus_entries.values():
+            self._add_polyline(
+                SpatialHit(
+                    "bus_entry",
+                    bus_entry,
+                    schema.net_of(bus_entry),
+                    sheet=bus_entry.sheet,
+                ),
+                [bus_entry.start_point, bus_entry.end_point],
+            )
+        for label in schema.labels:
+            self._add_point(
+                SpatialHit("label", label, schema.net_of(label), sheet=label.sheet),
+                label.x,
+                label.y,
+            )
+        for junction in schema.junctions:
+            self._add_point(
+                SpatialHit(
+                    "junction", junction, schema.net_of(junction), sheet=junction.sheet
+                ),
+                junction.x,
+                junction.y,
+            )
+        for no_connect in schema.no_connects:
+            self._add_point(
+                SpatialHit("no_connect", no_connect, None, sheet=no_connect.sheet),
+                no_connect.x,
+                no_connect.y,
+            )
+        for instance in schema.instances:
+            self._add_point(
+                SpatialHit("instance", instance, None, sheet=instance.sheet),
+                instance.x,
+                instance.y,
+            )
+            for pin in instance.pin_instances or ():
+                net = net_index.net_of_pin_instance(pin)
+                self._add_point(
+                    SpatialHit("pin", pin, net, instance, sheet=instance.sheet),
+                    pin.x,
+                    pin.y,
+                )
+
+    def __len__(self) -> int:
+        return len(self.hits)
+
+    def query_point(
+        self, x: float, y: float, radius: float = 0, *, sheet: int | None = None
+    ) -> list[SpatialHit]:
+        """
+        Return the elements within `radius` of (x, y), at least within half the
+        grid resolution, in the order they were added.
+
+        Only the elements on sheet instance `sheet` are returned, or those on
+        every sheet instance if it is None.
+        """
+        tolerance = max(radius, self.resolution / 2)
+        found: list[int] = []
+        for index in self._candidates(
+            x - tolerance, y - tolerance, x + tolerance, y + tolerance
+        ):
+            if sheet is not None and self.hits[index].sheet != sheet:
+                continue
+            for x1, y1, x2, y2 in self._segments[index]:
+                if _point_on_segment(x, y, x1, y1, x2, y2, tolerance):
+                    found.append(index)
+                    break
+        return [self.hits[index] for index in sorted(found)]
+
+    def query_rect(
+        self,
+        x1: float,
+        y1: float,
+        x2: float,
+        y2: float,
+        *,
+        sheet: int | None = None,
+    ) -> list[SpatialHit]:
+        """
+        Return the elements touching the rectangle with the corners (x1, y1) and
+        (x2, y2), in the order they were added.
+
+        Only the elements on sheet instance `sheet` are returned, or those on
+        every sheet instance if it is None.
+        """
+        left, right = min(x1, x2), max(x1, x2)
+        top, bottom = min(y1, y2), max(y1, y2)
+        found: list[int] = []
+        for index in self._candidates(left, top, right, bottom):
+            if sheet is not None and self.hits[index].sheet != sheet:
+                continue
+            for segment in self._segments[index]:
+                if _segment_touches_rect(*segment, left, top, right, bottom):
+                    found.append(index)
+                    break
+        return [self.hits[index] for index in sorted(found)]
+
+    def _candidates(
+        self, left: float, top: float, right: float, bottom: float
+    ) -> set[int]:
+        """Indexes of the hits in the cells covered by a bounding box."""
+        cell_size = self.cell_size
+        candidates: set[int] = set()
+        # only the cells within the populated bounds can hold hits
+        min_x = max(math.floor(left / cell_size), self._min_cell_x)
+        max_x = min(math.floor(right / cell_size), self._max_cell_x)
+        min_y = max(math.floor(top / cell_size), self._min_cell_y)
+        max_y = min(math.floor(bottom / cell_size), self._max_cell_y)
+        if min_x > max_x or min_y > max_y:
+            return candidates
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self._cells):
+            # fewer populated cells than covered ones, look at those instead
+            for (cell_x, cell_y), cell in self._cells.items():
+                if min_x <= cell_x <= max_x and min_y <= cell_y <= max_y:
+                    candidates.update(cell)
+            return candidates
+        for cell_x in range(min_x, max_x + 1):
+            for cell_y in range(min_y, max_y + 1):
+                cell = self._cells.get((cell_x, cell_y))
+                if cell is not None:
+                    candidates.update(cell)
+        return candidates
+
+    def _add_point(self, hit: SpatialHit, x: float, y: float) -> None:
+        index = len(self.hits)
+        self.hits.append(hit)
+        self._segments.append([(x, y, x, y)])
+        self._add_to_cell(
+            (math.floor(x / self.cell_size), math.floor(y / self.cell_size)), index
+        )
+
+    def _add_polyline(self, hit: SpatialHit, points: Sequence[Point]) -> None:
+        index = len(self.hits)
+        self.hits.append(hit)
+        coordinates = point_coordinates(points)
+        segments = [
+            (x1, y1, x2, y2)
+            for (x1, y1), (x2, y2) in zip(coordinates, coordinates[1:])
+        ] or [(x, y, x, y) for x, y in coordinates[:1]]
+        self._segments.append(segments)
+        cell_size = self.cell_size
+        keys: set[tuple[int, int]] = set()
+        for x1, y1, x2, y2 in segments:
+            for cell_x in range(
+                math.floor(min(x1, x2) / cell_size),
+                math.floor(max(x1, x2) / cell_size) + 1,
+            ):
+                for cell_y in range(
+                    math.floor(min(y1, y2) / cell_size),
+                    math.floor(max(y1, y2) / cell_size) + 1,
+                ):
+                    keys.add((cell_x, cell_y))
+        for key in keys:
+            self._add_to_cell(key, index)
+
+    def _add_to_cell(self, key: tuple[int, int], index: int) -> None:
+        cell = self._cells.get(key)
+        if cell is not None:
+            cell.append(index)
+            return
+        cell_x, cell_y = key
+        if not self._cells:
+            self._min_cell_x = self._max_cell_x = cell_x
+            self._min_cell_y = self._max_cell_y = cell_y
+        else:
+            self._min_cell_x = min(self._min_cell_x, cell_x)
+            self._max_cell_x = max(self._max_cell_x, cell_x)
+            self._min_cell_y = min(self._min_cell_y, cell_y)
+            self._max_cell_y = max(self._max_cell_y, cell_y)
+        self._cells[key] = [index]
+
+
+def _segment_touches_rect(
+    x1: float,
+    y1: float,
+    x2: float,
+    y2: float,
+    left: float,
+    top: float,
+    right: float,
+    bottom: float,
+) -> bool:
+    """Return True if the segment (x1, y1)-(x2, y2) has a point in the rectangle."""
+    # clip the segment parameter t in [0, 1] against each side (Liang-Barsky)
+    low, high = 0.0, 1.0
+    dx = x2 - x1
+    dy = y2 - y1
+    for delta, start, minimum, maximum in (
+        (dx, x1, left, right),
+        (dy, y1, top, bottom),
+    ):
+        if delta == 0:
+            if not minimum <= start <= maximum:
+                return False
+            continue
+        t1 = (minimum - start) / delta
+        t2 = (maximum - start) / delta
+        if t1 > t2:
+            t1, t2 = t2, t1
+        low = max(low, t1)
+        high = min(high, t2)
+        if low > high:
+            return False
+    return True
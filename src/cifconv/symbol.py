@@ -1,5 +1,8 @@
-from dataclasses import dataclass
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Hashable
 
+from cifconv.bbox import BBox
 from cifconv.pin import Pin
 
 
@@ -11,3 +14,84 @@ class Symbol:
     pins: list[Pin]
     package: str | None
     description: str | None = None
+    # pins of each (unit, body_style), including the pins shared by all units
+    # (unit 0) and all body styles (body style 0)
+    unit_pins: dict[tuple[int, int], list[Pin]] = field(default_factory=dict)
+    # power symbols (flagged `(power)`) connect every net they are placed on
+    # to the global net of their value, e.g. all GND symbols
+    power: bool = False
+    # box around the graphics and pins of all units, in symbol coordinates
+    bbox: BBox | None = None
+    # box of each (unit, body_style), including the items shared by all units
+    # and body styles, like `unit_pins`
+    unit_bboxes: dict[tuple[int, int], BBox] = field(default_factory=dict)
+    # graphic items (everything but the pins) of each sub-symbol as
+    # ((unit, body_style), items) pairs in file order, every item being the
+    # nested tuple of its tokens; only used to compare bodies, see `body_key`
+    graphics: tuple[Hashable, ...] = field(default=(), repr=False)
+
+    def pins_for(self, unit: int = 1, body_style: int = 1) -> list[Pin]:
+        """
+        Return the pins of the given unit and body style of this symbol.
+
+        Falls back to all pins of the symbol if no per-unit pin table was built
+        for the requested unit.
+        """
+        return self.unit_pins.get((unit, body_style), self.pins)
+
+    def bbox_for(self, unit: int = 1, body_style: int = 1) -> BBox | None:
+        """
+        Return the body box of the given unit and body style of this symbol.
+
+        Falls back to the box of the whole symbol if no per-unit box was built
+        for the requested unit.
+        """
+        return self.unit_bboxes.get((unit, body_style), self.bbox)
+
+    def body_key(self) -> Hashable:
+        """
+        Return a hashable key describing the body of this symbol.
+
+        Two symbols with equal keys have the same reference prefix, power flag,
+        pins (number, name, type, position and unit assignment), graphics and
+        body boxes, regardless of their lib_id, footprint or description.
+        """
+        pin_index = {id(pin): index for index, pin in enumerate(self.pins)}
+        return (
+            self.ref,
+            self.power,
+            tuple(
+                (pin.number, pin.name, pin.type, pin.rel_x, pin.rel_y, pin.rotation)
+                for pin in self.pins
+            ),
+            tuple(
+                (unit, tuple(pin_index.get(id(pin), -1) for pin in pins))
+                for unit, pins in sorted(self.unit_pins.items())
+            ),
+            self.graphics,
+            self.bbox,
+            tuple(sorted(self.unit_bboxes.items())),
+        )
+
+
+def add_library_symbol(library: dict[str, Symbol], symbol: Symbol) -> Symbol:
+    """
+    Add a symbol to a library of symbols by lib_id and return the symbol to use.
+
+    A symbol with the same body as the one of its lib_id (see
+    `Symbol.body_key`) shares that one. A symbol whose lib_id is taken by
+    another body is added as a copy named "<lib_id>_<n>", with the lowest free
+    n from 2.
+    """
+    existing = library.get(symbol.lib_id)
+    if existing is None:
+        library[symbol.lib_id] = symbol
+        return symbol
+    if existing is symbol or existing.body_key() == symbol.body_key():
+        return existing
+    number = 2
+    while f"{symbol.lib_id}_{number}" in library:
+        number += 1
+    renamed = dataclasses.replace(symbol, lib_id=f"{symbol.lib_id}_{number}")
+    library[renamed.lib_id] = renamed
+    return renamed
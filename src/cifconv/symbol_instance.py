@@ -1,6 +1,35 @@
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, field
+from typing import Mapping
 
+from cifconv.bbox import BBox, transform_bbox
 from cifconv.pin_instance import PinInstance
+from cifconv.symbol import Symbol
+
+
+class _LazyPinInstances:
+    """
+    Descriptor backing `SymbolInstance.pin_instances`.
+
+    Pin instances given explicitly are stored as-is. Otherwise they are computed
+    from the referenced symbol definition and the instance placement on first
+    access, so runs that never look at pins (e.g. only emitting instances or
+    the library) do not pay for one PinInstance per pin.
+    """
+
+    def __get__(self, obj: "SymbolInstance | None", objtype=None):
+        if obj is None:
+            # dataclass default value
+            return None
+        if not obj._pins_materialized:
+            obj._pin_instances = obj.place_pins()
+            obj._pins_materialized = True
+        return obj._pin_instances
+
+    def __set__(self, obj: "SymbolInstance", value: list[PinInstance] | None):
+        obj._pin_instances = value
+        # an explicit None leaves the pins to be computed from the symbol
+        obj._pins_materialized = value is not None
 
 
 @dataclass
@@ -11,6 +40,98 @@ class SymbolInstance:
     x: float
     y: float
     rotation: float = 0
-    attributes: dict[str, str] | None = None
+    attributes: Mapping[str, str] | None = None
     description: str | None = None
-    pin_instances: list[PinInstance] | None = None
+    unit: int = 1
+    body_style: int = 1
+    # reference of the instance in every placement of its sheet, keyed by the
+    # instance path of the sheet (see `SheetInstance.path`)
+    references: dict[str, str] | None = None
+    # "x" if mirrored about the x axis (flipping y), "y" if mirrored about the
+    # y axis (flipping x), applied in symbol coordinates before the rotation
+    mirror: str | None = None
+    # number of the sheet instance the element is on, see `Label.sheet`
+    sheet: int = 0
+    # declared before `pin_instances` so __init__ resets them before the
+    # descriptor stores explicitly given pin instances
+    _pin_instances: list[PinInstance] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _pins_materialized: bool = field(
+        default=False, init=False, repr=False, compare=False
+    )
+    pin_instances: list[PinInstance] | None = _LazyPinInstances()  # type: ignore[assignment]
+    # symbol definition the pin instances are computed from
+    symbol: Symbol | None = field(default=None, repr=False, compare=False)
+    _bbox: BBox | None = field(default=None, init=False, repr=False, compare=False)
+    _bbox_placed: bool = field(default=False, init=False, repr=False, compare=False)
+
+    @property
+    def bbox(self) -> BBox | None:
+        """
+        (x min, y min, x max, y max) of the placed symbol body, computed on first access.
+
+        The box of the symbol's unit and body style (see `Symbol.bbox_for`) is
+        mirrored, rotated and moved like the pins. None if the symbol definition
+        is unknown or has neither graphics nor pins. `place_bboxes` computes the
+        boxes of many instances at once.
+        """
+        if not self._bbox_placed:
+            self._bbox = self.place_bbox()
+            self._bbox_placed = True
+        return self._bbox
+
+    @bbox.setter
+    def bbox(self, value: BBox | None) -> None:
+        self._bbox = value
+        # None leaves the box to be computed from the symbol
+        self._bbox_placed = value is not None
+
+    def place_bbox(self) -> BBox | None:
+        """Compute the placed body box of this instance from its symbol definition."""
+        if self.symbol is None:
+            return None
+        bbox = self.symbol.bbox_for(self.unit, self.body_style)
+        if bbox is None:
+            return None
+        return transform_bbox(bbox, self.x, self.y, self.rotation, self.mirror)
+
+    def place_pins(self) -> list[PinInstance] | None:
+        """
+        Compute the absolute pin instances of this instance from its symbol definition.
+
+        Only the pins of the placed unit and body style are placed.
+
+        Returns None if the symbol definition is unknown or has no pins.
+        """
+        if self.symbol is None:
+            return None
+        pins = self.symbol.pins_for(self.unit, self.body_style)
+        if not pins:
+            return None
+        rad = math.radians(self.rotation)
+        cos = math.cos(rad)
+        sin = math.sin(rad)
+        x_sign = -1 if self.mirror == "y" else 1
+        y_sign = -1 if self.mirror == "x" else 1
+        pin_instances: list[PinInstance] = []
+        for pin in pins:
+            rel_x = pin.rel_x * x_sign
+            rel_y = pin.rel_y * y_sign
+            if self.mirror == "y":
+                pin_rotation = 180 - pin.rotation
+            elif self.mirror == "x":
+                pin_rotation = -pin.rotation
+            else:
+                pin_rotation = pin.rotation
+            pin_instances.append(
+                PinInstance(
+                    number=pin.number,
+                    name=pin.name,
+                    type=pin.type,
+                    x=self.x + rel_x * cos - rel_y * sin,
+                    y=self.y + rel_x * sin + rel_y * cos,
+                    rotation=(pin_rotation + self.rotation) % 360,
+                )
+            )
+        return pin_instances
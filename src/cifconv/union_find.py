@@ -0,0 +1,48 @@
+from array import array
+
+
+class UnionFind:
+    """
+    Union-Find (Disjoint-Set Union) over dense integer ids `0 .. len(self) - 1`.
+
+    Parents and ranks are stored in flat arrays, `find` is iterative with path
+    halving and `union` is by rank, so long chains of elements neither hit the
+    recursion limit nor degrade into linear-time lookups.
+    """
+
+    def __init__(self, size: int = 0):
+        self.parent = array("q", range(size))
+        self.rank = array("B", bytes(size))
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add(self) -> int:
+        """Add a new singleton set and return its id."""
+        element = len(self.parent)
+        self.parent.append(element)
+        self.rank.append(0)
+        return element
+
+    def find(self, element: int) -> int:
+        """Return the root of the set containing `element`."""
+        parent = self.parent
+        while parent[element] != element:
+            # path halving: point every other node on the path to its grandparent
+            parent[element] = parent[parent[element]]
+            element = parent[element]
+        return element
+
+    def union(self, element1: int, element2: int) -> int:
+        """Merge the sets containing the two elements and return the new root."""
+        root1 = self.find(element1)
+        root2 = self.find(element2)
+        if root1 == root2:
+            return root1
+        rank = self.rank
+        if rank[root1] < rank[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        if rank[root1] == rank[root2]:
+            rank[root1] += 1
+        return root1
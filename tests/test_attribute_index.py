@@ -0,0 +1,111 @@
+import fnmatch
+import random
+
+import json5
+import pytest
+
+from cifconv.attribute_index import AttributeIndex
+from cifconv.cli import main
+from cifconv.schema import Schema
+from cifconv.symbol_instance import SymbolInstance
+
+
+def make_instance(designator: str, **attributes: str) -> SymbolInstance:
+    return SymbolInstance(
+        uuid=f"{designator}-uuid",
+        lib_id="Device:R",
+        designator=designator,
+        x=0,
+        y=0,
+        attributes={"Reference": designator, **attributes},
+    )
+
+
+@pytest.fixture
+def schema():
+    schema = Schema()
+    schema.instances = [
+        make_instance("R1", Value="10k", Footprint="Resistor_SMD:R_0603_1608Metric"),
+        make_instance("R2", Value="10k", Footprint="Resistor_SMD:R_0805_2012Metric"),
+        make_instance("R3", Value="1k", Footprint="Resistor_SMD:R_0603_1608Metric"),
+        make_instance("C1", Value="100n", Footprint="Capacitor_SMD:C_0603_1608Metric"),
+        make_instance("TP1"),
+    ]
+    return schema
+
+
+def designators(instances):
+    return [instance.designator for instance in instances]
+
+
+def test_find(schema):
+    index = schema.attribute_index
+    assert designators(index.find("Value", "10k")) == ["R1", "R2"]
+    assert index.find("Value", "10") == []
+    assert index.find("Tolerance", "1%") == []
+    assert designators(index.find_prefix("Value", "1")) == ["R1", "R2", "R3", "C1"]
+    assert designators(index.find_prefix("Footprint", "Resistor_SMD:R_06")) == [
+        "R1",
+        "R3",
+    ]
+    assert designators(index.find_glob("Footprint", "*0603*")) == ["R1", "R3", "C1"]
+    assert designators(index.find_glob("Reference", "R[12]")) == ["R1", "R2"]
+    assert index.keys() == ["Reference", "Value", "Footprint"]
+    assert index.values("Value") == ["100n", "10k", "1k"]
+
+
+def test_query(schema):
+    assert designators(
+        schema.find_instances({"Value": "10k", "Footprint": "*0603*"})
+    ) == ["R1"]
+    assert designators(schema.find_instances({"Reference": "?1"})) == ["R1", "C1"]
+    assert schema.find_instances({"Value": "10k", "Reference": "C*"}) == []
+    assert len(schema.find_instances({})) == 5
+
+
+def test_index_is_rebuilt_after_adding_instances(schema):
+    index = schema.attribute_index
+    assert schema.attribute_index is index
+    schema.add_instance(make_instance("R4", Value="10k"))
+    assert schema.attribute_index is not index
+    assert designators(schema.find_instances({"Value": "10k"})) == ["R1", "R2", "R4"]
+
+
+def test_glob_matches_brute_force():
+    rng = random.Random(11)
+    instances = [
+        make_instance(
+            f"U{position}",
+            Value="".join(rng.choice("ab*") for _ in range(rng.randint(0, 4))),
+        )
+        for position in range(200)
+    ]
+    index = AttributeIndex(instances)
+    for pattern in ["a*", "*b", "a?b*", "[ab]a*", "ab", "*", "b*a"]:
+        expected = [
+            instance
+            for instance in instances
+            if fnmatch.fnmatchcase(instance.attributes["Value"], pattern)
+        ]
+        assert index.find_glob("Value", pattern) == expected
+
+
+def test_query_cli(tmp_path, capsys, monkeypatch):
+    source = tmp_path / "board.kicad_sch"
+    source.write_text(
+        """
+        (kicad_sch (version 20231120) (generator "eeschema")
+            (symbol (lib_id "Device:R") (at 0 0 0) (uuid "r1")
+                (property "Reference" "R1" (at 0 0 0))
+                (property "Value" "10k" (at 0 0 0)))
+            (symbol (lib_id "Device:R") (at 10 0 0) (uuid "r2")
+                (property "Reference" "R2" (at 0 0 0))
+                (property "Value" "1k" (at 0 0 0)))
+        )
+        """
+    )
+    monkeypatch.chdir(tmp_path)
+    main(["query", str(source), "Value=10*", "Reference=R?"])
+    output = json5.loads(capsys.readouterr().out)
+    assert [instance["designator"] for instance in output] == ["R1"]
+    assert output[0]["attributes"] == {"Reference": "R1", "Value": "10k"}
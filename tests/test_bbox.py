@@ -0,0 +1,124 @@
+import math
+import random
+
+import pytest
+
+from cifconv.bbox import arc_bbox, place_bboxes, transform_bbox
+from cifconv.cifconv_eval import graphics_bbox, process_symbol
+from cifconv.expr import ListExpr
+from cifconv.kicad_schematic_tokenizer import kicad_sch_tokenize
+from cifconv.read_expr import read_expr
+from cifconv.symbol import Symbol
+from cifconv.symbol_instance import SymbolInstance
+
+
+def parse(input_data: str) -> ListExpr:
+    expr = read_expr(t for t in kicad_sch_tokenize(input_data))
+    assert isinstance(expr, ListExpr)
+    return expr
+
+
+def assert_bbox(actual, expected):
+    assert actual is not None
+    assert actual == pytest.approx(expected, abs=1e-9)
+
+
+def test_arc_bbox():
+    # upper half circle, counterclockwise from (1, 0) to (-1, 0)
+    assert_bbox(arc_bbox((1, 0), (0, 1), (-1, 0)), (-1, 0, 1, 1))
+    # the same arc given clockwise
+    assert_bbox(arc_bbox((-1, 0), (0, 1), (1, 0)), (-1, 0, 1, 1))
+    # three quarters of a circle around (10, 10)
+    assert_bbox(arc_bbox((12, 10), (8, 10), (10, 12)), (8, 8, 12, 12))
+    # small arc that contains no extreme point
+    start = (math.cos(0.1), math.sin(0.1))
+    mid = (math.cos(0.2), math.sin(0.2))
+    end = (math.cos(0.3), math.sin(0.3))
+    assert_bbox(arc_bbox(start, mid, end), (end[0], start[1], start[0], end[1]))
+
+
+def test_graphics_bbox():
+    sub_symbol = parse(
+        """
+        (symbol "U_0_1"
+            (rectangle (start -5 -2) (end 5 2) (stroke (width 0.254)))
+            (polyline (pts (xy 0 2) (xy 0 6) (xy 1 6)))
+            (circle (center 8 0) (radius 1))
+            (arc (start 0 -2) (mid -2 -4) (end 0 -6))
+            (text "x" (at 100 100 0))
+        )
+        """
+    )
+    assert_bbox(graphics_bbox(sub_symbol), (-5, -6, 9, 6))
+
+
+def test_process_symbol_bboxes_per_unit():
+    symbol = process_symbol(
+        parse(
+            """
+            (symbol "Amplifier:Dual"
+                (property "Reference" "U" (at 0 0 0))
+                (symbol "Dual_0_1" (rectangle (start -1 -1) (end 1 1)))
+                (symbol "Dual_1_1"
+                    (pin output line (at 5 0 180) (length 2) (name "A") (number "1"))
+                )
+                (symbol "Dual_2_1"
+                    (pin output line (at -5 0 0) (length 2) (name "B") (number "7"))
+                )
+            )
+            """
+        )
+    )
+    assert symbol.pins[0].length == 2
+    assert_bbox(symbol.bbox, (-5, -1, 5, 1))
+    assert_bbox(symbol.bbox_for(1, 1), (-1, -1, 5, 1))
+    assert_bbox(symbol.bbox_for(2, 1), (-5, -1, 1, 1))
+
+
+def make_instance(index: int, rotation: float, mirror: str | None) -> SymbolInstance:
+    symbol = Symbol(
+        lib_id="Device:X",
+        type="Device",
+        ref="X",
+        pins=[],
+        package=None,
+        bbox=(-1, -2, 3, 4),
+    )
+    return SymbolInstance(
+        uuid=f"x{index}",
+        lib_id="Device:X",
+        designator=f"X{index}",
+        x=index * 10,
+        y=5,
+        rotation=rotation,
+        mirror=mirror,
+        symbol=symbol,
+    )
+
+
+def test_transform_bbox():
+    assert_bbox(transform_bbox((-1, -2, 3, 4), 10, 5, 0, None), (9, 3, 13, 9))
+    assert_bbox(transform_bbox((-1, -2, 3, 4), 10, 5, 90, None), (6, 4, 12, 8))
+    assert_bbox(transform_bbox((-1, -2, 3, 4), 10, 5, 0, "y"), (7, 3, 11, 9))
+    assert_bbox(transform_bbox((-1, -2, 3, 4), 10, 5, 0, "x"), (9, 1, 13, 7))
+
+
+def test_place_bboxes_matches_per_instance():
+    pytest.importorskip("numpy")
+    rng = random.Random(5)
+    instances = [
+        make_instance(
+            index, rng.choice([0, 90, 180, 270, 30]), rng.choice([None, "x", "y"])
+        )
+        for index in range(50)
+    ]
+    instances.append(
+        SymbolInstance(uuid="u", lib_id="Unknown:U", designator="U1", x=0, y=0)
+    )
+    expected = [instance.place_bbox() for instance in instances]
+
+    place_bboxes(instances)
+
+    assert instances[-1].bbox is None
+    for instance, bbox in zip(instances[:-1], expected[:-1]):
+        assert_bbox(instance.bbox, bbox)
@@ -0,0 +1,95 @@
+import pickle
+from pathlib import Path
+
+import pytest
+
+from cifconv.cifconv_eval import cifconv_eval
+from cifconv.compact import AttributeMap, compact_attributes, with_attribute
+from cifconv.kicad_schematic_tokenizer import kicad_sch_tokenize
+from cifconv.pin import Pin
+from cifconv.read_expr import read_expr
+from cifconv.symbol import Symbol
+from cifconv.symbol_instance import SymbolInstance
+
+SAMPLE = Path(__file__).parent.parent / "docs" / "sample.kicad_sch"
+
+
+def test_attribute_map_shares_keys():
+    key_tuples: dict = {}
+    first = compact_attributes({"Reference": "R1", "Value": "10k"}, key_tuples)
+    second = compact_attributes({"Reference": "R2", "Value": "1k"}, key_tuples)
+
+    assert isinstance(first, AttributeMap)
+    assert first.keys_tuple is second.keys_tuple
+    assert first == {"Reference": "R1", "Value": "10k"}
+    assert first["Value"] == "10k"
+    assert first.get("Footprint") is None
+    assert list(second.items()) == [("Reference", "R2"), ("Value", "1k")]
+    with pytest.raises(KeyError):
+        second["Footprint"]
+    assert compact_attributes(first, key_tuples) is first
+    assert list(key_tuples) == [("Reference", "Value")]
+
+
+def test_with_attribute_copies():
+    attributes = {"Reference": "R1", "Value": "10k"}
+    assert with_attribute(attributes, "Reference", "R5") == {
+        "Reference": "R5",
+        "Value": "10k",
+    }
+    assert attributes["Reference"] == "R1"
+    assert with_attribute(None, "Reference", "R5") == {"Reference": "R5"}
+
+    compact = compact_attributes(attributes, {})
+    renamed = with_attribute(compact, "Reference", "R5")
+    assert isinstance(renamed, AttributeMap)
+    assert renamed.keys_tuple is compact.keys_tuple
+    assert renamed == {"Reference": "R5", "Value": "10k"}
+    assert compact["Reference"] == "R1"
+    assert with_attribute(compact, "Footprint", "R_0603") == {
+        "Reference": "R1",
+        "Value": "10k",
+        "Footprint": "R_0603",
+    }
+    with pytest.raises(TypeError):
+        compact["Reference"] = "R5"  # type: ignore[index]
+
+
+def make_instance() -> SymbolInstance:
+    symbol = Symbol(
+        lib_id="Device:R",
+        type="Device",
+        ref="R",
+        pins=[Pin(number="1", name="~", type="passive", rel_x=0, rel_y=3.81)],
+        package=None,
+    )
+    return SymbolInstance(
+        uuid="u", lib_id="Device:R", designator="R1", x=10, y=0, symbol=symbol
+    )
+
+
+def test_pickling_keeps_pin_instances_lazy():
+    instance = make_instance()
+    copy = pickle.loads(pickle.dumps(instance))
+    assert not instance._pins_materialized
+    assert not copy._pins_materialized
+    assert copy.pin_instances == instance.pin_instances
+    assert copy.pin_instances[0].x == 10
+
+
+def load_sample(compact: bool):
+    return cifconv_eval(
+        read_expr(kicad_sch_tokenize(SAMPLE.read_text())), compact=compact
+    )
+
+
+def test_compact_schema_has_the_same_output():
+    schema = load_sample(compact=True)
+    assert all(
+        isinstance(instance.attributes, AttributeMap) for instance in schema.instances
+    )
+    assert schema.to_json() == load_sample(compact=False).to_json()
+    # the key tuples are kept by the schema, not by the module
+    assert {instance.attributes.keys_tuple for instance in schema.instances} <= set(
+        schema.attribute_keys
+    )
@@ -0,0 +1,332 @@
+import random
+
+from cifconv.net import net_id, net_name
+
+from cifconv.bus import Bus
+from cifconv.junction import Junction
+from cifconv.label import Label
+from cifconv.no_connect import NoConnect
+from cifconv.pin_instance import PinInstance
+from cifconv.point import Point
+from cifconv.schema import Schema
+from cifconv.symbol import Symbol
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.wire import Wire
+
+
+def net_signature(schema: Schema):
+    """The nets of a schema, independent of net order and numbering."""
+    signature = []
+    for net in schema.nets:
+        signature.append(
+            (
+                tuple(sorted(wire.uuid for wire in net.wires)),
+                tuple(sorted(bus.uuid for bus in net.buses)),
+                tuple(
+                    sorted(
+                        (instance.designator, pin.number)
+                        for instance, pin in net.connected_pins or ()
+                    )
+                ),
+                "" if net.name.startswith("net_") else net.name,
+                net.uuid,
+            )
+        )
+    return sorted(signature)
+
+
+def recomputed_signature(schema: Schema):
+    schema.invalidate_nets()
+    return net_signature(schema)
+
+
+def make_instance(designator: str, x: float, y: float) -> SymbolInstance:
+    return SymbolInstance(
+        uuid=f"{designator}-uuid",
+        lib_id="Device:R",
+        designator=designator,
+        x=x,
+        y=y,
+        pin_instances=[
+            PinInstance(number="1", name="1", type="passive", x=x, y=y, rotation=0)
+        ],
+    )
+
+
+def make_power_instance(designator: str, x: float, y: float) -> SymbolInstance:
+    instance = make_instance(designator, x, y)
+    instance.lib_id = "power:GND"
+    instance.attributes = {"Value": "GND"}
+    instance.symbol = Symbol(
+        lib_id="power:GND", type="power", ref="#PWR", pins=[], package=None, power=True
+    )
+    return instance
+
+
+def test_add_wire_merges_nets():
+    schema = Schema()
+    schema.add_wire(Wire(uuid="w1", points=[Point(0, 0), Point(10, 0)]))
+    schema.add_wire(Wire(uuid="w2", points=[Point(20, 0), Point(30, 0)]))
+    schema.add_instance(make_instance("R1", 30, 0))
+    assert len(schema.nets) == 2
+
+    bridge = Wire(uuid="w3", points=[Point(10, 0), Point(20, 0)])
+    schema.add_wire(bridge)
+    assert len(schema.nets) == 1
+    net = schema.net_of(bridge)
+    assert net is not None
+    assert sorted(wire.uuid for wire in net.wires) == ["w1", "w2", "w3"]
+    assert [instance.designator for instance, _ in net.connected_pins or ()] == ["R1"]
+    assert net_signature(schema) == recomputed_signature(schema)
+
+
+def test_remove_wire_resplits_only_its_net():
+    schema = Schema()
+    for index in range(3):
+        schema.add_wire(
+            Wire(
+                uuid=f"w{index}",
+                points=[Point(index * 10, 0), Point(index * 10 + 10, 0)],
+            )
+        )
+    schema.add_wire(Wire(uuid="other", points=[Point(0, 50), Point(10, 50)]))
+    schema.add_label(Label(text="LEFT", x=0, y=0, rotation=0, uuid="l1"))
+    assert len(schema.nets) == 2
+    other_net = schema.net_of(schema.wires["other"])
+
+    schema.remove_wire(schema.wires["w1"])
+    assert len(schema.nets) == 3
+    # the untouched net is reused as is
+    assert schema.net_of(schema.wires["other"]) is other_net
+    assert schema.net_of(schema.wires["w0"]).name == "LEFT"
+    assert schema.net_of(schema.wires["w2"]).name.startswith("net_")
+    assert net_signature(schema) == recomputed_signature(schema)
+
+
+def test_wire_added_on_label_and_pin_attaches_them():
+    schema = Schema()
+    schema.add_label(Label(text="SIG", x=5, y=0, rotation=0, uuid="l1"))
+    schema.add_instance(make_instance("R1", 10, 0))
+    assert schema.nets == []
+
+    wire = Wire(uuid="w1", points=[Point(0, 0), Point(10, 0)])
+    schema.add_wire(wire)
+    net = schema.net_of(wire)
+    assert net is not None
+    assert net.name == "SIG"
+    assert net.connected_pins is not None and len(net.connected_pins) == 1
+
+    schema.remove_wire(wire)
+    assert schema.nets == []
+    assert schema.net_of(wire) is None
+
+
+def test_junction_and_no_connect_mutations():
+    schema = Schema()
+    schema.add_wire(Wire(uuid="w1", points=[Point(0, 0), Point(20, 0)]))
+    schema.add_wire(Wire(uuid="w2", points=[Point(10, -10), Point(10, 10)]))
+    schema.add_instance(make_instance("R1", 20, 0))
+    assert len(schema.nets) == 2
+
+    junction = Junction(x=10, y=0, uuid="j1")
+    schema.add_junction(junction)
+    assert len(schema.nets) == 1
+    schema.remove_junction(junction)
+    assert len(schema.nets) == 2
+
+    no_connect = NoConnect(x=20, y=0, uuid="nc1")
+    schema.add_no_connect(no_connect)
+    assert all(not net.connected_pins for net in schema.nets)
+    schema.remove_no_connect(no_connect)
+    assert any(net.connected_pins for net in schema.nets)
+    assert net_signature(schema) == recomputed_signature(schema)
+
+
+def test_remove_label_and_instance():
+    schema = Schema()
+    schema.add_wire(Wire(uuid="w1", points=[Point(0, 0), Point(10, 0)]))
+    label = Label(text="SIG", x=0, y=0, rotation=0, uuid="l1")
+    instance = make_instance("R1", 10, 0)
+    schema.add_label(label)
+    schema.add_instance(instance)
+    assert schema.nets[0].name == "SIG"
+
+    schema.remove_label(label)
+    schema.remove_instance(instance)
+    assert schema.labels == [] and schema.instances == []
+    assert schema.nets[0].name == "net_0"
+    assert schema.nets[0].connected_pins is None
+
+
+def test_random_mutations_match_recomputation():
+    rng = random.Random(1)
+    schema = Schema()
+    schema.nets
+    live: list[Wire | Bus] = []
+    for step in range(300):
+        if live and rng.random() < 0.35:
+            element = live.pop(rng.randrange(len(live)))
+            if isinstance(element, Wire):
+                schema.remove_wire(element)
+            else:
+                schema.remove_bus(element)
+        else:
+            x, y = rng.randrange(8) * 10, rng.randrange(8) * 10
+            if rng.random() < 0.5:
+                end = Point(x + rng.randrange(1, 4) * 10, y)
+            else:
+                end = Point(x, y + rng.randrange(1, 4) * 10)
+            if rng.random() < 0.1:
+                element = Bus(uuid=f"b{step}", points=[Point(x, y), end])
+                schema.add_bus(element)
+            else:
+                element = Wire(uuid=f"w{step}", points=[Point(x, y), end])
+                schema.add_wire(element)
+            live.append(element)
+        if step % 10 == 0:
+            schema.add_label(
+                Label(text=f"L{step}", x=x, y=y, rotation=0, uuid=f"l{step}")
+            )
+            schema.add_instance(make_instance(f"R{step}", x, y))
+        if step % 20 == 5:
+            schema.add_label(
+                Label(
+                    text="G", x=x, y=y, rotation=0, uuid=f"g{step}", kind="global_label"
+                )
+            )
+            schema.add_instance(make_power_instance(f"#PWR{step}", x, y))
+        if step % 25 == 0:
+            incremental = net_signature(schema)
+            assert incremental == recomputed_signature(schema)
+    assert net_signature(schema) == recomputed_signature(schema)
+
+
+def test_net_id_and_name_are_deterministic():
+    assert net_id(["b", "a"]) == net_id(["a", "b"])
+    assert net_id(["a", "b"]) != net_id(["a", "c"])
+    assert (
+        net_name([("label", "VCC", "/"), ("label", "+5V", "/"), ("label", "VDD", "/")])
+        == "+5V"
+    )
+    assert (
+        net_name(
+            [("label", "A", "/"), ("global_label", "B", "/"), ("power", "GND", "/")]
+        )
+        == "GND"
+    )
+    assert net_name([("label", "A", "/"), ("hierarchical_label", "B", "/")]) == "A"
+    assert (
+        net_name([("sheet_pin", "IN", "/Ch/"), ("hierarchical_label", "IN", "/Ch/")])
+        == "/Ch/IN"
+    )
+    # the label on the sheet nearest the root wins, local names are qualified
+    assert net_name([("label", "A", "/Ch/"), ("label", "B", "/")]) == "B"
+    assert net_name([("label", "B", "/Ch/"), ("global_label", "G", "/Ch/")]) == "G"
+    assert net_name([]) is None
+
+    wires = [
+        Wire(uuid=f"w{index}", points=[Point(index * 10, 0), Point(index * 10 + 10, 0)])
+        for index in range(3)
+    ]
+    labels = [
+        Label(text=text, x=index * 10, y=0, rotation=0, uuid=f"l{index}")
+        for index, text in enumerate(["SIG_B", "SIG_A", "SIG_C"])
+    ]
+
+    outputs = []
+    for order in (slice(None), slice(None, None, -1)):
+        schema = Schema()
+        for wire in wires[order]:
+            schema.add_wire(wire)
+        for label in labels[order]:
+            schema.add_label(label)
+        outputs.append(schema.to_json(sections=["nets"]))
+    assert outputs[0] == outputs[1]
+    assert outputs[0]["nets"][0]["name"] == "SIG_A"
+    assert outputs[0]["nets"][0]["net_id"] == net_id(["w0", "w1", "w2"])
+
+
+def test_power_symbols_and_global_labels_merge_by_name():
+    schema = Schema()
+    wires = [
+        Wire(uuid=f"w{index}", points=[Point(0, index * 10), Point(10, index * 10)])
+        for index in range(5)
+    ]
+    for wire in wires:
+        schema.add_wire(wire)
+    # w0 and w1 carry a GND power symbol, w2 a global label GND
+    gnd0 = make_power_instance("#PWR01", 0, 0)
+    gnd1 = make_power_instance("#PWR02", 10, 10)
+    schema.add_instance(gnd0)
+    schema.add_instance(gnd1)
+    schema.add_label(
+        Label(text="GND", x=0, y=20, rotation=0, uuid="g1", kind="global_label")
+    )
+    # w3 and w4 share a hierarchical label, w4 also has a local label, which
+    # names the net
+    schema.add_label(
+        Label(text="SUB", x=0, y=30, rotation=0, uuid="h1", kind="hierarchical_label")
+    )
+    schema.add_label(
+        Label(text="SUB", x=0, y=40, rotation=0, uuid="h2", kind="hierarchical_label")
+    )
+    schema.add_label(Label(text="A_LOCAL", x=10, y=40, rotation=0, uuid="l1"))
+
+    assert len(schema.nets) == 2
+    gnd_net = schema.net_of(wires[0])
+    assert gnd_net is schema.net_of(wires[1]) is schema.net_of(wires[2])
+    assert gnd_net.name == "GND"
+    assert sorted(instance.designator for instance, _ in gnd_net.connected_pins) == [
+        "#PWR01",
+        "#PWR02",
+    ]
+    assert schema.net_of(wires[3]) is schema.net_of(wires[4])
+    assert schema.net_of(wires[4]).name == "A_LOCAL"
+    assert net_signature(schema) == recomputed_signature(schema)
+
+    # removing a name splits the nets it joined
+    schema.remove_instance(gnd1)
+    assert len(schema.nets) == 3
+    assert schema.net_of(wires[1]) is not gnd_net
+    assert net_signature(schema) == recomputed_signature(schema)
+
+
+def test_global_label_on_nothing_has_no_net():
+    schema = Schema()
+    schema.add_label(
+        Label(text="GND", x=50, y=50, rotation=0, uuid="g1", kind="global_label")
+    )
+    schema.add_wire(Wire(uuid="w1", points=[Point(0, 0), Point(10, 0)]))
+    assert len(schema.nets) == 1
+    assert net_signature(schema) == recomputed_signature(schema)
+
+
+def test_sheets_only_connect_by_name():
+    schema = Schema()
+    for sheet in (0, 1):
+        wire = Wire(uuid=f"w{sheet}", points=[Point(0, 0), Point(10, 0)], sheet=sheet)
+        schema.wires[wire.uuid] = wire
+        instance = make_instance(f"R{sheet}", 10, 0)
+        instance.sheet = sheet
+        schema.instances.append(instance)
+    schema.labels.append(Label(text="L1", x=5, y=0, rotation=0, uuid="l1", sheet=1))
+    assert net_signature(schema) == [
+        (("w0",), (), (("R0", "1"),), "", net_id(["w0"])),
+        (("w1",), (), (("R1", "1"),), "L1", net_id(["w1"])),
+    ]
+
+    # a wire ending on both wires only joins the one of its sheet
+    schema.add_wire(Wire(uuid="w2", points=[Point(5, 0), Point(5, 10)], sheet=1))
+    schema.add_junction(Junction(x=5, y=0, uuid="j1", sheet=0))
+    assert net_signature(schema) == recomputed_signature(schema)
+    assert [len(net.wires) for net in schema.nets] == [1, 2]
+
+    # global names still connect across sheets
+    schema.add_label(
+        Label(text="G", x=0, y=0, rotation=0, uuid="g0", kind="global_label")
+    )
+    schema.add_label(
+        Label(text="G", x=0, y=0, rotation=0, uuid="g1", kind="global_label", sheet=1)
+    )
+    assert [len(net.wires) for net in schema.nets] == [3]
+    assert net_signature(schema) == recomputed_signature(schema)
@@ -0,0 +1,34 @@
+import pytest
+
+from cifconv.coord import CoordGrid
+
+
+def test_coord_grid_key():
+    grid = CoordGrid()
+    assert grid.key(10.16, 20.32) == grid.key(10.16 + 1e-12, 20.32 - 1e-12)
+    assert grid.key(10.16, 20.32) != grid.key(10.1601, 20.32)
+    assert grid.key(-5.08, -2.54) != grid.key(-5.08, 2.54)
+    assert grid.unpack(grid.key(-5.08, 2.54)) == pytest.approx((-5.08, 2.54))
+    assert grid.unpack(grid.key(5.08, -2.54)) == pytest.approx((5.08, -2.54))
+
+
+def test_coord_grid_resolution():
+    grid = CoordGrid(resolution=1.27)
+    assert grid.key(2.54, 0) == grid.key(2.6, 0.3)
+    assert grid.key(2.54, 0) != grid.key(3.81, 0)
+
+    with pytest.raises(ValueError, match="resolution must be positive"):
+        CoordGrid(resolution=0)
+
+
+def test_coord_grid_snap():
+    grid = CoordGrid()
+    keys = {grid.key(10, 10)}
+    # without tolerance only the exact cell matches
+    assert grid.snap(grid.key(10.0001, 10), keys) == grid.key(10.0001, 10)
+
+    grid = CoordGrid(tolerance=0.00025)
+    keys = {grid.key(10, 10)}
+    assert grid.snap(grid.key(10.0001, 10), keys) == grid.key(10, 10)
+    assert grid.snap(grid.key(10.0002, 9.9999), keys) == grid.key(10, 10)
+    assert grid.snap(grid.key(10.0003, 10), keys) == grid.key(10.0003, 10)
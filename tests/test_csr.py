@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from cifconv.cli import main
+from cifconv.csr import build_csr, read_raw
+from cifconv.erc import PIN_TYPE_CODES
+from cifconv.pin_instance import PinInstance
+from cifconv.point import Point
+from cifconv.schema import Schema
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.wire import Wire
+
+
+def make_instance(designator: str, x: float, y: float) -> SymbolInstance:
+    return SymbolInstance(
+        uuid=f"{designator}-uuid",
+        lib_id="Device:R",
+        designator=designator,
+        x=x,
+        y=y,
+        pin_instances=[
+            PinInstance(number="1", name="1", type="passive", x=x, y=y, rotation=0),
+            PinInstance(
+                number="2", name="2", type="output", x=x + 10, y=y, rotation=0
+            ),
+        ],
+    )
+
+
+@pytest.fixture
+def schema():
+    schema = Schema()
+    schema.wires["w1"] = Wire(uuid="w1", points=[Point(10, 0), Point(20, 0)])
+    schema.wires["w2"] = Wire(uuid="w2", points=[Point(30, 0), Point(40, 0)])
+    schema.instances.append(make_instance("R1", 0, 0))
+    schema.instances.append(make_instance("R2", 20, 0))
+    # pins at x 50 and 60 are on no net
+    schema.instances.append(make_instance("R3", 40, 0))
+    return schema
+
+
+def test_build_csr(schema):
+    graph = build_csr(schema)
+
+    assert graph.instance_designators == ["R1", "R2", "R3"]
+    assert list(graph.pin_instance) == [0, 0, 1, 1, 2, 2]
+    assert graph.pin_numbers == ["1", "2"] * 3
+    assert list(graph.pin_type) == [
+        PIN_TYPE_CODES["passive"],
+        PIN_TYPE_CODES["output"],
+    ] * 3
+    assert graph.net_names == [net.name for net in schema.nets]
+    assert graph.net_ids == [net.uuid for net in schema.nets]
+    assert list(graph.net_indptr) == [0, 2, 4]
+    # R1 pin 2 and R2 pin 1 on w1, R2 pin 2 and R3 pin 1 on w2
+    assert list(graph.net_pins) == [1, 2, 3, 4]
+
+
+def test_write_raw_round_trip(schema, tmp_path):
+    graph = build_csr(schema)
+    graph.write_raw(tmp_path / "graph.json")
+
+    header = json.loads((tmp_path / "graph.json").read_text())
+    assert header["data"] == "graph.bin"
+    for spec in header["arrays"].values():
+        assert spec["offset"] % 8 == 0
+    assert header["arrays"]["net_indptr"] == {"dtype": "<i8", "offset": 0, "length": 3}
+    assert read_raw(tmp_path / "graph.json") == graph
+
+    header["version"] = 99
+    (tmp_path / "graph.json").write_text(json.dumps(header))
+    with pytest.raises(ValueError, match="is not a cifconv-csr v1 header"):
+        read_raw(tmp_path / "graph.json")
+
+
+def test_write_raw_rejects_a_bin_header_path(schema, tmp_path):
+    graph = build_csr(schema)
+    with pytest.raises(ValueError, match="write the header to a .json file"):
+        graph.write_raw(tmp_path / "graph.bin")
+    assert not (tmp_path / "graph.bin").exists()
+
+    source = tmp_path / "board.kicad_sch"
+    source.write_text('(kicad_sch (version 20231120) (generator "eeschema"))')
+    with pytest.raises(SystemExit):
+        main([str(source), "--csr", str(tmp_path / "graph.bin")])
+    assert not (tmp_path / "graph.bin").exists()
+
+
+def test_write_raw_can_be_memory_mapped(schema, tmp_path):
+    np = pytest.importorskip("numpy")
+    graph = build_csr(schema)
+    graph.write_raw(tmp_path / "graph.json")
+    graph.write_npz(tmp_path / "graph.npz")
+
+    header = json.loads((tmp_path / "graph.json").read_text())
+    archive = np.load(tmp_path / "graph.npz")
+    for name, spec in header["arrays"].items():
+        mapped = np.memmap(
+            tmp_path / header["data"],
+            dtype=spec["dtype"],
+            mode="r",
+            offset=spec["offset"],
+            shape=(spec["length"],),
+        )
+        assert mapped.tolist() == list(getattr(graph, name))
+        assert archive[name].tolist() == list(getattr(graph, name))
+    assert archive["net_names"].tolist() == graph.net_names
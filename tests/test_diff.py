@@ -0,0 +1,102 @@
+import copy
+
+from cifconv.diff import content_hash, diff_schemas
+from cifconv.label import Label
+from cifconv.pin_instance import PinInstance
+from cifconv.point import Point
+from cifconv.schema import Schema
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.wire import Wire
+
+
+def make_instance(designator: str, x: float, y: float) -> SymbolInstance:
+    return SymbolInstance(
+        uuid=f"{designator}-uuid",
+        lib_id="Device:R",
+        designator=designator,
+        x=x,
+        y=y,
+        attributes={"Reference": designator, "Value": "10k"},
+        pin_instances=[
+            PinInstance(number="1", name="1", type="passive", x=x, y=y, rotation=0)
+        ],
+    )
+
+
+def make_schema() -> Schema:
+    schema = Schema()
+    for wire in [
+        Wire(uuid="w1", points=[Point(0, 0), Point(10, 0)]),
+        Wire(uuid="w2", points=[Point(0, 20), Point(10, 20)]),
+    ]:
+        schema.wires[wire.uuid] = wire
+    schema.instances = [
+        make_instance("R1", 0, 0),
+        make_instance("R2", 10, 0),
+        make_instance("R3", 10, 20),
+    ]
+    schema.labels = [Label(text="VIN", x=0, y=0, rotation=0, uuid="l1")]
+    return schema
+
+
+def test_identical_schemas_have_no_diff():
+    diff = diff_schemas(make_schema(), make_schema())
+    assert not diff
+    assert diff.to_json() == {
+        "added": [],
+        "removed": [],
+        "modified": [],
+        "net_changes": [],
+    }
+
+
+def test_added_removed_and_modified_elements():
+    old = make_schema()
+    new = make_schema()
+    new.instances[0].attributes = {"Reference": "R1", "Value": "22k"}
+    del new.wires["w2"]
+    new.wires["w3"] = Wire(uuid="w3", points=[Point(50, 50), Point(60, 50)])
+    new.labels[0] = Label(text="VIN", x=0, y=0, rotation=90, uuid="l1")
+
+    diff = diff_schemas(old, new, nets=False)
+
+    assert [(change.kind, change.uuid) for change in diff.added] == [("wire", "w3")]
+    assert [(change.kind, change.uuid) for change in diff.removed] == [
+        ("wire", "w2")
+    ]
+    assert [(change.kind, change.uuid, change.fields) for change in diff.modified] == [
+        ("instance", "R1-uuid", ["attributes"]),
+        ("label", "l1", ["rotation"]),
+    ]
+    assert diff.net_changes == []
+
+
+def test_net_membership_changes():
+    old = make_schema()
+    new = make_schema()
+    for schema in (old, new):
+        schema.wires["w4"] = Wire(uuid="w4", points=[Point(0, 40), Point(10, 40)])
+        schema.instances.append(make_instance("R4", 10, 40))
+    # R3 joins the VIN net, which renumbers the unlabelled net of R4 from
+    # net_1 to net_0 without being reported
+    new.wires["w2"] = Wire(uuid="w2", points=[Point(10, 0), Point(10, 20)])
+
+    diff = diff_schemas(old, new)
+
+    assert [
+        (change.designator, change.pin_number, change.old_net, change.new_net)
+        for change in diff.net_changes
+    ] == [
+        ("R1", "1", "VIN", "VIN"),
+        ("R2", "1", "VIN", "VIN"),
+        ("R3", "1", "net_0", "VIN"),
+    ]
+
+
+def test_content_hash_is_independent_of_point_storage():
+    schema = make_schema()
+    wire = copy.deepcopy(schema.wires["w1"])
+    schema.pack_geometry()
+    assert content_hash(schema.wires["w1"]) == content_hash(wire)
+    wire.points = [Point(0, 0), Point(10, 1)]
+    assert content_hash(schema.wires["w1"]) != content_hash(wire)
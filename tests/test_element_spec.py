@@ -0,0 +1,65 @@
+import pytest
+
+from cifconv.element_spec import ElementSpec, FieldSpec, compile_element_spec
+from cifconv.junction import Junction
+from cifconv.kicad_schematic_tokenizer import kicad_sch_tokenize
+from cifconv.read_expr import read_expr
+
+JUNCTION_SPEC = ElementSpec(
+    head="junction",
+    name="Junction",
+    factory=Junction,
+    fields=(
+        FieldSpec("x", "at", 1, "number", required=True),
+        FieldSpec("y", "at", 2, "number", required=True),
+        FieldSpec("uuid", "uuid", required=True),
+    ),
+)
+
+
+def parse(input_data: str):
+    return read_expr(kicad_sch_tokenize(input_data))
+
+
+def test_compile_element_spec():
+    extract_junction = compile_element_spec(JUNCTION_SPEC)
+    junction = extract_junction(
+        parse('(junction (at 10.16 20.32) (diameter 0) (color 0 0 0 0) (uuid "j-1"))')
+    )
+    assert junction == Junction(x=10.16, y=20.32, uuid="j-1")
+
+
+def test_compile_element_spec_missing_field():
+    extract_junction = compile_element_spec(JUNCTION_SPEC)
+    with pytest.raises(ValueError, match="Junction is missing at"):
+        extract_junction(parse('(junction (diameter 0) (uuid "j-1"))'))
+    with pytest.raises(ValueError, match="Junction is missing uuid"):
+        extract_junction(parse("(junction (at 1 2))"))
+    with pytest.raises(ValueError, match="Expected a list starting with 'junction'"):
+        extract_junction(parse('(wire (uuid "w-1"))'))
+
+
+def test_compile_element_spec_defaults_and_points():
+    from cifconv.point import Point
+
+    spec = ElementSpec(
+        head="polyline",
+        name="Polyline",
+        factory=lambda **fields: fields,
+        fields=(
+            FieldSpec("name", None, index=0),
+            FieldSpec("points", "pts", type="points", min_items=2),
+            FieldSpec("width", "stroke", 2, "number", default=0.0),
+        ),
+    )
+    extract = compile_element_spec(spec)
+    fields = extract(parse('(polyline "outline" (pts (xy 0 0) (xy 1 2)) (stroke))'))
+    assert fields == {
+        "name": "outline",
+        "points": [Point(0, 0), Point(1, 2)],
+        "width": 0.0,
+    }
+    with pytest.raises(ValueError, match="Polyline is missing pts"):
+        extract(parse('(polyline "outline" (pts (xy 0 0)))'))
+    with pytest.raises(ValueError, match="Expected a number atom"):
+        extract(parse('(polyline "outline" (pts (xy 0 "0") (xy 1 2)))'))
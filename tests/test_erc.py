@@ -0,0 +1,103 @@
+from cifconv.erc import (
+    ERROR,
+    PIN_CONFLICTS,
+    PIN_TYPE_CODES,
+    PIN_TYPES,
+    net_conflicts,
+    pin_type_code,
+    run_erc,
+)
+from cifconv.no_connect import NoConnect
+from cifconv.pin_instance import PinInstance
+from cifconv.point import Point
+from cifconv.schema import Schema
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.wire import Wire
+
+
+def make_instance(designator: str, x: float, y: float, pin_type: str | None):
+    return SymbolInstance(
+        uuid=f"{designator}-uuid",
+        lib_id="Device:X",
+        designator=designator,
+        x=x,
+        y=y,
+        pin_instances=[
+            PinInstance(number="1", name="1", type=pin_type, x=x, y=y, rotation=0)  # type: ignore[arg-type]
+        ],
+    )
+
+
+def make_schema(*pin_types: str | None) -> Schema:
+    """A schema with one wire and a pin of each type along it."""
+    schema = Schema()
+    schema.wires["w1"] = Wire(uuid="w1", points=[Point(0, 0), Point(100, 0)])
+    for index, pin_type in enumerate(pin_types):
+        schema.instances.append(make_instance(f"U{index + 1}", index * 10, 0, pin_type))
+    return schema
+
+
+def rules(schema: Schema):
+    return sorted(
+        (violation.rule, violation.severity, tuple(violation.pins))
+        for violation in run_erc(schema)
+    )
+
+
+def test_pin_conflict_matrix_is_symmetric():
+    assert len(PIN_CONFLICTS) == len(PIN_TYPES)
+    for first in range(len(PIN_TYPES)):
+        assert len(PIN_CONFLICTS[first]) == len(PIN_TYPES)
+        for second in range(len(PIN_TYPES)):
+            assert PIN_CONFLICTS[first][second] == PIN_CONFLICTS[second][first]
+    assert pin_type_code(None) == PIN_TYPE_CODES["unspecified"]
+    assert pin_type_code("bogus") == PIN_TYPE_CODES["unspecified"]
+
+
+def test_net_conflicts_need_two_pins_of_the_same_type():
+    output = 1 << PIN_TYPE_CODES["output"]
+    assert net_conflicts(output, 0) == []
+    code = PIN_TYPE_CODES["output"]
+    assert net_conflicts(output, output) == [(ERROR, code, code)]
+
+
+def test_run_erc_flags_output_to_output():
+    assert rules(make_schema("output", "output", "input")) == [
+        ("pin_conflict", "error", (("U1", "1"), ("U2", "1")))
+    ]
+    assert rules(make_schema("output", "input", "passive")) == []
+
+
+def test_run_erc_flags_undriven_power_in():
+    assert rules(make_schema("power_in", "passive")) == [
+        ("undriven_power_in", "error", (("U1", "1"),))
+    ]
+    assert rules(make_schema("power_in", "power_out")) == []
+
+
+def test_run_erc_flags_single_pin_nets_and_unconnected_pins():
+    schema = make_schema("passive")
+    schema.instances.append(make_instance("U2", 0, 50, "input"))
+    schema.instances.append(make_instance("U3", 10, 50, "input"))
+    schema.instances.append(make_instance("U4", 20, 50, "no_connect"))
+    schema.no_connects.append(NoConnect(x=10, y=50, uuid="nc1"))
+    # pins touching each other connect without a wire
+    schema.instances.append(make_instance("U5", 30, 50, "passive"))
+    schema.instances.append(make_instance("U6", 30, 50, "passive"))
+
+    assert rules(schema) == [
+        ("single_pin_net", "warning", (("U1", "1"),)),
+        ("unconnected_pin", "error", (("U2", "1"),)),
+    ]
+
+
+def test_run_erc_keeps_sheets_apart():
+    schema = Schema()
+    # the same spot on two sheets of a project
+    schema.instances.append(make_instance("U1", 30, 50, "passive"))
+    other = make_instance("U2", 30, 50, "passive")
+    other.sheet = 1
+    schema.instances.append(other)
+    schema.no_connects.append(NoConnect(x=30, y=50, uuid="nc1", sheet=1))
+
+    assert rules(schema) == [("unconnected_pin", "error", (("U1", "1"),))]
@@ -7,6 +7,9 @@ from cifconv.cifconv_eval import (
     expect_str,
     is_list,
     process_bus_entry,
+    process_global_label,
+    process_hierarchical_label,
+    process_junction,
     process_label,
     process_no_connect,
     process_pin,
@@ -1396,6 +1399,50 @@ def test_process_symbol_instance_with_rotation():
     assert pin2.rotation == 270.0
 
 
+def test_process_symbol_instance_with_mirror():
+    input_symbol = """
+(symbol "Device:D"
+    (property "Reference" "D" (at 0 0 0))
+    (symbol "D_0_1"
+        (polyline (pts (xy -1.27 -1.27) (xy -1.27 1.27) (xy 1.27 0) (xy -1.27 -1.27)))
+    )
+    (symbol "D_1_1"
+        (pin passive line (at -3.81 0 0) (length 2.54) (name "K") (number "1"))
+        (pin passive line (at 3.81 1 180) (length 2.54) (name "A") (number "2"))
+    )
+)
+"""
+    input_instance = """
+(symbol
+    (lib_id "Device:D")
+    (at 100 50 0)
+    (mirror y)
+    (uuid "test-instance-uuid-mirrored")
+    (property "Reference" "D1" (at 100 50 0))
+)
+"""
+    from cifconv.schema import Schema
+
+    schema = Schema()
+    expr = read_expr(t for t in kicad_sch_tokenize(input_symbol))
+    assert isinstance(expr, ListExpr)
+    symbol = process_symbol(expr)
+    schema.symbols[symbol.lib_id] = symbol
+    assert symbol.bbox == (-3.81, -1.27, 3.81, 1.27)
+
+    expr = read_expr(t for t in kicad_sch_tokenize(input_instance))
+    assert isinstance(expr, ListExpr)
+    instance = process_symbol_instance(expr, schema)
+
+    assert instance.mirror == "y"
+    assert instance.pin_instances is not None
+    assert [(pin.x, pin.y, pin.rotation) for pin in instance.pin_instances] == [
+        (103.81, 50, 180),
+        (96.19, 51, 0),
+    ]
+    assert instance.bbox == (96.19, 48.73, 103.81, 51.27)
+
+
 def test_process_symbol_instance_without_symbol_definition():
     input_instance = """
 (symbol
@@ -1567,3 +1614,622 @@ def test_schema_nets_points_collection():
     assert len(net2.points) == 2
     assert Point(20, 20) in net2.points
     assert Point(30, 20) in net2.points
+
+
+def test_symbol_instance_pin_instances_are_lazy():
+    from cifconv.pin import Pin
+    from cifconv.symbol import Symbol
+    from cifconv.symbol_instance import SymbolInstance
+
+    symbol = Symbol(
+        lib_id="Device:R",
+        type="Device",
+        ref="R",
+        pins=[
+            Pin(number="1", name="1", type="passive", rel_x=-5.08, rel_y=0),
+            Pin(number="2", name="2", type="passive", rel_x=5.08, rel_y=0, rotation=180),
+        ],
+        package=None,
+    )
+    instance = SymbolInstance(
+        uuid="inst-1", lib_id="Device:R", designator="R1", x=100, y=50, symbol=symbol
+    )
+    assert not instance._pins_materialized
+
+    pin_instances = instance.pin_instances
+    assert instance._pins_materialized
+    assert pin_instances is not None
+    assert [(p.number, p.x, p.y, p.rotation) for p in pin_instances] == [
+        ("1", 100 - 5.08, 50, 0),
+        ("2", 100 + 5.08, 50, 180),
+    ]
+    # computed once, then cached
+    assert instance.pin_instances is pin_instances
+
+
+def test_schema_to_json_sections():
+    from cifconv.schema import Schema
+    from cifconv.symbol_instance import SymbolInstance
+
+    schema = Schema()
+    schema.instances.append(
+        SymbolInstance(uuid="inst-1", lib_id="Device:R", designator="R1", x=0, y=0)
+    )
+    schema.wires["wire-1"] = Wire(uuid="wire-1", points=[Point(0, 0), Point(10, 0)])
+
+    result = schema.to_json(sections=["instances"])
+    assert list(result.keys()) == ["instances"]
+    assert result["instances"][0]["designator"] == "R1"
+    # nets are not computed when not requested
+    assert schema._connectivity is None
+
+    assert list(schema.to_json().keys()) == [
+        "buses",
+        "instances",
+        "library",
+        "nets",
+        "wires",
+    ]
+
+    with pytest.raises(ValueError, match="Unknown output sections"):
+        schema.to_json(sections=["pins"])
+
+
+def test_process_symbol_multi_unit_pin_tables():
+    input_symbol = """
+(symbol "Amplifier_Operational:LM358"
+    (property "Reference" "U" (at 0 0 0))
+    (symbol "LM358_1_1"
+        (pin output line (at 7.62 0 180) (length 2.54) (name "~" ) (number "1"))
+        (pin input line (at -7.62 -2.54 0) (length 2.54) (name "-") (number "2"))
+    )
+    (symbol "LM358_2_1"
+        (pin output line (at 7.62 0 180) (length 2.54) (name "~") (number "7"))
+        (pin input line (at -7.62 -2.54 0) (length 2.54) (name "-") (number "6"))
+    )
+    (symbol "LM358_3_1"
+        (pin power_in line (at -2.54 -7.62 90) (length 3.81) (name "V-") (number "4"))
+    )
+    (symbol "LM358_0_1"
+        (pin power_in line (at -2.54 7.62 270) (length 3.81) (name "V+") (number "8"))
+    )
+)
+"""
+    input_instance = """
+(symbol
+    (lib_id "Amplifier_Operational:LM358")
+    (at 100 50 0)
+    (unit 2)
+    (uuid "test-instance-uuid")
+    (property "Reference" "U1" (at 100 50 0))
+)
+"""
+    from cifconv.schema import Schema
+
+    tokens = list(kicad_sch_tokenize(input_symbol))
+    expr = read_expr(t for t in tokens)
+    assert isinstance(expr, ListExpr)
+    symbol = process_symbol(expr)
+
+    # the flattened pin list is kept for the library output
+    assert [pin.number for pin in symbol.pins] == ["1", "2", "7", "6", "4", "8"]
+    assert sorted(symbol.unit_pins.keys()) == [(1, 1), (2, 1), (3, 1)]
+    assert [pin.number for pin in symbol.pins_for(1)] == ["8", "1", "2"]
+    assert [pin.number for pin in symbol.pins_for(3)] == ["8", "4"]
+
+    schema = Schema()
+    schema.symbols[symbol.lib_id] = symbol
+    tokens = list(kicad_sch_tokenize(input_instance))
+    expr = read_expr(t for t in tokens)
+    assert isinstance(expr, ListExpr)
+    instance = process_symbol_instance(expr, schema)
+
+    assert instance.unit == 2
+    assert instance.pin_instances is not None
+    assert [pin.number for pin in instance.pin_instances] == ["8", "7", "6"]
+
+
+def test_schema_dedup_symbols():
+    from cifconv.pin import Pin
+    from cifconv.schema import Schema
+    from cifconv.symbol import Symbol
+    from cifconv.symbol_instance import SymbolInstance
+
+    def resistor(lib_id: str, package: str | None) -> Symbol:
+        pins = [
+            Pin(number="1", name="~", type="passive", rel_x=0, rel_y=3.81),
+            Pin(number="2", name="~", type="passive", rel_x=0, rel_y=-3.81),
+        ]
+        return Symbol(
+            lib_id=lib_id,
+            type=lib_id.split(":")[0],
+            ref="R",
+            pins=pins,
+            package=package,
+            unit_pins={(1, 1): pins},
+        )
+
+    schema = Schema()
+    for symbol in [
+        resistor("Device:R", None),
+        resistor("ProjectA:R", "Resistor_SMD:R_0603"),
+        resistor("ProjectB:R", None),
+    ]:
+        schema.symbols[symbol.lib_id] = symbol
+    schema.symbols["Device:C"] = Symbol(
+        lib_id="Device:C",
+        type="Device",
+        ref="C",
+        pins=[Pin(number="1", name="~", type="passive", rel_x=0, rel_y=3.81)],
+        package=None,
+    )
+
+    instance = SymbolInstance(
+        uuid="r1",
+        lib_id="ProjectA:R",
+        designator="R1",
+        x=0,
+        y=0,
+        symbol=schema.symbols["ProjectA:R"],
+    )
+    schema.instances.append(instance)
+
+    aliases = schema.dedup_symbols()
+    assert aliases == {"ProjectA:R": "Device:R", "ProjectB:R": "Device:R"}
+    assert list(schema.symbols) == ["Device:R", "Device:C"]
+    assert instance.symbol is schema.symbols["Device:R"]
+    assert instance.lib_id == "ProjectA:R"
+
+    result = schema.to_json(sections=["library"])
+    assert [next(iter(entry)) for entry in result["library"]] == [
+        "Device:R",
+        "Device:C",
+    ]
+    assert result["library_aliases"] == aliases
+    result = schema.to_json(sections=["library"], used_symbols_only=True)
+    assert [next(iter(entry)) for entry in result["library"]] == ["Device:R"]
+
+
+def test_symbol_body_key_includes_graphics():
+    from dataclasses import replace
+
+    from cifconv.symbol import Symbol, add_library_symbol
+
+    def symbol(lib_id: str, body: str) -> Symbol:
+        input_symbol = f"""(symbol "{lib_id}"
+            (property "Reference" "U" (at 0 0 0))
+            (symbol "X_0_1" {body})
+            (symbol "X_1_1"
+                (pin input line (at -5.08 0 0) (length 2.54)
+                    (name "A" (effects (font (size 1.27 1.27))))
+                    (number "1" (effects (font (size 1.27 1.27)))))))"""
+        tokens = list(kicad_sch_tokenize(input_symbol))
+        expr = read_expr(t for t in tokens)
+        assert isinstance(expr, ListExpr)
+        return process_symbol(expr)
+
+    square = "(rectangle (start -2.54 -2.54) (end 2.54 2.54))"
+    circle = "(circle (center 0 0) (radius 2.54))"
+    a = symbol("A:U", square)
+    b = symbol("B:U", square)
+    c = symbol("C:U", circle)
+    # same pins and the same box, but a different body
+    assert a.bbox == c.bbox
+    assert a.body_key() == b.body_key()
+    assert a.body_key() != c.body_key()
+
+    library: dict[str, Symbol] = {}
+    assert add_library_symbol(library, a) is a
+    assert add_library_symbol(library, replace(c, lib_id="A:U")).lib_id == "A:U_2"
+
+
+def test_schema_to_json_library_aliases_leaves_symbols_unchanged():
+    from cifconv.pin import Pin
+    from cifconv.schema import Schema
+    from cifconv.symbol import Symbol
+
+    schema = Schema()
+    for lib_id in ["Device:R", "ProjectA:R"]:
+        schema.symbols[lib_id] = Symbol(
+            lib_id=lib_id,
+            type=lib_id.split(":")[0],
+            ref="R",
+            pins=[Pin(number="1", name="~", type="passive", rel_x=0, rel_y=3.81)],
+            package=None,
+        )
+    pins = schema.symbols["ProjectA:R"].pins
+
+    result = schema.to_json(sections=["library"], library_aliases=True)
+
+    assert result["library_aliases"] == {"ProjectA:R": "Device:R"}
+    assert [next(iter(entry)) for entry in result["library"]] == ["Device:R"]
+    assert schema.symbols["ProjectA:R"].pins is pins
+    assert schema.symbol_aliases == {}
+
+
+def test_cifconv_eval_used_symbols_only():
+    from cifconv.cifconv_eval import cifconv_eval
+
+    input_data = """
+(kicad_sch
+    (lib_symbols
+        (symbol "Device:C"
+            (property "Reference" "C" (at 0 0 0))
+            (symbol "C_1_1"
+                (pin passive line (at 0 3.81 270) (length 2.79) (name "~") (number "1"))
+            )
+        )
+        (symbol "Device:R"
+            (property "Reference" "R" (at 0 0 0))
+            (symbol "R_1_1"
+                (pin passive line (at 0 3.81 270) (length 1.27) (name "~") (number "1"))
+            )
+        )
+        (symbol "Device:L"
+            (property "Reference" "L" (at 0 0 0))
+        )
+    )
+    (symbol
+        (lib_id "Device:R")
+        (at 10 20 0)
+        (uuid "inst-r1")
+        (property "Reference" "R1" (at 10 20 0))
+    )
+    (symbol
+        (lib_id "Device:C")
+        (at 30 20 0)
+        (uuid "inst-c1")
+        (property "Reference" "C1" (at 30 20 0))
+    )
+)
+"""
+    schema = cifconv_eval(
+        read_expr(kicad_sch_tokenize(input_data)), used_symbols_only=True
+    )
+    # unused symbols are not evaluated, used ones keep the library order
+    assert list(schema.symbols.keys()) == ["Device:C", "Device:R"]
+    assert schema.instances[0].symbol is schema.symbols["Device:R"]
+    assert schema.instances[0].pin_instances is not None
+
+    schema = cifconv_eval(read_expr(kicad_sch_tokenize(input_data)))
+    assert list(schema.symbols.keys()) == ["Device:C", "Device:R", "Device:L"]
+    library = schema.to_json(sections=["library"], used_symbols_only=True)
+    assert [next(iter(entry)) for entry in library["library"]] == [
+        "Device:C",
+        "Device:R",
+    ]
+
+
+def test_schema_nets_long_wire_chain():
+    import sys
+
+    from cifconv.schema import Schema
+
+    schema = Schema()
+    # much longer than the recursion limit
+    segments = sys.getrecursionlimit() * 10
+    for i in range(segments):
+        wire = Wire(uuid=f"wire-{i}", points=[Point(i, 0), Point(i + 1, 0)])
+        schema.wires[wire.uuid] = wire
+
+    nets = schema.nets
+    assert len(nets) == 1
+    assert len(nets[0].wires) == segments
+
+
+def test_schema_nets_assembly_scales_linearly():
+    import sys
+
+    import cifconv.connectivity
+    import cifconv.net
+    from cifconv.connectivity import Connectivity
+    from cifconv.schema import Schema
+
+    assembly_files = {cifconv.connectivity.__file__, cifconv.net.__file__}
+
+    def assembly_lines(net_count: int) -> float:
+        """Lines of assembly code run per element to list the nets."""
+        schema = Schema()
+        for i in range(net_count):
+            wire = Wire(uuid=f"wire-{i}", points=[Point(0, i), Point(10, i)])
+            schema.wires[wire.uuid] = wire
+            if i % 2 == 0:
+                schema.labels.append(
+                    Label(text=f"N{i}", x=0, y=i, rotation=0, uuid=f"label-{i}")
+                )
+        connectivity = Connectivity(schema)
+        elements = len(schema.wires) + len(schema.labels)
+        lines = 0
+
+        def count_lines(frame, event, arg):
+            nonlocal lines
+            if event == "line":
+                lines += 1
+                # fail fast rather than run a superlinear assembly to the end
+                if lines > 1000 * elements:
+                    raise AssertionError("more than 1000 lines per element")
+            return count_lines
+
+        def trace(frame, event, arg):
+            # every line run in the assembly modules, loops included
+            if frame.f_code.co_filename in assembly_files:
+                return count_lines
+            return None
+
+        previous = sys.gettrace()
+        sys.settrace(trace)
+        try:
+            nets = connectivity.nets()
+        finally:
+            sys.settrace(previous)
+        assert len(nets) == net_count
+        return lines / elements
+
+    small = assembly_lines(500)
+    large = assembly_lines(50_000)
+    # O(groups x points) assembly would run ~100 times more lines per element
+    assert large <= 1.5 * small
+
+
+def test_schema_net_of():
+    from cifconv.bus import Bus
+    from cifconv.schema import Schema
+
+    schema = Schema()
+    wire1 = Wire(uuid="wire-1", points=[Point(0, 0), Point(10, 0)])
+    wire2 = Wire(uuid="wire-2", points=[Point(10, 0), Point(10, 10)])
+    wire3 = Wire(uuid="wire-3", points=[Point(50, 50), Point(60, 50)])
+    bus = Bus(uuid="bus-1", points=[Point(100, 0), Point(200, 0)])
+    for wire in (wire1, wire2, wire3):
+        schema.wires[wire.uuid] = wire
+    schema.buses[bus.uuid] = bus
+    schema.labels.append(Label(text="A", x=0, y=0, rotation=0, uuid="label-1"))
+
+    net = schema.net_of(wire1)
+    assert net is not None
+    assert net.name == "A"
+    assert schema.net_of(wire2) is net
+    assert schema.net_of(wire3) is not net
+    bus_net = schema.net_of(bus)
+    assert bus_net is not None and bus_net.buses == [bus]
+    # an equal but different object is not part of the schema
+    assert schema.net_of(Wire(uuid="wire-1", points=list(wire1.points))) is None
+
+    result = schema.to_json(sections=["buses", "wires"])
+    assert [w["net"] for w in result["wires"]] == [
+        net.uuid,
+        net.uuid,
+        schema.net_of(wire3).uuid,  # type: ignore[union-attr]
+    ]
+    assert result["buses"][0]["net"] == bus_net.uuid
+
+
+def test_schema_nets_rotated_pin_matches_wire():
+    import math
+
+    from cifconv.pin import Pin
+    from cifconv.schema import Schema
+    from cifconv.symbol import Symbol
+    from cifconv.symbol_instance import SymbolInstance
+
+    schema = Schema()
+    symbol = Symbol(
+        lib_id="Device:R",
+        type="Device",
+        ref="R",
+        pins=[Pin(number="1", name="1", type="passive", rel_x=-5.08, rel_y=3.81)],
+        package=None,
+    )
+    instance = SymbolInstance(
+        uuid="inst-1",
+        lib_id="Device:R",
+        designator="R1",
+        x=100.33,
+        y=50.8,
+        rotation=30,
+        symbol=symbol,
+    )
+    schema.instances.append(instance)
+    pin = instance.pin_instances[0]  # type: ignore[index]
+    # the wire endpoint is rounded to KiCad's resolution, unlike the pin
+    rad = math.radians(30)
+    x = round(100.33 - 5.08 * math.cos(rad) - 3.81 * math.sin(rad), 4)
+    y = round(50.8 - 5.08 * math.sin(rad) + 3.81 * math.cos(rad), 4)
+    assert (pin.x, pin.y) != (x, y)
+    schema.wires["wire-1"] = Wire(uuid="wire-1", points=[Point(x, y), Point(0, 0)])
+
+    nets = schema.nets
+    assert len(nets) == 1
+    assert nets[0].connected_pins == [(instance, pin)]
+
+
+def test_schema_nets_with_grid_tolerance():
+    from cifconv.coord import CoordGrid
+    from cifconv.schema import Schema
+
+    def make_schema(grid: CoordGrid) -> Schema:
+        schema = Schema(grid=grid)
+        wire1 = Wire(uuid="wire-1", points=[Point(0, 0), Point(10, 0)])
+        # 0.1 mil off the end of wire1
+        wire2 = Wire(uuid="wire-2", points=[Point(10.00254, 0), Point(20, 0)])
+        schema.wires[wire1.uuid] = wire1
+        schema.wires[wire2.uuid] = wire2
+        schema.labels.append(
+            Label(text="A", x=20.0001, y=0, rotation=0, uuid="label-1")
+        )
+        return schema
+
+    assert len(make_schema(CoordGrid()).nets) == 2
+
+    nets = make_schema(CoordGrid(tolerance=0.003)).nets
+    assert len(nets) == 1
+    assert nets[0].name == "A"
+
+
+def test_schema_nets_wire_ending_on_segment_interior():
+    from cifconv.schema import Schema
+
+    schema = Schema()
+    wire1 = Wire(uuid="wire-1", points=[Point(0, 0), Point(20, 0)])
+    # T-joint onto the middle of wire1
+    wire2 = Wire(uuid="wire-2", points=[Point(10, 0), Point(10, 10)])
+    # crosses wire1 without a junction, so it stays separate
+    wire3 = Wire(uuid="wire-3", points=[Point(15, -5), Point(15, 5)])
+    for wire in (wire1, wire2, wire3):
+        schema.wires[wire.uuid] = wire
+
+    nets = schema.nets
+    assert len(nets) == 2
+    assert schema.net_of(wire1) is schema.net_of(wire2)
+    assert schema.net_of(wire3) is not schema.net_of(wire1)
+
+
+def test_schema_nets_junction_connects_crossing_wires():
+    from cifconv.junction import Junction
+    from cifconv.schema import Schema
+
+    schema = Schema()
+    wire1 = Wire(uuid="wire-1", points=[Point(0, 0), Point(20, 0)])
+    wire2 = Wire(uuid="wire-2", points=[Point(10, -10), Point(10, 10)])
+    schema.wires[wire1.uuid] = wire1
+    schema.wires[wire2.uuid] = wire2
+    schema.junctions.append(Junction(x=10, y=0, uuid="junction-1"))
+
+    nets = schema.nets
+    assert len(nets) == 1
+    assert len(nets[0].wires) == 2
+
+
+def test_schema_nets_label_and_pin_on_segment_interior():
+    from cifconv.pin_instance import PinInstance
+    from cifconv.schema import Schema
+    from cifconv.symbol_instance import SymbolInstance
+
+    schema = Schema()
+    wire = Wire(uuid="wire-1", points=[Point(0, 0), Point(20, 0)])
+    schema.wires[wire.uuid] = wire
+    schema.labels.append(Label(text="MID", x=7.62, y=0, rotation=0, uuid="label-1"))
+    pin = PinInstance(number="1", name="1", type="passive", x=12.7, y=0, rotation=0)
+    instance = SymbolInstance(
+        uuid="inst-1",
+        lib_id="Device:R",
+        designator="R1",
+        x=12.7,
+        y=0,
+        pin_instances=[pin],
+    )
+    schema.instances.append(instance)
+
+    nets = schema.nets
+    assert len(nets) == 1
+    assert nets[0].name == "MID"
+    assert nets[0].connected_pins == [(instance, pin)]
+
+
+def test_process_junction():
+    input_data = """
+    (junction
+        (at 12.7 25.4)
+        (diameter 0)
+        (color 0 0 0 0)
+        (uuid "junction-uuid")
+    )
+"""
+    tokens = list(kicad_sch_tokenize(input_data))
+    expr = read_expr(t for t in tokens)
+    assert isinstance(expr, ListExpr)
+    junction = process_junction(expr)
+
+    assert junction.x == 12.7
+    assert junction.y == 25.4
+    assert junction.uuid == "junction-uuid"
+
+    tokens = list(kicad_sch_tokenize('(junction (uuid "aaa-bbb"))'))
+    expr = read_expr(t for t in tokens)
+    assert isinstance(expr, ListExpr)
+    with pytest.raises(ValueError, match="Junction is missing position"):
+        process_junction(expr)
+
+
+def test_process_global_and_hierarchical_label():
+    input_data = """
+    (global_label "SDA"
+        (shape bidirectional)
+        (at 50.8 25.4 180)
+        (effects (font (size 1.27 1.27)) (justify right))
+        (uuid "global-uuid")
+        (property "Intersheetrefs" "${INTERSHEET_REFS}" (at 0 0 0))
+    )
+"""
+    expr = read_expr(t for t in kicad_sch_tokenize(input_data))
+    assert isinstance(expr, ListExpr)
+    label = process_global_label(expr)
+    assert label == Label(
+        text="SDA",
+        x=50.8,
+        y=25.4,
+        rotation=180,
+        uuid="global-uuid",
+        kind="global_label",
+    )
+
+    input_data = """
+    (hierarchical_label "CLK"
+        (shape input)
+        (at 10 20 0)
+        (uuid "hier-uuid")
+    )
+"""
+    expr = read_expr(t for t in kicad_sch_tokenize(input_data))
+    assert isinstance(expr, ListExpr)
+    label = process_hierarchical_label(expr)
+    assert label.kind == "hierarchical_label"
+    assert (label.text, label.x, label.y) == ("CLK", 10, 20)
+
+    expr = read_expr(
+        t for t in kicad_sch_tokenize('(global_label "X" (uuid "aaa"))')
+    )
+    assert isinstance(expr, ListExpr)
+    with pytest.raises(ValueError, match="GlobalLabel is missing position"):
+        process_global_label(expr)
+
+
+def test_power_symbols_merge_into_one_net():
+    from cifconv.cifconv_eval import cifconv_eval
+
+    input_data = """
+(kicad_sch
+    (version 20231120)
+    (generator "eeschema")
+    (lib_symbols
+        (symbol "power:GND"
+            (power)
+            (property "Reference" "#PWR" (at 0 0 0))
+            (symbol "GND_0_1"
+                (pin power_in line (at 0 0 270) (length 0) (name "GND") (number "1"))
+            )
+        )
+    )
+    (wire (pts (xy 0 0) (xy 10 0)) (uuid "w1"))
+    (wire (pts (xy 0 20) (xy 10 20)) (uuid "w2"))
+    (symbol (lib_id "power:GND") (at 10 0 0) (unit 1) (uuid "p1")
+        (property "Reference" "#PWR01" (at 0 0 0))
+        (property "Value" "GND" (at 0 0 0))
+    )
+    (symbol (lib_id "power:GND") (at 10 20 0) (unit 1) (uuid "p2")
+        (property "Reference" "#PWR02" (at 0 0 0))
+        (property "Value" "GND" (at 0 0 0))
+    )
+)
+"""
+    schema = cifconv_eval(read_expr(t for t in kicad_sch_tokenize(input_data)))
+    assert schema.symbols["power:GND"].power
+
+    nets = schema.nets
+    assert len(nets) == 1
+    assert nets[0].name == "GND"
+    assert len(nets[0].wires) == 2
+    assert [instance.designator for instance, _ in nets[0].connected_pins or ()] == [
+        "#PWR01",
+        "#PWR02",
+    ]
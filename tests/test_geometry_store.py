@@ -0,0 +1,130 @@
+from pathlib import Path
+
+import pytest
+
+from cifconv.bus import Bus
+from cifconv.cifconv_eval import cifconv_eval
+from cifconv.coord import CoordGrid
+from cifconv.geometry_store import GeometryStore, PointsView
+from cifconv.kicad_schematic_tokenizer import kicad_sch_tokenize
+from cifconv.point import Point
+from cifconv.read_expr import read_expr
+from cifconv.schema import Schema
+from cifconv.wire import Wire
+
+SAMPLE = Path(__file__).parent.parent / "docs" / "sample.kicad_sch"
+
+
+def test_points_view_reads_like_a_list():
+    store = GeometryStore()
+    store.append("a", [Point(0, 0)])
+    points = [Point(1, 2), Point(3, 4), Point(5.5, -6)]
+    view = store.append("b", points)
+
+    assert len(store) == 2
+    assert store.uuids == ["a", "b"]
+    assert list(store.offsets) == [0, 1, 4]
+    assert len(view) == 3
+    assert view[0] == Point(1, 2)
+    assert view[-1] == Point(5.5, -6)
+    assert view[1:] == points[1:]
+    assert view == points
+    assert list(zip(view, view[1:])) == list(zip(points, points[1:]))
+    assert view.coordinates() == [(1, 2), (3, 4), (5.5, -6)]
+    with pytest.raises(IndexError):
+        view[3]
+
+
+def test_pack_replaces_points_once():
+    store = GeometryStore()
+    wire = Wire(uuid="w", points=[Point(0, 0), Point(10, 0)])
+    store.pack(wire)
+    view = wire.points
+    assert isinstance(view, PointsView)
+    store.pack(wire)
+    assert wire.points is view
+    assert len(store) == 1
+
+
+def test_array_operations():
+    np = pytest.importorskip("numpy")
+    store = GeometryStore()
+    store.append("a", [Point(0, 0), Point(10, 5)])
+    store.append("b", [Point(-3, 7), Point(2, 1), Point(4, 9)])
+    grid = CoordGrid()
+
+    keys = store.grid_keys(grid)
+    expected = [grid.key(x, y) for x, y in zip(store.xs, store.ys)]
+    assert keys.tolist() == expected
+    assert store.bboxes().tolist() == [[0, 0, 10, 5], [-3, 1, 4, 9]]
+    assert np.shares_memory(store.as_numpy()["xs"], np.frombuffer(store.xs))
+
+
+def load_sample(columnar: bool) -> Schema:
+    return cifconv_eval(
+        read_expr(kicad_sch_tokenize(SAMPLE.read_text())), columnar=columnar
+    )
+
+
+def test_columnar_schema_has_the_same_output():
+    schema = load_sample(columnar=True)
+    assert schema.wire_store is not None
+    assert len(schema.wire_store) == len(schema.wires)
+    assert all(isinstance(wire.points, PointsView) for wire in schema.wires.values())
+
+    assert schema.to_json() == load_sample(columnar=False).to_json()
+
+
+def test_pack_geometry_keeps_nets():
+    schema = Schema()
+    schema.wires["w1"] = Wire(uuid="w1", points=[Point(0, 0), Point(10, 0)])
+    schema.wires["w2"] = Wire(uuid="w2", points=[Point(5, 0), Point(5, 10)])
+    schema.buses["b1"] = Bus(uuid="b1", points=[Point(0, 50), Point(20, 50)])
+    before = [(net.uuid, net.name) for net in schema.nets]
+
+    schema.pack_geometry()
+    schema.invalidate_nets()
+
+    assert [(net.uuid, net.name) for net in schema.nets] == before
+    assert schema.bus_store is not None and schema.bus_store.uuids == ["b1"]
+    schema.add_wire(Wire(uuid="w3", points=[Point(10, 0), Point(10, 10)]))
+    assert len(schema.nets) == 2
+
+
+def test_pack_geometry_drops_removed_and_replaced_wires():
+    schema = Schema()
+    for index in range(3):
+        wire = Wire(uuid=f"w{index}", points=[Point(index, 0), Point(index, 10)])
+        schema.wires[wire.uuid] = wire
+    schema.pack_geometry()
+    store = schema.wire_store
+    assert store is not None
+    removed = schema.wires["w1"]
+    replaced = schema.wires["w2"]
+
+    schema.remove_wire(removed)
+    schema.add_wire(Wire(uuid="w2", points=[Point(5, 5), Point(6, 5), Point(7, 5)]))
+    # stale until the next pack
+    assert store.uuids == ["w0", "w1", "w2"]
+    schema.pack_geometry()
+
+    assert schema.wire_store is store
+    assert store.uuids == ["w0", "w2"]
+    assert list(store.offsets) == [0, 2, 5]
+    assert list(store.xs) == [0, 0, 5, 6, 7]
+    assert schema.wires["w2"].points == [Point(5, 5), Point(6, 5), Point(7, 5)]
+    # the dropped wires still read their own points
+    assert removed.points == [Point(1, 0), Point(1, 10)]
+    assert replaced.points == [Point(2, 0), Point(2, 10)]
+    assert removed.points.store is not store
+
+
+def test_repack_keeps_an_unchanged_store():
+    store = GeometryStore()
+    wires = [Wire(uuid="a", points=[Point(0, 0), Point(1, 1)])]
+    store.repack(wires)
+    xs = store.xs
+    view = wires[0].points
+    store.repack(wires)
+    assert store.xs is xs
+    assert wires[0].points is view
@@ -0,0 +1,166 @@
+from pathlib import Path
+
+from cifconv.cifconv_eval import cifconv_eval
+from cifconv.kicad_schematic_tokenizer import kicad_sch_tokenize
+from cifconv.label import Label
+from cifconv.merge import MergeSource, merge_schemas
+from cifconv.pin import Pin
+from cifconv.point import Point
+from cifconv.read_expr import read_expr
+from cifconv.schema import Schema
+from cifconv.symbol import Symbol
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.wire import Wire
+
+SAMPLE = Path(__file__).parent.parent / "docs" / "sample.kicad_sch"
+
+
+def make_symbol(rel_y: float = 0) -> Symbol:
+    return Symbol(
+        lib_id="Device:R",
+        type="Device",
+        ref="R",
+        pins=[
+            Pin(number="1", name="~", type="passive", rel_x=0, rel_y=rel_y),
+            Pin(number="2", name="~", type="passive", rel_x=10, rel_y=rel_y),
+        ],
+        package=None,
+    )
+
+
+def make_design(symbol: Symbol, label: str = "VIN") -> Schema:
+    """R1 and R2 in series, the middle wire labelled with a global label."""
+    schema = Schema()
+    schema.symbols[symbol.lib_id] = symbol
+    for index, x in enumerate([0, 20], start=1):
+        schema.instances.append(
+            SymbolInstance(
+                uuid=f"r{index}",
+                lib_id=symbol.lib_id,
+                designator=f"R{index}",
+                x=x,
+                y=0,
+                symbol=symbol,
+            )
+        )
+    schema.wires["w1"] = Wire(uuid="w1", points=[Point(10, 0), Point(20, 0)])
+    schema.labels.append(
+        Label(text=label, x=15, y=0, rotation=0, uuid="l1", kind="global_label")
+    )
+    return schema
+
+
+def pin_partition(schema: Schema):
+    return sorted(
+        tuple(
+            sorted(
+                (instance.designator, pin.number)
+                for instance, pin in net.connected_pins or ()
+            )
+        )
+        for net in schema.nets
+    )
+
+
+def test_merge_remaps_uuids_and_designators():
+    symbol = make_symbol()
+    merged = merge_schemas(
+        [make_design(symbol), MergeSource(make_design(symbol), dx=100, dy=50)]
+    )
+
+    assert [instance.designator for instance in merged.instances] == [
+        "R1",
+        "R2",
+        "R3",
+        "R4",
+    ]
+    assert len({instance.uuid for instance in merged.instances}) == 4
+    assert list(merged.wires)[0] == "w1"
+    assert merged.wires[list(merged.wires)[1]].points == [
+        Point(110, 50),
+        Point(120, 50),
+    ]
+    assert merged.instances[3].pin_instances[0].x == 120
+    assert list(merged.symbols) == ["Device:R"]
+    # the two middle wires share the global label
+    assert pin_partition(merged) == [
+        (("R1", "2"), ("R2", "1"), ("R3", "2"), ("R4", "1")),
+    ]
+
+
+def test_merge_reports_remapped_identifiers():
+    target = make_design(make_symbol())
+    # a symbol with the same lib_id but another body
+    source = make_design(make_symbol(rel_y=5), label="OTHER")
+    source.instances[0].designator = "R3"
+
+    (mapping,) = target.merge([source])
+
+    assert mapping.lib_ids == {"Device:R": "Device:R_2"}
+    assert mapping.designators == {"R2": "R4"}
+    assert set(mapping.uuids) == {"r1", "r2", "w1", "l1"}
+    assert [instance.designator for instance in target.instances] == [
+        "R1",
+        "R2",
+        "R3",
+        "R4",
+    ]
+    assert target.instances[2].lib_id == "Device:R_2"
+    assert target.instances[2].symbol is target.symbols["Device:R_2"]
+
+
+def test_merge_renames_the_reference_attribute():
+    symbol = make_symbol()
+    target = make_design(symbol)
+    source = make_design(symbol)
+    for instance in source.instances:
+        instance.attributes = {"Reference": instance.designator, "Value": "10k"}
+    source.compact()
+    compacted = source.instances[0].attributes
+
+    target.merge([source])
+
+    assert [
+        (instance.designator, dict(instance.attributes or {}))
+        for instance in target.instances[2:]
+    ] == [
+        ("R3", {"Reference": "R3", "Value": "10k"}),
+        ("R4", {"Reference": "R4", "Value": "10k"}),
+    ]
+    assert dict(compacted) == {"Reference": "R1", "Value": "10k"}
+    assert target.find_instances({"Reference": "R3"}) == [target.instances[2]]
+
+
+def test_merge_into_computed_nets_updates_only_touched_nets():
+    symbol = make_symbol()
+    target = make_design(symbol)
+    target.wires["w9"] = Wire(uuid="w9", points=[Point(0, 90), Point(10, 90)])
+    untouched = next(net for net in target.nets if net.wires == [target.wires["w9"]])
+
+    target.merge([MergeSource(make_design(symbol), dx=100)])
+
+    # reused as is, while the VIN net is joined by the copy's global label
+    assert any(net is untouched for net in target.nets)
+    vin = target.net_by_name("VIN")
+    assert vin is not None and len(vin.wires) == 2
+    fresh = Schema()
+    fresh.merge([target])
+    assert pin_partition(target) == pin_partition(fresh)
+
+
+def test_merge_sample_twice():
+    def load() -> Schema:
+        return cifconv_eval(read_expr(kicad_sch_tokenize(SAMPLE.read_text())))
+
+    single = load()
+    merged = merge_schemas([load(), MergeSource(load(), dx=1000)])
+
+    assert len(merged.instances) == 2 * len(single.instances)
+    assert len(merged.wires) == 2 * len(single.wires)
+    assert len(merged.symbols) == len(single.symbols)
+    assert len({instance.designator for instance in merged.instances}) == len(
+        merged.instances
+    )
+    unnamed = [net for net in single.nets if net.name.startswith("net_")]
+    merged_unnamed = [net for net in merged.nets if net.name.startswith("net_")]
+    assert len(merged_unnamed) == 2 * len(unnamed)
@@ -0,0 +1,82 @@
+from cifconv.label import Label
+from cifconv.pin_instance import PinInstance
+from cifconv.point import Point
+from cifconv.schema import Schema
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.wire import Wire
+
+
+def make_instance(designator: str, x: float, y: float) -> SymbolInstance:
+    """A two pin instance with pin 1 at (x, y) and pin 2 at (x + 10, y)."""
+    return SymbolInstance(
+        uuid=f"{designator}-uuid",
+        lib_id="Device:R",
+        designator=designator,
+        x=x,
+        y=y,
+        pin_instances=[
+            PinInstance(number="1", name="1", type="passive", x=x, y=y, rotation=0),
+            PinInstance(
+                number="2", name="2", type="passive", x=x + 10, y=y, rotation=0
+            ),
+        ],
+    )
+
+
+def make_schema() -> Schema:
+    # R1 - VCC - R2 - R3 (via net_0), R4 unconnected
+    schema = Schema()
+    schema.wires["w1"] = Wire(uuid="w1", points=[Point(10, 0), Point(20, 0)])
+    schema.wires["w2"] = Wire(uuid="w2", points=[Point(30, 0), Point(40, 0)])
+    schema.labels.append(Label(text="VCC", x=15, y=0, rotation=0, uuid="l1"))
+    for designator, x in (("R1", 0), ("R2", 20), ("R3", 40), ("R4", 100)):
+        schema.instances.append(make_instance(designator, x, 0))
+    return schema
+
+
+def test_net_lookups():
+    schema = make_schema()
+    vcc = schema.net_by_name("VCC")
+    assert vcc is not None
+    assert schema.net_by_id(vcc.uuid) is vcc
+    assert schema.net_by_name("GND") is None
+    assert schema.net_by_id("nope") is None
+
+    assert schema.net_of_pin("R1", "2") is vcc
+    assert schema.net_of_pin("R2", "1") is vcc
+    other = schema.net_of_pin("R2", "2")
+    assert other is not None and other is not vcc
+    assert schema.net_of_pin("R1", "1") is None
+    assert schema.net_of_pin("R9", "1") is None
+
+    assert [
+        (instance.designator, pin.number)
+        for instance, pin in schema.net_index.pins_of_net(vcc)
+    ] == [("R1", "2"), ("R2", "1")]
+    assert [instance.designator for instance in schema.instances_on_net(other)] == [
+        "R2",
+        "R3",
+    ]
+
+
+def test_neighbours():
+    schema = make_schema()
+    r1, r2, r3, r4 = schema.instances
+    assert schema.neighbours(r2) == [r1, r3]
+    assert schema.neighbours(r1) == [r2]
+    assert schema.neighbours(r4) == []
+    assert schema.net_index.nets_of_instance(r2) == [
+        schema.net_by_name("VCC"),
+        schema.net_of_pin("R3", "1"),
+    ]
+
+
+def test_net_index_follows_mutations():
+    schema = make_schema()
+    index = schema.net_index
+    assert schema.net_index is index
+
+    schema.add_wire(Wire(uuid="w3", points=[Point(110, 0), Point(120, 0)]))
+    schema.add_instance(make_instance("R5", 120, 0))
+    assert schema.net_index is not index
+    assert schema.neighbours(schema.instances[3]) == [schema.instances[4]]
@@ -0,0 +1,18 @@
+from cifconv.point_index import PointIndex
+
+
+def test_point_index_query_segment():
+    index = PointIndex(cell_size=5)
+    index.add("a", 0, 0)
+    index.add("b", 12, 0)
+    index.add("c", 30, 0)
+    index.add("d", 12, 1)
+
+    assert sorted(index.query_segment(0, 0, 30, 0)) == ["a", "b", "c"]
+    assert index.query_segment(0, 0, 30, 0, interior_only=True) == ["b"]
+    assert index.query_segment(12, 1, 12, 1) == ["d"]
+    assert sorted(index.query_segment(0, 0, 24, 2)) == ["a", "d"]
+
+    index.remove("b", 12, 0)
+    assert sorted(index.query_segment(0, 0, 30, 0)) == ["a", "c"]
+    assert len(index) == 3
@@ -0,0 +1,231 @@
+import pytest
+
+import cifconv.project
+from cifconv.merge import MergeSource, merge_schemas
+from cifconv.project import load_project
+
+ROOT_SHEET = """
+(kicad_sch
+    (version 20231120)
+    (generator "eeschema")
+    (uuid "root-uuid")
+    (lib_symbols)
+    (wire (pts (xy 0 10) (xy 50 10)) (uuid "w-a"))
+    (wire (pts (xy 0 40) (xy 50 40)) (uuid "w-b"))
+    (label "A_IN" (at 0 10 0) (uuid "l-a"))
+    (sheet (at 50 0) (size 20 20) (uuid "sheet-a")
+        (property "Sheetname" "Channel A" (at 50 0 0))
+        (property "Sheetfile" "channel.kicad_sch" (at 50 20 0))
+        (pin "IN" input (at 50 10 180) (uuid "pin-a"))
+    )
+    (sheet (at 50 30) (size 20 20) (uuid "sheet-b")
+        (property "Sheetname" "Channel B" (at 50 30 0))
+        (property "Sheetfile" "channel.kicad_sch" (at 50 50 0))
+        (pin "IN" input (at 50 40 180) (uuid "pin-b"))
+    )
+)
+"""
+
+CHANNEL_SHEET = """
+(kicad_sch
+    (version 20231120)
+    (generator "eeschema")
+    (uuid "channel-uuid")
+    (lib_symbols
+        (symbol "Device:R"
+            (property "Reference" "R" (at 0 0 0))
+            (symbol "R_1_1"
+                (pin passive line (at 0 0 0) (length 0) (name "~") (number "1"))
+            )
+        )
+    )
+    (hierarchical_label "IN" (shape input) (at 0 0 0) (uuid "h-in"))
+    (wire (pts (xy 0 0) (xy 10 0)) (uuid "w-in"))
+    (symbol (lib_id "Device:R") (at 10 0 0) (unit 1) (uuid "r1")
+        (property "Reference" "R1" (at 0 0 0))
+        (instances
+            (project "test"
+                (path "/root-uuid/sheet-a" (reference "R101") (unit 1))
+            )
+        )
+    )
+)
+"""
+
+
+@pytest.fixture
+def project_dir(tmp_path):
+    (tmp_path / "root.kicad_sch").write_text(ROOT_SHEET)
+    (tmp_path / "channel.kicad_sch").write_text(CHANNEL_SHEET)
+    return tmp_path
+
+
+def test_load_project_parses_each_file_once(project_dir, monkeypatch):
+    parsed_paths = []
+    parse_sheet_file = cifconv.project.parse_sheet_file
+
+    def counting_parse_sheet_file(path, used_symbols_only=False):
+        parsed_paths.append(path)
+        return parse_sheet_file(path, used_symbols_only)
+
+    monkeypatch.setattr(cifconv.project, "parse_sheet_file", counting_parse_sheet_file)
+    schema = load_project(project_dir / "root.kicad_sch", max_workers=1)
+
+    assert sorted(parsed_paths) == [
+        str((project_dir / "channel.kicad_sch").resolve()),
+        str((project_dir / "root.kicad_sch").resolve()),
+    ]
+    assert [
+        (instance.path, instance.name_path) for instance in schema.sheet_instances
+    ] == [
+        ("/root-uuid", "/"),
+        ("/root-uuid/sheet-a", "/Channel A/"),
+        ("/root-uuid/sheet-b", "/Channel B/"),
+    ]
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_load_project_stitches_sheet_instances(project_dir, max_workers):
+    schema = load_project(project_dir / "root.kicad_sch", max_workers=max_workers)
+
+    assert sorted(schema.wires) == [
+        "/root-uuid/sheet-a/w-in",
+        "/root-uuid/sheet-b/w-in",
+        "w-a",
+        "w-b",
+    ]
+    # sheets keep their coordinates and are told apart by their number
+    wire_b = schema.wires["/root-uuid/sheet-b/w-in"]
+    assert wire_b.points == schema.wires["/root-uuid/sheet-a/w-in"].points
+    assert wire_b.sheet == 2
+    # the reference of the instance path if the file has one, else the name path
+    assert sorted(instance.designator for instance in schema.instances) == [
+        "/Channel B/R1",
+        "R101",
+    ]
+    # the Reference attribute follows, so the attribute index agrees
+    assert sorted(
+        instance.attributes["Reference"] for instance in schema.instances
+    ) == ["/Channel B/R1", "R101"]
+    assert [
+        instance.designator
+        for instance in schema.find_instances({"Reference": "/Channel B/R1"})
+    ] == ["/Channel B/R1"]
+
+    # each sheet pin connects to the hierarchical label inside its own instance
+    nets = schema.nets
+    assert len(nets) == 2
+    # named after the label in the root sheet
+    net_a = schema.net_of(schema.wires["w-a"])
+    assert net_a is not None
+    assert net_a.name == "A_IN"
+    assert sorted(wire.uuid for wire in net_a.wires) == [
+        "/root-uuid/sheet-a/w-in",
+        "w-a",
+    ]
+    assert [instance.designator for instance, _ in net_a.connected_pins or ()] == [
+        "R101"
+    ]
+    # named after the sheet instance, as both instances have an IN
+    net_b = schema.net_of(schema.wires["w-b"])
+    assert net_b is not None
+    assert net_b.name == "/Channel B/IN"
+    assert schema.net_by_name("/Channel B/IN") is net_b
+    assert schema.net_by_name("IN") is None
+    assert [instance.designator for instance, _ in net_b.connected_pins or ()] == [
+        "/Channel B/R1"
+    ]
+
+
+def test_load_project_rejects_recursive_sheets(tmp_path):
+    (tmp_path / "root.kicad_sch").write_text(
+        ROOT_SHEET.replace("channel.kicad_sch", "root.kicad_sch")
+    )
+    with pytest.raises(ValueError, match="contains itself"):
+        load_project(tmp_path / "root.kicad_sch", max_workers=1)
+
+
+def test_sheet_instances_overlap_without_connecting(project_dir):
+    schema = load_project(project_dir / "root.kicad_sch", max_workers=1)
+
+    output = schema.to_json(sections=["instances", "nets", "wires"])
+    # both channels in the coordinates of their file
+    assert sorted(
+        (instance["placement"]["x"], instance["placement"]["y"])
+        for instance in output["instances"]
+    ) == [(10, 0), (10, 0)]
+    assert all(point["x"] <= 50 for wire in output["wires"] for point in wire["points"])
+    # R101 and /Channel B/R1 sit on the same spot but on two nets
+    assert sorted(
+        sorted(pin["ref"] for pin in net["pins"]) for net in output["nets"]
+    ) == [["/Channel B/R1"], ["R101"]]
+
+
+def test_load_project_renames_conflicting_symbols(project_dir):
+    # the second channel uses another resistor body under the same lib_id
+    (project_dir / "other.kicad_sch").write_text(
+        CHANNEL_SHEET.replace("(at 0 0 0) (length 0)", "(at 0 5 0) (length 0)")
+    )
+    (project_dir / "root.kicad_sch").write_text(
+        ROOT_SHEET.replace(
+            '"Sheetfile" "channel.kicad_sch" (at 50 50 0)',
+            '"Sheetfile" "other.kicad_sch" (at 50 50 0)',
+        )
+    )
+    schema = load_project(project_dir / "root.kicad_sch", max_workers=1)
+
+    assert sorted(schema.symbols) == ["Device:R", "Device:R_2"]
+    instances = {instance.designator: instance for instance in schema.instances}
+    assert instances["R101"].lib_id == "Device:R"
+    assert instances["/Channel B/R1"].lib_id == "Device:R_2"
+    assert instances["/Channel B/R1"].symbol is schema.symbols["Device:R_2"]
+    assert [(pin.x, pin.y) for pin in instances["/Channel B/R1"].pin_instances] == [
+        (10, 5)
+    ]
+
+
+def test_merge_project_twice(project_dir):
+    project = load_project(project_dir / "root.kicad_sch", max_workers=1)
+
+    merged = merge_schemas([project, MergeSource(project, dx=0, dy=1000)])
+
+    # the hierarchical labels of each copy only connect within the copy
+    assert sorted(
+        [instance.designator for instance, _ in net.connected_pins or ()]
+        for net in merged.nets
+    ) == [["/Channel B/R1"], ["/Channel B/R2"], ["R101"], ["R102"]]
+    instances = {instance.designator: instance for instance in merged.instances}
+    assert instances["R102"].references == {"2:/root-uuid/sheet-a": "R102"}
+    assert instances["R102"].sheet == 3
+    assert instances["/Channel B/R2"].sheet == 4
+    assert [
+        (sheet_instance.path, sheet_instance.name_path)
+        for sheet_instance in merged.sheet_instances
+    ] == [
+        ("/root-uuid", "/"),
+        ("/root-uuid/sheet-a", "/Channel A/"),
+        ("/root-uuid/sheet-b", "/Channel B/"),
+        ("2:/root-uuid/sheet-a", "2:/Channel A/"),
+        ("2:/root-uuid/sheet-b", "2:/Channel B/"),
+    ]
+
+
+def test_spatial_index_tells_sheet_instances_apart(project_dir):
+    schema = load_project(project_dir / "root.kicad_sch", max_workers=1)
+    index = schema.spatial_index
+
+    # both channels have their wire at (5, 0)
+    hits = index.query_point(5, 0)
+    assert sorted((hit.element.uuid, hit.sheet) for hit in hits) == [
+        ("/root-uuid/sheet-a/w-in", 1),
+        ("/root-uuid/sheet-b/w-in", 2),
+    ]
+    (hit,) = index.query_point(5, 0, sheet=2)
+    assert hit.element.uuid == "/root-uuid/sheet-b/w-in"
+    assert hit.net is not None and hit.net.name == "/Channel B/IN"
+    assert [
+        (hit.kind, hit.element.designator if hit.kind == "instance" else None)
+        for hit in index.query_rect(-1, -1, 11, 1, sheet=1)
+        if hit.kind in ("wire", "instance")
+    ] == [("wire", None), ("instance", "R101")]
+    assert index.query_rect(-1, -1, 11, 1, sheet=0) == []
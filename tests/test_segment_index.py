@@ -0,0 +1,37 @@
+from cifconv.segment_index import SegmentIndex
+
+
+def test_segment_index_axis_aligned():
+    index = SegmentIndex()
+    index.add(0, 0, 0, 100, 0)
+    index.add(1, 50, -10, 50, 10)
+    index.add(2, 0, 20, 10, 20)
+
+    assert index.query_point(25, 0) == [0]
+    assert index.query_point(50, 0) == [0, 1]
+    assert index.query_point(50, 5) == [1]
+    assert index.query_point(25, 1) == []
+    assert index.query_point(200, 0) == []
+    # ends are on the segment, but not in its interior
+    assert index.query_point(100, 0) == [0]
+    assert index.query_point(100, 0, interior_only=True) == []
+    assert index.query_point(10, 20, interior_only=True) == []
+    assert len(index) == 3
+
+
+def test_segment_index_diagonal():
+    index = SegmentIndex(cell_size=5)
+    index.add(7, 0, 0, 30, 30)
+
+    assert index.query_point(12.7, 12.7) == [7]
+    assert index.query_point(12.7, 12.8) == []
+    assert index.query_point(0, 0, interior_only=True) == []
+
+
+def test_segment_index_tolerance():
+    index = SegmentIndex(tolerance=0.01)
+    index.add(0, 0, 0, 100, 0)
+
+    assert index.query_point(25, 0.005) == [0]
+    assert index.query_point(25, 0.02) == []
+    assert index.query_point(100.005, 0) == [0]
@@ -0,0 +1,192 @@
+import random
+
+from cifconv.bus import Bus
+from cifconv.junction import Junction
+from cifconv.label import Label
+from cifconv.pin_instance import PinInstance
+from cifconv.point import Point
+from cifconv.schema import Schema
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.wire import Wire
+
+
+def make_wire(uuid: str, x1: float, y1: float, x2: float, y2: float) -> Wire:
+    return Wire(uuid=uuid, points=[Point(x1, y1), Point(x2, y2)])
+
+
+def make_instance(designator: str, x: float, y: float) -> SymbolInstance:
+    return SymbolInstance(
+        uuid=f"{designator}-uuid",
+        lib_id="Device:R",
+        designator=designator,
+        x=x,
+        y=y,
+        pin_instances=[
+            PinInstance(number="1", name="1", type="passive", x=x, y=y, rotation=0)
+        ],
+    )
+
+
+def pin_partition(schema: Schema):
+    """The groups of connected pins and the names of their nets."""
+    return sorted(
+        (
+            "" if net.name.startswith("net_") else net.name,
+            tuple(
+                sorted(instance.designator for instance, _ in net.connected_pins or ())
+            ),
+        )
+        for net in schema.nets
+    )
+
+
+def wire_points(schema: Schema):
+    return {
+        uuid: [(point.x, point.y) for point in wire.points]
+        for uuid, wire in schema.wires.items()
+    }
+
+
+def test_simplify_wires_merges_collinear_chain():
+    schema = Schema()
+    for index in range(10):
+        wire = make_wire(f"w{index}", index * 2.54, 0, (index + 1) * 2.54, 0)
+        schema.wires[wire.uuid] = wire
+    schema.instances.append(make_instance("R1", 0, 0))
+    schema.instances.append(make_instance("R2", 25.4, 0))
+
+    stats = schema.simplify_wires()
+
+    assert (stats.wires_before, stats.wires_after, stats.removed) == (10, 1, 9)
+    assert wire_points(schema) == {"w0": [(0, 0), (25.4, 0)]}
+    assert pin_partition(schema) == [("", ("R1", "R2"))]
+
+
+def test_simplify_wires_drops_duplicates_and_merges_overlaps():
+    schema = Schema()
+    for wire in (
+        make_wire("b", 0, 0, 10, 0),
+        make_wire("a", 10, 0, 0, 0),
+        make_wire("c", 5, 0, 20, 0),
+        make_wire("e", 0, 0, 10, 10),
+        make_wire("d", 10, 10, 0, 0),
+    ):
+        schema.wires[wire.uuid] = wire
+
+    stats = schema.simplify_wires()
+
+    assert stats.removed == 3
+    assert wire_points(schema) == {
+        "a": [(0, 0), (20, 0)],
+        "d": [(10, 10), (0, 0)],
+    }
+
+
+def test_simplify_wires_keeps_attachment_vertices():
+    schema = Schema()
+    for wire in (
+        make_wire("w1", 0, 0, 10, 0),
+        make_wire("w2", 10, 0, 20, 0),
+        make_wire("w3", 20, 0, 30, 0),
+        make_wire("w4", 30, 0, 40, 0),
+        make_wire("w5", 40, 0, 50, 0),
+        # crosses the end of w4, connected through the T-joint
+        make_wire("v1", 30, -10, 30, 10),
+    ):
+        schema.wires[wire.uuid] = wire
+    schema.labels.append(Label(text="MID", x=10, y=0, rotation=0, uuid="l1"))
+    schema.junctions.append(Junction(x=20, y=0, uuid="j1"))
+    schema.instances.append(make_instance("R1", 30, 10))
+    schema.instances.append(make_instance("R2", 50, 0))
+    before = pin_partition(schema)
+
+    schema.simplify_wires()
+
+    assert wire_points(schema) == {
+        "w1": [(0, 0), (10, 0)],
+        "w2": [(10, 0), (20, 0)],
+        "w3": [(20, 0), (30, 0)],
+        "w4": [(30, 0), (50, 0)],
+        "v1": [(30, -10), (30, 10)],
+    }
+    assert pin_partition(schema) == before == [("MID", ("R1", "R2"))]
+
+
+def test_simplify_wires_keeps_runs_through_pins_on_crossings():
+    schema = Schema()
+    for wire in (
+        make_wire("w5", 0, 0, 10, 0),
+        make_wire("b", 10, 0, 20, 0),
+        # crosses w5 without a junction, R1 attaches to the lower uuid of the two
+        make_wire("c", 5, -10, 5, 10),
+    ):
+        schema.wires[wire.uuid] = wire
+    schema.instances.append(make_instance("R1", 5, 0))
+    schema.instances.append(make_instance("R2", 20, 0))
+    schema.instances.append(make_instance("R3", 5, 10))
+    before = pin_partition(schema)
+
+    stats = schema.simplify_wires()
+
+    # merged, the run would be named b and take R1 away from c
+    assert stats.removed == 0
+    assert pin_partition(schema) == before == [("", ("R1", "R3")), ("", ("R2",))]
+
+
+def test_simplify_wires_keeps_sheets_apart():
+    schema = Schema()
+    for wire in (
+        make_wire("a1", 0, 0, 10, 0),
+        make_wire("a2", 10, 0, 20, 0),
+        make_wire("b1", 0, 0, 10, 0),
+        make_wire("b2", 10, 0, 20, 0),
+    ):
+        wire.sheet = 1 if wire.uuid.startswith("b") else 0
+        schema.wires[wire.uuid] = wire
+    # only sheet 1 has something attached in the middle
+    schema.labels.append(Label(text="B", x=10, y=0, rotation=0, uuid="l1", sheet=1))
+
+    schema.simplify_wires()
+
+    assert wire_points(schema) == {
+        "a1": [(0, 0), (20, 0)],
+        "b1": [(0, 0), (10, 0)],
+        "b2": [(10, 0), (20, 0)],
+    }
+    assert [wire.sheet for wire in schema.wires.values()] == [0, 1, 1]
+
+
+def test_simplify_wires_preserves_connectivity_of_random_schemas():
+    rng = random.Random(7)
+    for _ in range(20):
+        schema = Schema()
+        for index in range(80):
+            x, y = rng.randrange(8) * 10, rng.randrange(8) * 10
+            length = rng.randrange(1, 4) * 10
+            if rng.random() < 0.5:
+                wire = make_wire(f"w{index:02}", x, y, x + length, y)
+            else:
+                wire = make_wire(f"w{index:02}", x, y, x, y + length)
+            schema.wires[wire.uuid] = wire
+        for index in range(3):
+            x, y = rng.randrange(8) * 10, rng.randrange(8) * 10
+            bus = Bus(uuid=f"b{index}", points=[Point(x, y), Point(x + 20, y)])
+            schema.buses[bus.uuid] = bus
+        for index in range(30):
+            x, y = rng.randrange(9) * 10, rng.randrange(9) * 10
+            schema.instances.append(make_instance(f"R{index}", x, y))
+        for index in range(5):
+            x, y = rng.randrange(9) * 10, rng.randrange(9) * 10
+            schema.labels.append(
+                Label(text=f"L{index}", x=x, y=y, rotation=0, uuid=f"l{index}")
+            )
+            x, y = rng.randrange(9) * 10, rng.randrange(9) * 10
+            schema.junctions.append(Junction(x=x, y=y, uuid=f"j{index}"))
+        before = pin_partition(schema)
+
+        stats = schema.simplify_wires()
+
+        assert stats.removed > 0
+        assert pin_partition(schema) == before
+        # simplifying again changes nothing
+        assert schema.simplify_wires().removed == 0
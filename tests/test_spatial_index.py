@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from cifconv.junction import Junction
+from cifconv.label import Label
+from cifconv.no_connect import NoConnect
+from cifconv.pin_instance import PinInstance
+from cifconv.point import Point
+from cifconv.schema import Schema
+from cifconv.spatial_index import SpatialIndex
+from cifconv.symbol_instance import SymbolInstance
+from cifconv.wire import Wire
+
+
+def make_instance(designator: str, x: float, y: float) -> SymbolInstance:
+    return SymbolInstance(
+        uuid=f"{designator}-uuid",
+        lib_id="Device:R",
+        designator=designator,
+        x=x,
+        y=y,
+        pin_instances=[
+            PinInstance(
+                number="1", name="1", type="passive", x=x + 5, y=y, rotation=0
+            ),
+        ],
+    )
+
+
+@pytest.fixture
+def schema():
+    schema = Schema()
+    schema.wires["w1"] = Wire(uuid="w1", points=[Point(0, 0), Point(100, 0)])
+    schema.wires["w2"] = Wire(
+        uuid="w2", points=[Point(50, 0), Point(50, 50), Point(80, 80)]
+    )
+    schema.labels.append(Label(text="SIG", x=20, y=0, rotation=0, uuid="l1"))
+    schema.junctions.append(Junction(x=50, y=0, uuid="j1"))
+    schema.no_connects.append(NoConnect(x=200, y=200, uuid="nc1"))
+    schema.instances.append(make_instance("R1", 95, 0))
+    return schema
+
+
+def kinds(hits):
+    return [(hit.kind, hit.net.name if hit.net else None) for hit in hits]
+
+
+def test_query_point(schema):
+    index = schema.spatial_index
+    assert len(index) == 7
+
+    assert kinds(index.query_point(20, 0)) == [("wire", "SIG"), ("label", "SIG")]
+    assert kinds(index.query_point(50, 0)) == [
+        ("wire", "SIG"),
+        ("wire", "SIG"),
+        ("junction", "SIG"),
+    ]
+    # on the diagonal segment of w2
+    assert kinds(index.query_point(65, 65)) == [("wire", "SIG")]
+    assert index.query_point(65, 66) == []
+    assert kinds(index.query_point(65, 66, radius=1)) == [("wire", "SIG")]
+
+    hits = index.query_point(100, 1, radius=1)
+    assert kinds(hits) == [("wire", "SIG"), ("pin", "SIG")]
+    assert hits[1].instance is schema.instances[0]
+    assert kinds(index.query_point(96, 0, radius=1)) == [
+        ("wire", "SIG"),
+        ("instance", None),
+    ]
+    assert kinds(index.query_point(200, 200)) == [("no_connect", None)]
+
+
+def test_query_rect(schema):
+    index = schema.spatial_index
+    assert kinds(index.query_rect(60, 10, 70, 70)) == [("wire", "SIG")]
+    assert kinds(index.query_rect(70, 10, 60, 20)) == []
+    assert [hit.kind for hit in index.query_rect(-10, -10, 210, 210)] == [
+        "wire",
+        "wire",
+        "label",
+        "junction",
+        "no_connect",
+        "instance",
+        "pin",
+    ]
+
+
+def test_spatial_index_is_rebuilt_after_mutations(schema):
+    index = schema.spatial_index
+    assert schema.spatial_index is index
+    schema.add_label(Label(text="X", x=10, y=0, rotation=0, uuid="l2"))
+    assert schema.spatial_index is not index
+    assert kinds(schema.spatial_index.query_point(10, 0)) == [
+        ("wire", "SIG"),
+        ("label", "SIG"),
+    ]
+
+
+def test_queries_match_brute_force():
+    rng = random.Random(3)
+    schema = Schema()
+    for index in range(300):
+        x1, y1 = rng.uniform(0, 200), rng.uniform(0, 200)
+        x2, y2 = x1 + rng.uniform(-30, 30), y1 + rng.uniform(-30, 30)
+        wire = Wire(uuid=f"w{index}", points=[Point(x1, y1), Point(x2, y2)])
+        schema.wires[wire.uuid] = wire
+    for index in range(100):
+        schema.junctions.append(
+            Junction(x=rng.uniform(0, 200), y=rng.uniform(0, 200), uuid=f"j{index}")
+        )
+    index = SpatialIndex(schema, cell_size=7)
+    brute_force = SpatialIndex(schema, cell_size=1000)
+    for _ in range(100):
+        x, y = rng.uniform(-10, 210), rng.uniform(-10, 210)
+        radius = rng.uniform(0, 10)
+        assert index.query_point(x, y, radius) == brute_force.query_point(x, y, radius)
+        x2, y2 = x + rng.uniform(-40, 40), y + rng.uniform(-40, 40)
+        assert index.query_rect(x, y, x2, y2) == brute_force.query_rect(x, y, x2, y2)
+
+
+def test_huge_query_only_visits_populated_cells(schema):
+    index = SpatialIndex(schema, cell_size=1)
+    # covers ~4e18 cells, of which only the populated ones are looked at
+    assert len(index.query_rect(-1e9, -1e9, 1e9, 1e9)) == len(index)
+    assert index.query_rect(1e6, 1e6, 1e9, 1e9) == []
+    assert kinds(index.query_point(200, 200, radius=1e9))[-1] == ("pin", "SIG")
+    assert SpatialIndex(Schema()).query_rect(-1e9, -1e9, 1e9, 1e9) == []
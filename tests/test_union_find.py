@@ -0,0 +1,36 @@
+from cifconv.union_find import UnionFind
+
+
+def test_union_find():
+    union_find = UnionFind(5)
+    assert len(union_find) == 5
+    assert [union_find.find(i) for i in range(5)] == [0, 1, 2, 3, 4]
+
+    union_find.union(0, 1)
+    union_find.union(3, 4)
+    assert union_find.find(0) == union_find.find(1)
+    assert union_find.find(3) == union_find.find(4)
+    assert union_find.find(0) != union_find.find(3)
+    assert union_find.find(2) == 2
+
+    root = union_find.union(1, 4)
+    assert {union_find.find(i) for i in (0, 1, 3, 4)} == {root}
+
+
+def test_union_find_add():
+    union_find = UnionFind()
+    first = union_find.add()
+    second = union_find.add()
+    assert (first, second) == (0, 1)
+    assert union_find.find(second) == second
+    union_find.union(first, second)
+    assert union_find.find(first) == union_find.find(second)
+
+
+def test_union_find_long_chain():
+    size = 200_000
+    union_find = UnionFind(size)
+    for i in range(size - 1):
+        union_find.union(i + 1, i)
+    root = union_find.find(0)
+    assert all(union_find.find(i) == root for i in range(size))